@@ -1,93 +1,388 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import HTTPConnection
+from ..config import settings
 from ..models import ChatRequest, ChatResponse, ChatMessage
-from ..services.ai_service import AIService
-from typing import Dict, List
+from ..services.ai_service import AIService, ContextAnswer
+from ..services.course_catalog import CourseCatalog
+from ..services.intents import ANSWERS, QueryIntent, classify
+from ..services.response_cache import ResponseCache
+from ..services.session_store import SessionStore, create_session_store
+from ..services.single_flight import SingleFlight
+from ..services.conversation import retrieval_query
+from ..services.text_utils import normalize_query
+from ..concurrency import run_blocking
+from ..metrics import metrics
+from ..request_context import REQUEST_ID_HEADER, log_prefix, start_request
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import hashlib
+import json
+import time
 import uuid
 
 router = APIRouter()
 
-# In-memory session storage
-sessions: Dict[str, list] = {}
+chat_ttft = metrics.histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from receiving a chat message to sending the first answer chunk, per transport"
+)
+
+chat_latency = metrics.histogram(
+    "chat_request_seconds",
+    "Time to handle one chat message, by transport (rest, sse, ws) and outcome "
+    "(generated, cached, catalog, canned, error, initializing)"
+)
+
+canned_answers = metrics.counter(
+    "canned_answers_total",
+    "Chat messages answered with a fixed answer before retrieval, by intent"
+)
+
+catalog_answers = metrics.counter(
+    "course_catalog_answers_total",
+    "Chat messages answered from the course catalog instead of retrieval and the LLM, by question kind"
+)
+
+async def get_ai_service(request: HTTPConnection) -> AIService:
+    """Return the process-wide AI service, creating it if startup did not."""
+    ai_service = getattr(request.app.state, 'ai_service', None)
+    if ai_service is None:
+        ai_service = AIService()
+        await run_blocking(ai_service.warm_up)
+        request.app.state.ai_service = ai_service
+    return ai_service
+
+def _source_names(context_dicts: List[Dict]) -> List[str]:
+    return [item['metadata']['source'] for item in context_dicts if item.get('metadata', {}).get('source')]
+
+async def retrieve_context(vector_store, message: str, k: Optional[int] = None,
+                           embedding: Optional[List[float]] = None) -> Tuple[List[Dict], List[str]]:
+    """Search for relevant documents and return (context dicts, source names)."""
+    search_results = await vector_store.asimilarity_search(message, k=k, embedding=embedding)
+
+    # Convert search results to consistent format
+    context_dicts = []
+
+    for result in search_results:
+        # Handle both dict and Document object formats
+        if isinstance(result, dict):
+            # It's already a dict
+            context_dicts.append({
+                'content': result.get('content', result.get('page_content', '')),
+                'metadata': result.get('metadata', {})
+            })
+        else:
+            # It's a Document object
+            context_dicts.append({
+                'content': getattr(result, 'page_content', str(result)),
+                'metadata': getattr(result, 'metadata', {})
+            })
+
+    return context_dicts, _source_names(context_dicts)
+
+def get_vector_store(request: HTTPConnection):
+    """Return the vector store, or answer 503 while startup is still opening it or, on a
+    cold index, still scanning files with nothing searchable yet."""
+    vector_store = getattr(request.app.state, 'vector_store', None)
+    progress = getattr(request.app.state, 'index_progress', None)
+    scanning = progress is not None and progress.phase in ("pending", "scanning")
+    if vector_store is None or (scanning and not len(vector_store.keyword_index)):
+        raise HTTPException(status_code=503, detail="The document index is still loading, please retry shortly")
+    return vector_store
+
+def get_single_flight(request: HTTPConnection) -> Optional[SingleFlight]:
+    """Return the request coalescer, or None when single-flight is disabled."""
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return None
+    flight = getattr(request.app.state, 'single_flight', None)
+    if flight is None:
+        flight = SingleFlight()
+        request.app.state.single_flight = flight
+    return flight
+
+def generation_key(kind: str, message: str, context_dicts: List[Dict], history: List[ChatMessage],
+                   summary: str = "") -> Tuple[str, str, str]:
+    """Single-flight key: the normalized question plus a digest of everything else the prompt is built from."""
+    digest = hashlib.sha1()
+    for item in context_dicts:
+        digest.update(item['content'].encode("utf-8") + b"\0")
+    for past in history:
+        digest.update(f"{past.role}:{past.content}".encode("utf-8") + b"\0")
+    digest.update(summary.encode("utf-8"))
+    return (kind, normalize_query(message), digest.hexdigest())
+
+async def generate_answer(request: HTTPConnection, ai_service: AIService, message: str, context_dicts: List[Dict],
+                          history: List[ChatMessage], summary: str = "", intent: Optional[QueryIntent] = None) -> str:
+    """Generate an answer, sharing one generation among concurrent identical requests."""
+    generate = lambda: ai_service.agenerate_response(message, context_dicts, history, summary, intent)
+    flight = get_single_flight(request)
+    if flight is None:
+        return await generate()
+    return await flight.do(generation_key("answer", message, context_dicts, history, summary), generate)
+
+def stream_answer(request: HTTPConnection, ai_service: AIService, message: str, context_dicts: List[Dict],
+                  history: List[ChatMessage], summary: str = "", intent: Optional[QueryIntent] = None) -> AsyncIterator[str]:
+    """Stream an answer; concurrent identical requests all receive the chunks of one stream."""
+    generate = lambda: ai_service.astream_response(message, context_dicts, history, summary, intent)
+    flight = get_single_flight(request)
+    if flight is None:
+        return generate()
+    return flight.stream(generation_key("stream", message, context_dicts, history, summary), generate)
+
+def get_response_cache(request: HTTPConnection) -> Optional[ResponseCache]:
+    """Return the answer cache created at startup, or None when caching is disabled."""
+    return getattr(request.app.state, 'response_cache', None)
+
+def get_course_catalog(request: HTTPConnection) -> Optional[CourseCatalog]:
+    """Return the course catalog loaded at startup, or None when it is disabled."""
+    return getattr(request.app.state, 'course_catalog', None)
+
+def answer_outcome(cached: Optional[Dict]) -> str:
+    """chat_latency outcome for what prepare_answer found."""
+    if cached is None:
+        return "generated"
+    if "intent" in cached:
+        return "canned"
+    return "catalog" if "kind" in cached else "cached"
+
+async def prepare_answer(request: HTTPConnection, vector_store, message: str, k: Optional[int] = None,
+                         use_cache: bool = True, intent: Optional[QueryIntent] = None,
+                         question: Optional[str] = None
+                         ) -> Tuple[Optional[Dict], List[Dict], Optional[List[float]]]:
+    """Answer the message with a canned answer, from the course catalog or the answer cache,
+    retrieving context otherwise.
+
+    Returns (canned/catalog answer or cached entry or None, context dicts, query embedding).
+    The canned answers, the catalog and the exact-text lookup are free; the query is only
+    embedded if all miss, and that embedding is then reused for the semantic lookup and the
+    vector search. Follow-up questions pass use_cache=False: their answer depends on the
+    conversation, not just the text. question is the user's own message when message is a
+    rewritten search query; the canned answers and the catalog answer it whatever the
+    conversation. intent is the question's classify() result.
+    """
+    if settings.CANNED_ANSWERS_ENABLED:
+        _, name = intent or classify(question or message)
+        if name:
+            canned_answers.inc(intent=name)
+            return {'response': ANSWERS[name], 'context': [], 'intent': name}, [], None
+
+    catalog = get_course_catalog(request)
+    if catalog is not None:
+        entry = catalog.answer(question or message)
+        if entry is not None:
+            catalog_answers.inc(kind=entry['kind'])
+            return entry, entry['context'], None
+
+    cache = get_response_cache(request) if use_cache else None
+    embedding = None
+    if cache is not None:
+        entry = cache.get(message)
+        if entry is None:
+            try:
+                embedding = await vector_store.aembed_query(message)
+                entry = cache.get(message, embedding)
+            except Exception as e:
+                print(f"{log_prefix()}Query embedding failed, skipping semantic cache: {e}")
+        if entry is not None:
+            return entry, entry['context'][:k], embedding
+
+    search = lambda: retrieve_context(vector_store, message, k=k, embedding=embedding)
+    flight = get_single_flight(request)
+    if flight is None:
+        context_dicts, _ = await search()
+    else:
+        context_dicts, _ = await flight.do(("search", normalize_query(message), k), search)
+    return None, context_dicts, embedding
+
+def remember_answer(request: HTTPConnection, message: str, embedding: Optional[List[float]],
+                    response_text: str, context_dicts: List[Dict]) -> None:
+    """Store a freshly generated answer in the answer cache.
+
+    Context answers (no provider answered) are not stored, so the next request tries the
+    providers again.
+    """
+    cache = get_response_cache(request)
+    if cache is not None and response_text and not isinstance(response_text, ContextAnswer):
+        cache.put(message, embedding, response_text, context_dicts)
+
+def streamed_text(chunks: List[str]) -> str:
+    """Join streamed chunks into the answer, still a ContextAnswer if the stream was one."""
+    text = "".join(chunks)
+    return ContextAnswer(text) if any(isinstance(chunk, ContextAnswer) for chunk in chunks) else text
+
+def get_session_store(request: HTTPConnection) -> SessionStore:
+    """Return the session store created at startup, creating it if startup did not."""
+    store = getattr(request.app.state, 'session_store', None)
+    if store is None:
+        store = create_session_store()
+        request.app.state.session_store = store
+    return store
+
+async def _record_exchange(request: HTTPConnection, session_id: str, message: str, response_text: str) -> None:
+    """Update session history"""
+    await get_session_store(request).aappend(session_id, [
+        ChatMessage(role="user", content=message),
+        ChatMessage(role="assistant", content=response_text)
+    ])
+
+async def single_chunk(text: str):
+    """Stream a cached answer as one chunk."""
+    yield text
+
+def _sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: Request, chat_request: ChatRequest):
-    """Handle chat requests."""
+async def chat(request: Request, response: Response, chat_request: ChatRequest):
+    """Handle chat requests.
+
+    The request ID (the client's X-Request-ID, or a new one) is echoed in the
+    response header and prefixes every log line written for the request.
+    """
+    start = time.perf_counter()
+    request_id = start_request(request.headers.get(REQUEST_ID_HEADER))
+    response.headers[REQUEST_ID_HEADER] = request_id
+    # Get vector store from app state
     try:
-        # Get vector store from app state
-        vector_store = request.app.state.vector_store
-        
-        # Initialize AI service (with fallback)
-        ai_service = AIService()
-        
-        # Get or create session
+        vector_store = get_vector_store(request)
+    except HTTPException:
+        chat_latency.observe(time.perf_counter() - start, transport="rest", outcome="initializing")
+        raise
+    try:
+        # Reuse the AI service created at startup (with fallback)
+        ai_service = await get_ai_service(request)
+
         session_id = chat_request.session_id or str(uuid.uuid4())
-        if session_id not in sessions:
-            sessions[session_id] = []
-        
-        # Search for relevant documents
-        search_results = vector_store.similarity_search(
-            chat_request.message, 
-            k=4
-        )
-        
-        # Convert search results to consistent format
-        context_dicts = []
-        sources = []
-        
-        for result in search_results:
-            # Handle both dict and Document object formats
-            if isinstance(result, dict):
-                # It's already a dict
-                context_dicts.append({
-                    'content': result.get('content', result.get('page_content', '')),
-                    'metadata': result.get('metadata', {})
-                })
-                if result.get('metadata', {}).get('source'):
-                    sources.append(result['metadata']['source'])
-            else:
-                # It's a Document object
-                context_dicts.append({
-                    'content': getattr(result, 'page_content', str(result)),
-                    'metadata': getattr(result, 'metadata', {})
-                })
-                if hasattr(result, 'metadata') and result.metadata.get('source'):
-                    sources.append(result.metadata['source'])
-        
-        # Generate response using AI service with fallback
-        response_text = ai_service.generate_response(
-            query=chat_request.message,
-            context=context_dicts,
-            history=sessions[session_id][-10:]
+        summary, history = await get_session_store(request).aget_conversation(session_id)
+        intent = classify(chat_request.message)
+
+        # Follow-ups are searched together with the previous question and skip the answer cache
+        search_query = retrieval_query(chat_request.message, history)
+        use_cache = search_query == chat_request.message
+
+        # Check the canned answers, the catalog and the answer cache, searching for relevant documents on a miss
+        cached, context_dicts, embedding = await prepare_answer(
+            request, vector_store, search_query, use_cache=use_cache, intent=intent,
+            question=chat_request.message
         )
-        
-        # Update session history
-        sessions[session_id].append(ChatMessage(
-            role="user",
-            content=chat_request.message
-        ))
-        sessions[session_id].append(ChatMessage(
-            role="assistant",
-            content=response_text
-        ))
-        
+        sources = _source_names(context_dicts)
+
+        usage = None
+        if cached is not None:
+            response_text = cached['response']
+        else:
+            # Generate response using AI service with fallback
+            response_text = await generate_answer(
+                request, ai_service, chat_request.message, context_dicts, history, summary, intent
+            )
+            usage = ai_service.token_usage(chat_request.message, context_dicts, history, summary, response_text)
+            if use_cache:
+                remember_answer(request, chat_request.message, embedding, response_text, context_dicts)
+
+        await _record_exchange(request, session_id, chat_request.message, response_text)
+
         # Get unique sources (only first 3)
         unique_sources = list(set(sources[:3])) if sources else []
-        
+
+        chat_latency.observe(time.perf_counter() - start, transport="rest", outcome=answer_outcome(cached))
         return ChatResponse(
             response=response_text,
             sources=unique_sources,
-            session_id=session_id
+            session_id=session_id,
+            usage=usage
         )
-        
+
     except Exception as e:
-        print(f"Chat error: {e}")
+        print(f"{log_prefix()}Chat error: {e}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        chat_latency.observe(time.perf_counter() - start, transport="rest", outcome="error")
+        raise HTTPException(status_code=500, detail=str(e), headers={REQUEST_ID_HEADER: request_id})
+
+@router.post("/stream")
+async def chat_stream(request: Request, chat_request: ChatRequest):
+    """Stream a chat answer as Server-Sent Events.
+
+    Emits one `sources` event as soon as retrieval finishes, a `token` event per
+    generated chunk, then a `done` event with the full response and time-to-first-token.
+    A stream cut short ends with an `error` event instead of `done`.
+    """
+    start = time.perf_counter()
+    request_id = start_request(request.headers.get(REQUEST_ID_HEADER))
+    try:
+        vector_store = get_vector_store(request)
+    except HTTPException:
+        chat_latency.observe(time.perf_counter() - start, transport="sse", outcome="initializing")
+        raise
+    try:
+        ai_service = await get_ai_service(request)
+
+        session_id = chat_request.session_id or str(uuid.uuid4())
+        summary, history = await get_session_store(request).aget_conversation(session_id)
+        intent = classify(chat_request.message)
+
+        search_query = retrieval_query(chat_request.message, history)
+        use_cache = search_query == chat_request.message
+        cached, context_dicts, embedding = await prepare_answer(
+            request, vector_store, search_query, use_cache=use_cache, intent=intent,
+            question=chat_request.message
+        )
+        sources = _source_names(context_dicts)
+    except Exception as e:
+        print(f"{log_prefix()}Chat stream error: {e}")
+        chat_latency.observe(time.perf_counter() - start, transport="sse", outcome="error")
+        raise HTTPException(status_code=500, detail=str(e), headers={REQUEST_ID_HEADER: request_id})
+
+    unique_sources = list(set(sources[:3])) if sources else []
+
+    async def event_stream():
+        yield _sse("sources", {"sources": unique_sources, "session_id": session_id, "request_id": request_id})
+
+        chunks = []
+        ttft = None
+        if cached is not None:
+            stream = single_chunk(cached['response'])
+        else:
+            stream = stream_answer(request, ai_service, chat_request.message, context_dicts, history, summary, intent)
+        try:
+            async for chunk in stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    chat_ttft.observe(ttft, transport="sse")
+                chunks.append(chunk)
+                yield _sse("token", {"content": chunk})
+        except Exception as e:
+            print(f"{log_prefix()}Chat stream error: {e}")
+            chat_latency.observe(time.perf_counter() - start, transport="sse", outcome="error")
+            yield _sse("error", {"detail": str(e)})
+            return
+
+        response_text = streamed_text(chunks)
+        usage = None
+        if cached is None:
+            usage = ai_service.token_usage(chat_request.message, context_dicts, history, summary, response_text)
+            if use_cache:
+                remember_answer(request, chat_request.message, embedding, response_text, context_dicts)
+        await _record_exchange(request, session_id, chat_request.message, response_text)
+        chat_latency.observe(time.perf_counter() - start, transport="sse", outcome=answer_outcome(cached))
+
+        yield _sse("done", {
+            "response": response_text,
+            "sources": unique_sources,
+            "session_id": session_id,
+            "usage": usage,
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", REQUEST_ID_HEADER: request_id}
+    )
 
 @router.delete("/{session_id}")
-async def clear_session(session_id: str):
+async def clear_session(request: Request, session_id: str):
     """Clear chat session."""
-    if session_id in sessions:
-        del sessions[session_id]
-    return {"message": "Session cleared"}
\ No newline at end of file
+    await get_session_store(request).adelete(session_id)
+    return {"message": "Session cleared"}
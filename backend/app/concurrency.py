@@ -0,0 +1,94 @@
+# backend/app/concurrency.py
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+from .config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the bounded pool used for blocking embedding, search and LLM calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOCKING_POOL_SIZE,
+                    thread_name_prefix="chat-blocking"
+                )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous call on the bounded pool so the event loop keeps serving other connections.
+    
+    The call sees the caller's context variables (e.g. the request ID).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+async def iterate_blocking(func: Callable[..., Iterator[T]], *args: Any, **kwargs: Any) -> AsyncIterator[T]:
+    """Consume a blocking iterator on the pool, handing each item to the event loop as soon as it is produced.
+    
+    If the consumer stops early (e.g. the client disconnected), the producer stops at its next item
+    and is closed on the worker thread, so it can release what it holds (e.g. a streaming HTTP response).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    cancelled = threading.Event()
+    
+    def put(item: Any, error: Optional[Exception] = None) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # Event loop already closed, nobody is listening any more
+            cancelled.set()
+    
+    def produce() -> None:
+        iterator = None
+        try:
+            iterator = func(*args, **kwargs)
+            for item in iterator:
+                if cancelled.is_set():
+                    return
+                put(item)
+        except Exception as e:
+            put(finished, e)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(finished)
+    
+    loop.run_in_executor(get_executor(), contextvars.copy_context().run, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        cancelled.set()
+
+
+def shutdown_executor() -> None:
+    """Stop the pool on application shutdown."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
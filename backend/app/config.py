@@ -44,25 +44,84 @@ class Settings(BaseSettings):
     
     # Vector Store Settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
-    CHUNK_SIZE: int = 1000
-    CHUNK_OVERLAP: int = 200
+    CHUNK_SIZE: int = 400  # Max tokens per chunk (markdown-aware: splits on headings, keeps tables and code whole)
+    CHUNK_OVERLAP: int = 40  # Tokens of prose repeated when a section spans several chunks
     MAX_CHUNKS_PER_DOC: int = 100
+    INDEX_WORKERS: int = 1  # Processes reading and chunking markdown files during indexing (1 = in-process)
+    EMBEDDING_BATCH_SIZE: int = 0  # Texts per embedding request, 0 = backend default
+    EMBEDDING_WORKERS: int = 4  # Concurrent embedding requests during ingestion
+    EMBEDDING_MAX_RETRIES: int = 5  # Retries per batch on 429/quota errors
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = str(BACKEND_DIR / "data" / "embedding_cache.sqlite3")  # Outside CHROMA_DIR so it survives rebuilds
+    EMBEDDING_CACHE_MAX_MB: int = 256
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048  # In-memory LRU of query embeddings
+    PRECOMPUTE_SUGGESTED_QUERIES: bool = True  # Embed the suggested questions at startup
+    VECTOR_BACKEND: str = "chroma"  # "chroma" or "numpy" (in-memory matrix search, Chroma still persists)
+    RETRIEVAL_MODE: str = "hybrid"  # "dense", "keyword" (BM25) or "hybrid" (both, fused with RRF)
+    HYBRID_CANDIDATES: int = 20  # Results taken from each retriever before fusion
+    RRF_K: int = 60  # Reciprocal rank fusion constant
+    KEYWORD_SCORE_RATIO: float = 0.5  # Keyword hits below this share of the best BM25 score are not fused
+    BACKGROUND_INDEXING: bool = True  # Sync the index after startup instead of before accepting traffic
+    DEGRADED_KEYWORD_SEARCH: bool = True  # Serve BM25 results while a cold index is still being embedded
+    INDEX_WATCH_SECONDS: float = 30.0  # How often a server checks for re-indexes by another process (0 = never)
     
     # AI Model Settings
     GEMINI_MODEL: str = "gemini-pro"
     GEMINI_EMBEDDING_MODEL: str = "models/embedding-001"
     HF_MODEL: str = "google/flan-t5-base"
+    HF_API_URL: str = "https://api-inference.huggingface.co/models"
+    HF_POOL_SIZE: int = 10  # Keep-alive connections kept open to the HF API
+    HF_CONNECT_TIMEOUT_SECONDS: float = 3.0  # TCP+TLS connect timeout (read timeout comes from the deadline)
+    HF_HTTP2: bool = True  # Used when httpx and h2 are installed, else HTTP/1.1 keep-alive
+    
+    # Provider Routing Settings
+    LLM_DEADLINE_SECONDS: float = 20.0  # Overall budget for one answer across all providers
+    PROVIDER_TIMEOUT_SECONDS: float = 12.0  # Cap for a single provider attempt within the deadline
+    STREAM_CHUNK_TIMEOUT_SECONDS: float = 10.0  # Abort a started stream that goes this long without a chunk
+    STREAM_DEADLINE_SECONDS: float = 120.0  # Abort a started stream that runs longer than this in total
+    PROVIDER_PREFERENCE_SECONDS: float = 2.0  # Extra expected latency accepted per step up the preference list
+    BREAKER_FAILURE_THRESHOLD: int = 3  # Consecutive failures that open a provider's circuit
+    BREAKER_ERROR_RATE: float = 0.5  # Error rate over the window that opens it
+    BREAKER_WINDOW: int = 20  # Recent attempts used for error rate
+    BREAKER_OPEN_SECONDS: float = 30.0  # First cool-down before a half-open probe
+    BREAKER_MAX_OPEN_SECONDS: float = 300.0  # Cool-down doubles per failed probe up to this
+    HEDGE_ENABLED: bool = True  # Start the next HF model if the current one is slower than usual
+    HEDGE_PERCENTILE: float = 0.95  # A model counts as slow past this latency percentile
+    HEDGE_DELAY_SECONDS: float = 3.0  # Hedge delay until a model has enough latency samples
+    HEDGE_MIN_DELAY_SECONDS: float = 0.5  # Never hedge sooner than this
+    HEDGE_BUDGET_RATIO: float = 0.1  # Hedges allowed per request (0.1 = at most 10% extra calls)
+    HEDGE_BUDGET_BURST: int = 5  # Hedges that can be spent at once
     MAX_TOKENS: int = 500
     TEMPERATURE: float = 0.7
     
     # Chat Settings
-    MAX_HISTORY_LENGTH: int = 10
+    MAX_HISTORY_LENGTH: int = 10  # Messages kept per session
     SESSION_TIMEOUT_MINUTES: int = 30
     MAX_SESSIONS: int = 1000
+    SESSION_MAX_BYTES: int = 32 * 1024  # Message text kept per session; oldest messages are dropped first
+    HISTORY_TOKEN_BUDGET: int = 600  # Recent messages quoted verbatim in each prompt
+    HISTORY_SUMMARY_TOKENS: int = 200  # Compacted summary of older turns in each prompt
+    MAX_QUERY_TOKENS: int = 500  # User messages longer than this are truncated in the prompt
+    
+    # Concurrency Settings
+    BLOCKING_POOL_SIZE: int = 64  # Threads for blocking embedding, search and LLM calls
+    
+    # Answer Cache Settings
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    RESPONSE_CACHE_SIMILARITY: float = 0.95  # Cosine similarity for a semantic hit
+    SINGLE_FLIGHT_ENABLED: bool = True  # Identical concurrent questions share one search and generation
     
     # Search Settings
-    SEARCH_K: int = 4
-    MIN_RELEVANCE_SCORE: float = 0.5
+    SEARCH_K: int = 4  # Most chunks sent as context; the cutoffs below can make it fewer
+    MIN_RELEVANCE_SCORE: float = 0.3  # Cosine similarity a chunk needs to be used as context (exact keyword matches exempt)
+    RELEVANCE_RATIO: float = 0.8  # ...and at least this share of the best chunk's similarity, so k adapts per query
+    DEDUP_THRESHOLD: float = 0.8  # Chunks whose words are this much contained in a better one are dropped
+    SEARCH_MMR: bool = False  # Diversify context chunks with maximal marginal relevance
+    MMR_LAMBDA: float = 0.7  # MMR trade-off: 1 = relevance only, lower = more diverse
+    COURSE_CATALOG_ENABLED: bool = True  # Answer course duration/effort/prerequisite/language questions from the catalog built at index time
+    CANNED_ANSWERS_ENABLED: bool = True  # Answer greetings, "help" and "What is OSSU?" without retrieval or the LLM
     
     # File Settings
     ALLOWED_EXTENSIONS: List[str] = [".md", ".txt", ".pdf", ".docx"]
@@ -102,6 +161,26 @@ class Settings(BaseSettings):
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
             
+    def print_summary(self):
+        """Print the configuration and the markdown files found (called at startup in DEBUG)."""
+        print("🔧 Configuration loaded:")
+        print(f"📁 Backend directory: {self.BACKEND_DIR}")
+        print(f"📁 Markdown directory: {self.MARKDOWN_DIR}")
+        print(f"📁 Chroma directory: {self.CHROMA_DIR}")
+        print(f"📁 Upload directory: {self.UPLOAD_DIR}")
+        print(f"📁 Log directory: {self.LOG_DIR}")
+        print(f"🔑 AI Keys configured: {self.has_ai_keys}")
+        print(f"🌐 CORS origins: {self.BACKEND_CORS_ORIGINS}")
+        
+        # Check for markdown files
+        md_files = self.get_markdown_files()
+        print(f"📄 Markdown files found: {len(md_files)}")
+        if md_files:
+            for file in md_files[:5]:  # Show first 5 files
+                print(f"   - {file.name}")
+            if len(md_files) > 5:
+                print(f"   ... and {len(md_files) - 5} more")
+    
     @property
     def is_development(self) -> bool:
         """Check if running in development mode."""
@@ -122,25 +201,5 @@ settings = Settings()
 # Validate and create directories
 settings.validate_directories()
 
-# Debug: Print configuration info
-if settings.DEBUG:
-    print("🔧 Configuration loaded:")
-    print(f"📁 Backend directory: {settings.BACKEND_DIR}")
-    print(f"📁 Markdown directory: {settings.MARKDOWN_DIR}")
-    print(f"📁 Chroma directory: {settings.CHROMA_DIR}")
-    print(f"📁 Upload directory: {settings.UPLOAD_DIR}")
-    print(f"📁 Log directory: {settings.LOG_DIR}")
-    print(f"🔑 AI Keys configured: {settings.has_ai_keys}")
-    print(f"🌐 CORS origins: {settings.BACKEND_CORS_ORIGINS}")
-    
-    # Check for markdown files
-    md_files = settings.get_markdown_files()
-    print(f"📄 Markdown files found: {len(md_files)}")
-    if md_files:
-        for file in md_files[:5]:  # Show first 5 files
-            print(f"   - {file.name}")
-        if len(md_files) > 5:
-            print(f"   ... and {len(md_files) - 5} more")
-
 # Export settings
 __all__ = ["settings"]
\ No newline at end of file
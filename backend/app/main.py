@@ -1,11 +1,25 @@
-from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from .api import chat
 from .services.document_processor import DocumentProcessor
 from .services.vector_store import VectorStore
+from .services.indexer import IncrementalIndexer, IndexGeneration, IndexProgress
+from .services.course_catalog import CATALOG_FILE, CourseCatalog
+from .services.ai_service import AIService
+from .services.response_cache import ResponseCache
+from .services.chat_service import SUGGESTED_QUESTIONS
+from .services.intents import classify
+from .services.session_store import create_session_store, record_session_metrics
 from .config import settings
+from .concurrency import run_blocking, shutdown_executor
+from .metrics import metrics
+from .request_context import log_prefix, start_request
+import asyncio
 import os
 import json
+import time
+from typing import Optional
 
 app = FastAPI(title="AI Chatbot API", version="1.0.0")
 
@@ -21,10 +35,47 @@ app.add_middleware(
 # Initialize services on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize vector store with documents on startup."""
+    """Create the services and start indexing.
+    
+    With BACKGROUND_INDEXING the server accepts traffic right away and /health reports
+    indexing progress; otherwise startup waits for the index like before.
+    """
+    print("🚀 Starting AI Chatbot API...")
+    if settings.DEBUG:
+        settings.print_summary()
+    app.state.vector_store = None
+    app.state.processor = None
+    app.state.index_stats = None
+    app.state.course_catalog = None
+    app.state.index_progress = IndexProgress()
+    app.state.is_ready = False
+    
+    # Chat history store (Redis when REDIS_URL is set, shared by all workers)
+    app.state.session_store = create_session_store()
+    
+    # Initialize the AI service once per process (warmed up alongside indexing)
+    print("🤖 Initializing AI service...")
+    app.state.ai_service = AIService()
+    
+    # Answer cache, emptied whenever the corpus is re-indexed, by this process or another one
+    app.state.index_generation = IndexGeneration(settings.CHROMA_DIR)
+    app.state.response_cache = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        app.state.response_cache = ResponseCache(generation=app.state.index_generation.current)
+    app.state.watch_task = None
+    
+    app.state.startup_task = asyncio.create_task(initialize_index())
+    if settings.BACKGROUND_INDEXING:
+        print("⏳ Indexing in the background, see /health for progress")
+    else:
+        await app.state.startup_task
+
+async def initialize_index():
+    """Load the vector store, sync it with the markdown files and warm up the AI service."""
+    progress = app.state.index_progress
+    ai_service = app.state.ai_service
+    warm_up = asyncio.ensure_future(run_blocking(ai_service.warm_up))
     try:
-        print("🚀 Starting AI Chatbot API...")
-        
         # Check if markdown directory exists
         if not os.path.exists(settings.MARKDOWN_DIR):
             print(f"Creating markdown directory: {settings.MARKDOWN_DIR}")
@@ -37,58 +88,114 @@ async def startup_event():
             md_files = [f for f in files if f.endswith('.md')]
             print(f"   Found {len(md_files)} markdown files")
             
-        # Process documents
-        print("📄 Processing documents...")
         processor = DocumentProcessor(settings.MARKDOWN_DIR)
-        documents = processor.process_documents()
         
-        if not documents:
-            print("⚠️  Warning: No documents found!")
-            print(f"   Directory checked: {settings.MARKDOWN_DIR}")
-        else:
-            print(f"✅ Processed {len(documents)} document chunks")
-            
-        # Initialize vector store
+        # Initialize vector store (loading an existing one is quick; embedding models may not be)
         print("🗄️  Initializing vector store...")
-        vector_store = VectorStore()
-        
-        # Create vector store with documents
-        if documents:
-            vector_store.create_or_load_vectorstore(documents)
-        else:
-            print("⚠️  Creating empty vector store (no documents)")
-            vector_store.create_or_load_vectorstore([])
+        vector_store = await run_blocking(_open_vector_store)
+        if app.state.response_cache:
+            vector_store.add_reindex_listener(app.state.response_cache.invalidate)
         
-        # Store in app state - THIS IS CRITICAL
+        # Serve searches from whatever is already indexed while the sync runs
         app.state.vector_store = vector_store
         app.state.processor = processor
-        app.state.is_ready = True  # Add this flag
         
-        # Verify storage
-        print("🔍 Verifying app state...")
-        print(f"   Vector store stored: {hasattr(app.state, 'vector_store')}")
-        print(f"   Processor stored: {hasattr(app.state, 'processor')}")
+        # Course facts from the previous index answer catalog questions right away; the sync updates them
+        catalog = None
+        if settings.COURSE_CATALOG_ENABLED:
+            catalog = await run_blocking(_open_course_catalog, vector_store.chroma_dir)
+            app.state.course_catalog = catalog
         
-        print("✅ AI Chatbot API ready!")
+        # Embed only new or changed chunks and drop chunks of deleted files
+        print("📄 Syncing index with markdown files...")
+        progress.start()
+        indexer = IncrementalIndexer(vector_store, processor, catalog)
+        index_stats = await run_blocking(indexer.sync, False, progress)
+        
+        if not index_stats["total_chunks"]:
+            print("⚠️  Warning: No documents found!")
+            print(f"   Directory checked: {settings.MARKDOWN_DIR}")
+        else:
+            print(f"✅ Index up to date: {index_stats['total_chunks']} chunks "
+                  f"({index_stats['chunks_added']} embedded, {index_stats['chunks_deleted']} removed)")
+        
+        # Precompute query embeddings for the questions the UI suggests
+        if settings.PRECOMPUTE_SUGGESTED_QUERIES:
+            precomputed = await run_blocking(vector_store.query_cache.precompute, SUGGESTED_QUESTIONS)
+            print(f"🧮 Precomputed {precomputed} suggested query embeddings")
+        
+        app.state.index_stats = index_stats
+        progress.finish()
+        app.state.is_ready = True
+        if settings.INDEX_WATCH_SECONDS:
+            app.state.watch_task = asyncio.create_task(watch_index(vector_store, catalog))
+        
+        await warm_up
+        print(f"✅ AI Chatbot API ready! (AI service {ai_service.status})")
         
     except Exception as e:
         print(f"❌ Error during startup: {e}")
         import traceback
         traceback.print_exc()
+        progress.finish(str(e))
         
         # Create minimal state even on error
         try:
-            print("⚠️  Attempting to create minimal vector store...")
-            app.state.vector_store = VectorStore()
-            app.state.processor = None
+            if app.state.vector_store is None:
+                print("⚠️  Attempting to create minimal vector store...")
+                app.state.vector_store = await run_blocking(VectorStore)
+                print("✅ Created minimal vector store")
             app.state.is_ready = True  # Still mark as ready for testing
-            print("✅ Created minimal vector store")
         except Exception as fallback_error:
             print(f"❌ Could not create fallback vector store: {fallback_error}")
             app.state.vector_store = None
-            app.state.processor = None
             app.state.is_ready = False
 
+async def watch_index(vector_store: VectorStore, catalog: Optional[CourseCatalog]):
+    """Reload the in-memory search indexes and the catalog after another process re-indexed.
+
+    rebuild_vector_store.py or another worker may sync the shared CHROMA_DIR; the answer
+    cache notices by itself (see IndexGeneration), the BM25 and NumPy indexes and the
+    catalog are reloaded here.
+    """
+    generation = app.state.index_generation
+    seen = await run_blocking(generation.current)
+    while True:
+        await asyncio.sleep(settings.INDEX_WATCH_SECONDS)
+        current = await run_blocking(generation.current)
+        if current == seen or current is None:
+            continue
+        seen = current
+        print("🔁 Index changed on disk, reloading search indexes")
+        try:
+            await run_blocking(vector_store.load_search_indexes)
+            if catalog is not None and await run_blocking(catalog.load):
+                catalog.rebuild()
+        except Exception as e:
+            print(f"❌ Reloading search indexes failed: {e}")
+
+def _open_vector_store() -> VectorStore:
+    vector_store = VectorStore()
+    vector_store.create_or_load_vectorstore([])
+    return vector_store
+
+def _open_course_catalog(chroma_dir: str) -> CourseCatalog:
+    catalog = CourseCatalog(os.path.join(chroma_dir, CATALOG_FILE))
+    if catalog.load():
+        catalog.rebuild()
+    return catalog
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the worker pool used for blocking calls and the AI service's connections."""
+    for task in (getattr(app.state, "startup_task", None), getattr(app.state, "watch_task", None)):
+        if task is not None and not task.done():
+            task.cancel()
+    ai_service = getattr(app.state, "ai_service", None)
+    if ai_service is not None:
+        ai_service.close()
+    shutdown_executor()
+
 # Include routers
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 
@@ -99,8 +206,10 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "chat": "/api/chat/",
+            "chat_stream": "/api/chat/stream",
             "websocket": "/ws",
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs",
             "debug": "/debug"
         }
@@ -115,21 +224,40 @@ async def health_check():
     if has_vector_store and app.state.vector_store:
         vector_store_initialized = hasattr(app.state.vector_store, 'vectorstore') and app.state.vector_store.vectorstore is not None
     
-    # Add the field that frontend expects
+    # Add the field that frontend expects (only true once the index sync has finished)
     is_ready = hasattr(app.state, 'is_ready') and app.state.is_ready
     
+    ai_service = getattr(app.state, 'ai_service', None)
+    progress = getattr(app.state, 'index_progress', None)
+    catalog = getattr(app.state, 'course_catalog', None)
+    
     return {
         "status": "healthy" if has_vector_store else "unhealthy",
         "vector_store_ready": is_ready and vector_store_initialized,  # Frontend expects this field
+        "indexing": progress.snapshot() if progress else None,
+        "keyword_only": vector_store_initialized and app.state.vector_store.keyword_only,
         "services": {
             "vector_store": has_vector_store,
             "vector_store_initialized": vector_store_initialized,
             "processor": hasattr(app.state, 'processor'),
+            "ai_service": ai_service.health() if ai_service else None,
+            "course_catalog": catalog.stats() if catalog is not None else None,
             "markdown_dir": settings.MARKDOWN_DIR,
             "markdown_dir_exists": os.path.exists(settings.MARKDOWN_DIR)
         }
     }
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Counters and latency histograms in the Prometheus text format."""
+    session_store = getattr(app.state, 'session_store', None)
+    if session_store is not None:
+        try:
+            await run_blocking(record_session_metrics, session_store)
+        except Exception as e:
+            print(f"Session store metrics unavailable: {e}")
+    return Response(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ADD THIS NEW WEBSOCKET ENDPOINT
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -143,153 +271,121 @@ async def websocket_endpoint(websocket: WebSocket):
             data = await websocket.receive_text()
             message_data = json.loads(data)
             user_message = message_data.get('message', '')
+            # Each message is its own request; clients may pass their own ID to correlate logs
+            start = time.perf_counter()
+            request_id = start_request(message_data.get('request_id'))
+            intent = classify(user_message)
             
-            print(f"Received message: {user_message}")
+            print(f"{log_prefix()}Received message: {user_message}")
             
-            # Check if vector store is available
-            if not hasattr(app.state, 'vector_store') or not app.state.vector_store:
+            # Check if vector store is available (and has something to search)
+            try:
+                vector_store = chat.get_vector_store(websocket)
+            except HTTPException:
                 await websocket.send_json({
                     "response": "Sorry, the AI service is still initializing. Please try again in a moment.",
-                    "sources": []
+                    "sources": [],
+                    "request_id": request_id
                 })
+                chat.chat_latency.observe(time.perf_counter() - start, transport="ws", outcome="initializing")
                 continue
             
             try:
-                # Use your existing chat logic
-                # Get the vector store
-                vector_store = app.state.vector_store
-                
                 # Search for relevant documents
-                relevant_docs = vector_store.similarity_search(user_message, k=3)
+                cached, context_dicts, embedding = await chat.prepare_answer(websocket, vector_store, user_message,
+                                                                             intent=intent)
+                sources = [{"page_content": doc['content'][:100], "metadata": doc['metadata']} for doc in context_dicts]
                 
-                # Format context from documents
-                context = "\n\n".join([doc.page_content for doc in relevant_docs])
+                ai_service = await chat.get_ai_service(websocket)
                 
-                # Create a response (you can integrate with your AI service here)
-                if context:
-                    response = f"Based on the available documentation:\n\n{context[:500]}..."
-                    sources = [{"page_content": doc.page_content[:100], "metadata": doc.metadata} for doc in relevant_docs]
+                if message_data.get('stream'):
+                    # Streaming protocol: sources first, then one frame per chunk, then done
+                    # (or an error frame if the stream was cut short)
+                    await websocket.send_json({"type": "sources", "sources": sources, "request_id": request_id})
+                    
+                    chunks = []
+                    ttft = None
+                    if cached is not None:
+                        stream = chat.single_chunk(cached['response'])
+                    else:
+                        stream = chat.stream_answer(websocket, ai_service, user_message, context_dicts, [], intent=intent)
+                    async for chunk in stream:
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                            chat.chat_ttft.observe(ttft, transport="ws")
+                        chunks.append(chunk)
+                        await websocket.send_json({"type": "token", "content": chunk, "request_id": request_id})
+                    
+                    response = chat.streamed_text(chunks)
+                    if cached is None:
+                        chat.remember_answer(websocket, user_message, embedding, response, context_dicts)
+                    await websocket.send_json({
+                        "type": "done",
+                        "response": response,
+                        "sources": sources,
+                        "request_id": request_id,
+                        "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None
+                    })
+                    chat.chat_latency.observe(time.perf_counter() - start, transport="ws",
+                                              outcome=chat.answer_outcome(cached))
+                    continue
+                
+                if cached is not None:
+                    response = cached['response']
                 else:
-                    response = "I couldn't find relevant information in the documentation. Could you please rephrase your question?"
-                    sources = []
+                    response = await chat.generate_answer(websocket, ai_service, user_message, context_dicts, [],
+                                                          intent=intent)
+                    chat.remember_answer(websocket, user_message, embedding, response, context_dicts)
+                chat.chat_ttft.observe(time.perf_counter() - start, transport="ws")
                 
                 # Send response back to client
                 await websocket.send_json({
                     "response": response,
-                    "sources": sources
+                    "sources": sources,
+                    "request_id": request_id
                 })
+                chat.chat_latency.observe(time.perf_counter() - start, transport="ws",
+                                          outcome=chat.answer_outcome(cached))
                 
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
-                print(f"Error processing message: {e}")
-                await websocket.send_json({
+                print(f"{log_prefix()}Error processing message: {e}")
+                chat.chat_latency.observe(time.perf_counter() - start, transport="ws", outcome="error")
+                reply = {
                     "response": f"Sorry, I encountered an error: {str(e)}",
-                    "sources": []
-                })
+                    "sources": [],
+                    "request_id": request_id
+                }
+                if message_data.get('stream'):
+                    reply["type"] = "error"
+                await websocket.send_json(reply)
                 
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
         print("WebSocket connection closed")
-def _generate_answer(self, question: str, context: str, docs: list) -> str:
-    """Generate a better answer based on the context."""
-    question_lower = question.lower()
-    
-    # Extract key information based on question type
-    if 'programming language' in question_lower or 'language' in question_lower:
-        # Look for programming language mentions
-        languages = []
-        common_languages = ['python', 'java', 'javascript', 'c++', 'c', 'scheme', 'racket', 'ml', 'haskell', 'ruby', 'rust', 'go', 'kotlin', 'swift']
-        
-        for lang in common_languages:
-            if lang.lower() in context.lower():
-                languages.append(lang.capitalize())
-        
-        # Look for specific course mentions
-        if 'cs50' in context.lower():
-            languages.extend(['C', 'Python', 'SQL', 'JavaScript', 'HTML/CSS'])
-        if 'intro' in context.lower() and 'programming' in context.lower():
-            languages.append('Python')
-        
-        # Remove duplicates
-        languages = list(set(languages))
-        
-        if languages:
-            response = f"Based on the OSSU curriculum, the following programming languages are taught:\n\n"
-            response += "• " + "\n• ".join(sorted(set(languages)))
-            response += "\n\nThe curriculum typically starts with languages like Python or Scheme for introductory courses, "
-            response += "then progresses to languages like C for systems programming, and includes various languages for specialized topics."
-        else:
-            response = "The curriculum covers multiple programming languages throughout different courses. "
-            response += "Typically, introductory courses use Python or Scheme, systems courses use C, "
-            response += "and various other languages are introduced for specific topics like web development (JavaScript) and functional programming (Haskell)."
-        
-        return response
-    
-    elif 'what is' in question_lower and 'ossu' in question_lower:
-        # Extract OSSU description
-        lines = context.split('\n')
-        relevant_lines = []
-        for line in lines:
-            if any(term in line.lower() for term in ['ossu', 'open source society', 'curriculum', 'complete education']):
-                relevant_lines.append(line.strip())
-        
-        if relevant_lines:
-            return "OSSU (Open Source Society University) provides:\n\n" + '\n'.join(relevant_lines[:5])
-        else:
-            return "OSSU (Open Source Society University) offers a complete, free computer science education using online materials from top universities."
-    
-    elif 'course' in question_lower:
-        # Extract course information
-        courses = []
-        lines = context.split('\n')
-        for line in lines:
-            if '|' in line and any(term in line.lower() for term in ['weeks', 'hours', 'course']):
-                parts = line.split('|')
-                if len(parts) >= 2:
-                    course_name = parts[0].strip()
-                    if course_name and not course_name.startswith('-'):
-                        courses.append(course_name)
-        
-        if courses:
-            response = "Here are some relevant courses:\n\n"
-            for course in courses[:10]:  # Limit to 10 courses
-                response += f"• {course}\n"
-            return response
-    
-    # Default: Extract most relevant sentences
-    return self._extract_relevant_sentences(context, question, max_sentences=5)
 
-def _extract_relevant_sentences(self, context: str, question: str, max_sentences: int = 5) -> str:
-    """Extract most relevant sentences from context."""
-    # Split into sentences
-    sentences = []
-    for paragraph in context.split('\n\n'):
-        sentences.extend(paragraph.split('. '))
-    
-    # Score sentences by relevance
-    question_words = set(question.lower().split())
-    scored_sentences = []
-    
-    for sentence in sentences:
-        if len(sentence.strip()) < 10:  # Skip very short sentences
-            continue
-        sentence_words = set(sentence.lower().split())
-        score = len(question_words.intersection(sentence_words))
-        
-        # Boost score for sentences with key terms
-        if any(term in sentence.lower() for term in ['curriculum', 'course', 'programming', 'computer science']):
-            score += 2
-        
-        scored_sentences.append((score, sentence.strip()))
-    
-    # Sort by score and return top sentences
-    scored_sentences.sort(key=lambda x: x[0], reverse=True)
-    relevant = [sent for score, sent in scored_sentences[:max_sentences] if score > 0]
-    
-    if relevant:
-        return '. '.join(relevant) + '.'
-    else:
-        return context[:500] + '...'
+def _embedding_cache_stats():
+    vector_store = getattr(app.state, 'vector_store', None)
+    cache = getattr(vector_store, 'embedding_cache', None)
+    query_cache = getattr(vector_store, 'query_cache', None)
+    return {
+        "persistent": cache.stats() if cache else None,
+        "query_lru": query_cache.stats() if query_cache else None
+    }
+
+def _retrieval_info():
+    vector_store = getattr(app.state, 'vector_store', None)
+    if vector_store is None:
+        return None
+    return {
+        "mode": vector_store.retrieval_mode,
+        "keyword_index_chunks": len(vector_store.keyword_index),
+        "vector_backend": settings.VECTOR_BACKEND,
+        "dense_index": vector_store.dense_index.stats() if vector_store.dense_index is not None else None
+    }
+
 @app.get("/debug")
 async def debug_info():
     """Debug endpoint to check system state."""
@@ -297,9 +393,17 @@ async def debug_info():
         "app_state": {
             "has_vector_store": hasattr(app.state, 'vector_store'),
             "has_processor": hasattr(app.state, 'processor'),
+            "has_ai_service": hasattr(app.state, 'ai_service'),
             "is_ready": hasattr(app.state, 'is_ready') and app.state.is_ready,
             "state_attributes": list(dir(app.state))
         },
+        "index": getattr(app.state, 'index_stats', None),
+        "retrieval": _retrieval_info(),
+        "embedding_cache": _embedding_cache_stats(),
+        "response_cache": app.state.response_cache.stats() if getattr(app.state, 'response_cache', None) else None,
+        "sessions": app.state.session_store.stats() if getattr(app.state, 'session_store', None) else None,
+        "single_flight": app.state.single_flight.stats() if getattr(app.state, 'single_flight', None) else None,
+        "metrics": metrics.snapshot(),
         "settings": {
             "markdown_dir": settings.MARKDOWN_DIR,
             "chroma_dir": settings.CHROMA_DIR,
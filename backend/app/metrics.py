@@ -0,0 +1,230 @@
+# backend/app/metrics.py
+
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    # Hot path: every observation builds one, and label values are nearly always strings already
+    if not labels:
+        return ()
+    key = tuple(sorted(labels.items()))
+    if all(type(value) is str for _, value in key):
+        return key
+    return tuple((name, str(value)) for name, value in key)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {_format_labels(key): value for key, value in self._values.items()}
+
+
+class Gauge:
+    """Value that goes up and down (sizes, in-flight work), optionally split by labels."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {_format_labels(key): value for key, value in self._values.items()}
+
+
+class Histogram:
+    """Bucketed distribution of observed values (seconds for latencies), optionally split by labels."""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+                self._series[key] = series
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series["counts"][i] += 1
+            series["count"] += 1
+            series["sum"] += value
+
+    def time(self, **labels) -> "_Timer":
+        """Observe the seconds spent in a with-block (also when it raises)."""
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        series = self._series.get(_label_key(labels))
+        if not series or not series["count"]:
+            return None
+        target = q * series["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, series["counts"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                labels = dict(key)
+                result[_format_labels(key)] = {
+                    "count": series["count"],
+                    "mean": series["sum"] / series["count"] if series["count"] else None,
+                    "p50": self.quantile(0.5, **labels),
+                    "p99": self.quantile(0.99, **labels)
+                }
+            return result
+
+
+class _Timer:
+    """Context manager behind Histogram.time (a class: cheaper to enter than a generator)."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def _format_labels(key: LabelKey) -> str:
+    return ",".join(f"{name}={value}" for name, value in key) or "all"
+
+
+def _prometheus_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _prometheus_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """Process-wide collection of counters and histograms."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name, description)
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def all(self) -> List[object]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> Dict:
+        return {metric.name: metric.snapshot() for metric in self.all()}
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in sorted(self.all(), key=lambda metric: metric.name):
+            kind = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}[type(metric)]
+            lines.append(f"# HELP {metric.name} {metric.description.replace(chr(10), ' ')}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            with metric._lock:
+                if isinstance(metric, Histogram):
+                    series = [(key, list(s["counts"]), s["count"], s["sum"]) for key, s in metric._series.items()]
+                else:
+                    series = list(metric._values.items())
+            if not isinstance(metric, Histogram):
+                lines.extend(f"{metric.name}{_prometheus_labels(key)} {_prometheus_number(value)}"
+                             for key, value in series)
+                continue
+            for key, counts, count, total in series:
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric.name}_bucket{_prometheus_labels(key, (('le', _prometheus_number(bound)),))} "
+                                 f"{cumulative}")
+                lines.append(f"{metric.name}_bucket{_prometheus_labels(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric.name}_sum{_prometheus_labels(key)} {_prometheus_number(total)}")
+                lines.append(f"{metric.name}_count{_prometheus_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+__all__ = ["metrics", "Counter", "Gauge", "Histogram", "MetricsRegistry"]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ChatMessage(BaseModel):
@@ -14,4 +14,5 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     sources: Optional[List[str]] = []
-    session_id: str
\ No newline at end of file
+    session_id: str
+    usage: Optional[Dict[str, int]] = None  # Estimated prompt/completion tokens, None for cached answers
\ No newline at end of file
@@ -0,0 +1,31 @@
+# backend/app/request_context.py
+
+import os
+import re
+from contextvars import ContextVar
+from typing import Optional
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Set per chat request or WebSocket message; run_blocking carries it into the worker pool
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Client-supplied IDs end up in logs, so only plain token characters are accepted
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._:-]")
+
+
+def start_request(request_id: Optional[str] = None) -> str:
+    """Make request_id (a client-supplied one, or a new one) the current request's ID and return it."""
+    request_id = _UNSAFE_CHARS.sub("", request_id or "")[:64] or os.urandom(8).hex()
+    _request_id.set(request_id)
+    return request_id
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def log_prefix() -> str:
+    """'[<request id>] ' for log lines written while handling a request, '' otherwise."""
+    request_id = _request_id.get()
+    return f"[{request_id}] " if request_id else ""
@@ -1,35 +1,74 @@
 # backend/app/services/ai_service.py
 
-import google.generativeai as genai
-import requests
 import os
-from typing import List, Dict
+import contextvars
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Callable, Tuple
 from ..config import settings
 from ..models import ChatMessage
+from ..concurrency import run_blocking, iterate_blocking
+from ..metrics import metrics
+from ..request_context import log_prefix
+from .conversation import build_history_text, estimate_tokens, truncate_to_tokens
+from .http_client import PooledHTTPClient, is_timeout_error
+from .intents import QueryIntent, classify, topic_answer
+from .ingestion import is_rate_limit_error
+from .provider_routing import Deadline, HedgeBudget, ProviderError, ProviderRouter, hedged_requests
+
+llm_ttft = metrics.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from the start of generation to the first streamed chunk, per provider"
+)
+
+prompt_tokens = metrics.histogram(
+    "llm_prompt_tokens",
+    "Estimated prompt size per generated answer, by section",
+    buckets=(50, 100, 250, 500, 1000, 1500, 2000, 3000, 5000, 8000)
+)
+
+prompt_build_latency = metrics.histogram(
+    "llm_prompt_build_seconds",
+    "Time to format the retrieved context and conversation history for the prompt"
+)
+
+fallback_depth = metrics.histogram(
+    "llm_fallback_depth",
+    "Provider attempts that gave no answer before one did, by what answered (provider, or context "
+    "when every provider failed)",
+    buckets=(0, 1, 2, 3, 4, 5, 8)
+)
+
+class ContextAnswer(str):
+    """An answer formatted from the retrieved context because no provider answered.
+    
+    Still sent to the user, but it must not be cached: the providers may be back by the
+    next request. Stream chunks of this type mark a streamed context answer.
+    """
+
 
 class AIService:
     def __init__(self):
         self.use_gemini = False
         self.use_hf_api = False
         
-        # Try to initialize Gemini with the correct model
+        # Warm-up state: the Gemini probe runs once per process via warm_up()
+        self.status = "cold"
+        self.warm_up_error: Optional[str] = None
+        self.warmed_up_at: Optional[float] = None
+        
+        # Initialize Gemini with the correct model (no network call here)
         if settings.GEMINI_API_KEY and settings.GEMINI_API_KEY.strip() != "":
             try:
+                # Imported only when Gemini is configured; the SDK is slow to load
+                import google.generativeai as genai
                 genai.configure(api_key=settings.GEMINI_API_KEY)
                 # Use gemini-1.5-flash which we confirmed works
                 self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-                # Test the model with a simple request
-                test_response = self.gemini_model.generate_content("test")
-                self.use_gemini = True
-                print("✓ Gemini API initialized with gemini-1.5-flash")
+                self.use_gemini = True  # Errors are handled during generation
             except Exception as e:
                 print(f"✗ Gemini API failed: {e}")
-                # Still try to set up the model for later use
-                try:
-                    self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-                    self.use_gemini = True  # Enable it anyway, handle errors during generation
-                except:
-                    pass
         
         # Setup Hugging Face as fallback
         self.hf_token = os.getenv("HF_TOKEN", "")
@@ -41,33 +80,112 @@ class AIService:
                 "meta-llama/Llama-2-7b-chat-hf",
                 "google/flan-t5-large"
             ]
-            self.current_hf_model = 0
+            # One keep-alive client for every HF call, so fallbacks skip the TCP+TLS handshake
+            self.hf_client = PooledHTTPClient(
+                "huggingface",
+                headers={"Authorization": f"Bearer {self.hf_token}"},
+                pool_size=settings.HF_POOL_SIZE,
+                connect_timeout=settings.HF_CONNECT_TIMEOUT_SECONDS,
+                http2=settings.HF_HTTP2
+            )
             print("✓ Hugging Face API initialized as fallback")
+        
+        # Circuit breakers and live stats decide which provider is tried first
+        self.router = ProviderRouter(self._provider_names())
+        self.hedge_budget = HedgeBudget(settings.HEDGE_BUDGET_RATIO, settings.HEDGE_BUDGET_BURST)
+        # Provider calls run here so an overall deadline can be enforced even on SDKs without timeouts
+        self._call_pool = ThreadPoolExecutor(max_workers=settings.BLOCKING_POOL_SIZE, thread_name_prefix="llm")
     
-    def _get_hf_url(self):
-        """Get the current HF model URL"""
-        return f"https://api-inference.huggingface.co/models/{self.hf_models[self.current_hf_model]}"
+    def close(self) -> None:
+        """Release the provider call pool and the pooled HF connections."""
+        self._call_pool.shutdown(wait=False)
+        if self.use_hf_api:
+            self.hf_client.close()
     
-    def generate_response(self, query: str, context: List[Dict], history: List[ChatMessage]) -> str:
-        """Generate response using available AI service."""
+    def _provider_names(self) -> List[str]:
+        """Remote providers in order of preference (the local context formatter is always last)"""
+        names = []
+        if self.use_gemini:
+            names.append("gemini")
+        if self.use_hf_api:
+            names.extend(f"hf:{model}" for model in self.hf_models)
+        return names
+    
+    def warm_up(self) -> Dict:
+        """Probe the configured providers once so the first user request is not the one paying for it.
+        
+        Safe to call repeatedly: only the first call sends the probe.
+        """
+        if self.status != "cold":
+            return self.health()
+        
+        if self.use_gemini:
+            start = time.perf_counter()
+            try:
+                # Test the model with a simple request
+                self._call_gemini("test", settings.PROVIDER_TIMEOUT_SECONDS)
+                self.router.record_success("gemini", time.perf_counter() - start)
+                self.status = "ready"
+                print("✓ Gemini API initialized with gemini-1.5-flash")
+            except Exception as e:
+                # A 429 at startup opens the circuit so the first users don't wait on it
+                self.router.record_failure("gemini", time.perf_counter() - start, self._classify_error(e))
+                # Keep Gemini enabled anyway, errors are handled during generation
+                self.status = "degraded"
+                self.warm_up_error = str(e)
+                print(f"✗ Gemini warm-up failed: {e}")
+        elif self.use_hf_api:
+            self.status = "ready"
+        else:
+            # No AI provider configured, answers come from the context formatter
+            self.status = "fallback"
         
-        # Format context - limit length to avoid token limits
+        self.warmed_up_at = time.time()
+        return self.health()
+    
+    def health(self) -> Dict:
+        """Report the warm-up state and which providers are enabled."""
+        return {
+            "status": self.status,
+            "gemini": self.use_gemini,
+            "huggingface": self.use_hf_api,
+            "warmed_up_at": self.warmed_up_at,
+            "error": self.warm_up_error,
+            "providers": self.router.snapshot(),
+            "hf_http": self.hf_client.stats() if self.use_hf_api else None
+        }
+    
+    def _get_hf_url(self, model_name: str) -> str:
+        """Get the HF Inference API URL for a model"""
+        return f"{settings.HF_API_URL}/{model_name}"
+    
+    def _build_context_text(self, context: List[Dict]) -> str:
+        """Format context - limit length to avoid token limits"""
         context_texts = []
         for item in context[:3]:  # Only use top 3 results
             source = item.get('metadata', {}).get('source', 'Unknown')
             content = item.get('content', '')[:500]  # Limit content length
             context_texts.append(f"From {source}:\n{content}")
         
-        context_text = "\n\n".join(context_texts)
-        
-        # Debug print
-        print(f"Query: {query}")
-        print(f"Context items: {len(context)}")
-        print(f"Using Gemini: {self.use_gemini}, Using HF: {self.use_hf_api}")
-        
-        # Try Gemini first
-        if self.use_gemini:
-            prompt = f"""You are a helpful and knowledgeable assistant for the OSSU (Open Source Society University) Computer Science curriculum.
+        return "\n\n".join(context_texts)
+    
+    def _build_history_text(self, history: List[ChatMessage], summary: str = "") -> str:
+        """Conversation history for the prompt, bounded by HISTORY_TOKEN_BUDGET + HISTORY_SUMMARY_TOKENS"""
+        history_text, _ = build_history_text(
+            history or [], summary, settings.HISTORY_TOKEN_BUDGET, settings.HISTORY_SUMMARY_TOKENS
+        )
+        return history_text
+    
+    def _build_gemini_prompt(self, query: str, context_text: str, history_text: str = "") -> str:
+        """Build the Gemini prompt from the formatted context and conversation history."""
+        query = truncate_to_tokens(query, settings.MAX_QUERY_TOKENS)
+        history_section = ""
+        if history_text:
+            history_section = f"""
+Conversation so far (use it to resolve follow-up questions):
+{history_text}
+"""
+        return f"""You are a helpful and knowledgeable assistant for the OSSU (Open Source Society University) Computer Science curriculum.
 
 IMPORTANT INSTRUCTIONS:
 1. Always provide comprehensive, helpful answers even if the exact information isn't in the provided context
@@ -78,150 +196,405 @@ IMPORTANT INSTRUCTIONS:
 
 Context from documentation:
 {context_text}
-
+{history_section}
 User Question: {query}
 
 Please provide a clear, concise answer based on the context above. If the answer is not in the context, say so."""
+    
+    def _build_hf_payload(self, model_name: str, query: str, context_text: str, stream: bool = False,
+                          history_text: str = "") -> Dict:
+        """Format prompt based on model type"""
+        query = truncate_to_tokens(query, settings.MAX_QUERY_TOKENS)
+        if "mistral" in model_name.lower() or "llama" in model_name.lower():
+            conversation = f"Conversation so far:\n{history_text}\n\n" if history_text else ""
+            prompt = f"[INST] You are a helpful assistant. Based on this context:\n{context_text[:1000]}\n\n{conversation}Answer this question: {query} [/INST]"
+        else:  # T5 style
+            prompt = f"Answer based on context. Context: {context_text[:500]} Question: {query} Answer:"
+        
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": 300,
+                "temperature": 0.7,
+                "do_sample": True,
+                "return_full_text": False
+            }
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def _classify_error(self, e: Exception) -> str:
+        """Outcome label for the circuit breaker"""
+        if isinstance(e, ProviderError):
+            return e.outcome
+        if isinstance(e, (FutureTimeout, TimeoutError)) or is_timeout_error(e):
+            return "timeout"
+        if is_rate_limit_error(e):
+            return "rate_limited"
+        return "error"
+    
+    def _log_provider_error(self, provider: str, e: Exception) -> None:
+        outcome = self._classify_error(e)
+        if outcome == "rate_limited":
+            print(f"{log_prefix()}{provider} quota exceeded, falling back...")
+        elif outcome == "timeout":
+            print(f"{log_prefix()}{provider} timed out, falling back...")
+        else:
+            print(f"{log_prefix()}{provider} error: {e}, falling back...")
+    
+    def _with_timeout(self, func: Callable, timeout: float, *args):
+        """Run a provider call on the call pool and stop waiting for it after `timeout` seconds"""
+        if timeout <= 0:
+            raise ProviderError("deadline exceeded", "timeout")
+        return self._call_pool.submit(contextvars.copy_context().run, func, *args).result(timeout=timeout)
+    
+    def _call_gemini(self, prompt: str, timeout: float) -> str:
+        return self._with_timeout(lambda: self.gemini_model.generate_content(prompt).text, timeout)
+    
+    def _call_huggingface(self, model_name: str, payload: Dict, timeout: float) -> str:
+        """One HF Inference API request; raises ProviderError on a non-200 response"""
+        response = self.hf_client.post(self._get_hf_url(model_name), json=payload, timeout=timeout)
+        self._raise_for_hf_status(model_name, response.status_code)
+        return self._parse_hf_result(response.json())
+    
+    def _raise_for_hf_status(self, model_name: str, status_code: int) -> None:
+        if status_code == 200:
+            return
+        if status_code == 429:
+            raise ProviderError(f"HF rate limit for {model_name}", "rate_limited")
+        if status_code == 503:
+            # Model is loading or overloaded
+            raise ProviderError(f"HF model {model_name} unavailable", "unavailable")
+        raise ProviderError(f"HF API error for {model_name}: {status_code}")
+    
+    def _generate_with(self, provider: str, query: str, context_text: str, history_text: str,
+                       timeout: float) -> str:
+        """One provider attempt; runs on the call pool, which enforces `timeout` for Gemini."""
+        if provider == "gemini":
+            return self.gemini_model.generate_content(self._build_gemini_prompt(query, context_text, history_text)).text
+        model_name = provider[len("hf:"):]
+        print(f"{log_prefix()}Trying HF model: {model_name}")
+        payload = self._build_hf_payload(model_name, query, context_text, history_text=history_text)
+        return self._call_huggingface(model_name, payload, timeout)
+    
+    def generate_response(self, query: str, context: List[Dict], history: List[ChatMessage], summary: str = "",
+                          intent: Optional[QueryIntent] = None) -> str:
+        """Generate response using available AI service.
+        
+        Returns a ContextAnswer when every provider failed.
+        
+        Args:
+            query: User question
+            context: Retrieved chunks
+            history: Recent messages of the session, oldest first
+            summary: Compacted summary of older turns that no longer fit in history
+            intent: The request's classify(query) result, if already computed
+        """
+        
+        with prompt_build_latency.time():
+            context_text = self._build_context_text(context)
+            history_text = self._build_history_text(history, summary)
+        
+        # Debug print
+        print(f"{log_prefix()}Query: {query}")
+        print(f"{log_prefix()}Context items: {len(context)}")
+        print(f"{log_prefix()}Using Gemini: {self.use_gemini}, Using HF: {self.use_hf_api}")
+        
+        # Try providers in the order the router picks, within one overall deadline
+        deadline = Deadline(settings.LLM_DEADLINE_SECONDS)
+        answer = self._first_answer(self.router.ranked(), query, context_text, history_text, deadline)
+        if answer:
+            return answer
+        
+        # Final fallback - format context nicely
+        return self._format_context_response(context_text, intent or classify(query))
+    
+    def _first_answer(self, providers: List[str], query: str, context_text: str, history_text: str,
+                      deadline: Deadline) -> Optional[str]:
+        """Try providers in order until one answers, hedging between HF models.
+        
+        The next provider starts as soon as the current one fails or times out. If an HF
+        model is still running past its usual (HEDGE_PERCENTILE) latency and the hedge
+        budget allows, the next HF model is started alongside it and the first good
+        answer wins. Calls that lose the race finish in the background; their outcomes
+        still feed the router's statistics.
+        """
+        queue = list(providers)
+        pending: Dict[Future, Tuple[str, float, float]] = {}
+        hedging = settings.HEDGE_ENABLED
+        hedges = set()
+        answer = None
+        attempts = 0
+        self.hedge_budget.deposit()
+        
+        def launch() -> Optional[str]:
+            nonlocal attempts
+            while queue and not deadline.expired:
+                provider = queue.pop(0)
+                if not self.router.acquire(provider):
+                    continue
+                attempts += 1
+                timeout = deadline.timeout(settings.PROVIDER_TIMEOUT_SECONDS)
+                future = self._call_pool.submit(contextvars.copy_context().run, self._generate_with,
+                                                provider, query, context_text, history_text, timeout)
+                started = time.perf_counter()
+                pending[future] = (provider, started, started + timeout)
+                return provider
+            return None
+        
+        current = launch()
+        launched_at = time.perf_counter()
+        try:
+            while pending and answer is None:
+                now = time.perf_counter()
+                wake_at = min(expires for _, _, expires in pending.values())
+                can_hedge = (hedging and current.startswith("hf:")
+                             and any(name.startswith("hf:") for name in queue))
+                if can_hedge:
+                    wake_at = min(wake_at, launched_at + self.router.hedge_delay(current))
+                done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    provider, started, _ = pending.pop(future)
+                    result = self._record_attempt(provider, started, future)
+                    if result and answer is None:
+                        answer = result
+                        if provider in hedges:
+                            hedged_requests.inc(outcome="won")
+                
+                now = time.perf_counter()
+                for future, (provider, started, expires) in list(pending.items()):
+                    if now >= expires:
+                        # The call keeps running, but nobody waits for it any more
+                        del pending[future]
+                        self.router.record_failure(provider, now - started, "timeout")
+                        print(f"{log_prefix()}{provider} timed out, falling back...")
+                
+                if answer is not None or deadline.expired:
+                    break
+                if not pending:
+                    current = launch()
+                    launched_at = time.perf_counter()
+                elif not done and can_hedge and now >= launched_at + self.router.hedge_delay(current):
+                    if self.hedge_budget.try_spend():
+                        hedge = launch()
+                        if hedge is None:
+                            # Every remaining provider's circuit is open: nothing to hedge with
+                            self.hedge_budget.refund()
+                            hedging = False
+                        else:
+                            hedged_requests.inc(outcome="fired")
+                            hedges.add(hedge)
+                            current = hedge
+                            launched_at = time.perf_counter()
+                    else:
+                        hedged_requests.inc(outcome="denied")
+                        hedging = False
+        finally:
+            for future, (provider, started, _) in pending.items():
+                future.add_done_callback(
+                    lambda f, provider=provider, started=started: self._record_attempt(provider, started, f, quiet=True)
+                )
+        
+        if answer is None and deadline.expired:
+            print(f"{log_prefix()}LLM deadline exceeded, answering from context")
+        if answer is None:
+            fallback_depth.observe(attempts, answered_by="context")
+        else:
+            fallback_depth.observe(attempts - 1, answered_by="provider")
+        return answer
+    
+    def _record_attempt(self, provider: str, started: float, future: Future, quiet: bool = False) -> Optional[str]:
+        """Feed a finished provider call into the router; returns its answer if it produced one."""
+        latency = time.perf_counter() - started
+        try:
+            answer = future.result()
+        except Exception as e:
+            self.router.record_failure(provider, latency, self._classify_error(e))
+            if not quiet:
+                self._log_provider_error(provider, e)
+            return None
+        if answer:
+            self.router.record_success(provider, latency)
+            return answer
+        self.router.record_failure(provider, latency)
+        return None
+    
+    async def agenerate_response(self, query: str, context: List[Dict], history: List[ChatMessage],
+                                 summary: str = "", intent: Optional[QueryIntent] = None) -> str:
+        """Async variant of generate_response; the blocking Gemini/HF calls run on the worker pool."""
+        return await run_blocking(self.generate_response, query, context, history, summary, intent)
+    
+    def token_usage(self, query: str, context: List[Dict], history: List[ChatMessage], summary: str = "",
+                    response_text: str = "") -> Dict[str, int]:
+        """Estimated tokens of the Gemini prompt by section, plus the completion, for one answer"""
+        context_text = self._build_context_text(context)
+        history_text, history_tokens = build_history_text(
+            history or [], summary, settings.HISTORY_TOKEN_BUDGET, settings.HISTORY_SUMMARY_TOKENS
+        )
+        usage = {
+            "context": estimate_tokens(context_text),
+            "history_summary": history_tokens["summary"],
+            "history_recent": history_tokens["recent"],
+            "query": estimate_tokens(truncate_to_tokens(query, settings.MAX_QUERY_TOKENS)),
+            "prompt": estimate_tokens(self._build_gemini_prompt(query, context_text, history_text)),
+            "completion": estimate_tokens(response_text)
+        }
+        for section in ("context", "history_summary", "history_recent", "prompt"):
+            prompt_tokens.observe(usage[section], section=section)
+        return usage
+    
+    def stream_response(self, query: str, context: List[Dict], history: List[ChatMessage],
+                        summary: str = "", intent: Optional[QueryIntent] = None) -> Iterator[str]:
+        """Generate a response incrementally, yielding text chunks as the provider produces them.
+        
+        Falls back through the same providers as generate_response. A provider is only
+        abandoned if it fails before its first chunk; once text has been sent it cannot be retracted.
+        After that the stream is cut short if a chunk takes longer than STREAM_CHUNK_TIMEOUT_SECONDS
+        or the whole stream longer than STREAM_DEADLINE_SECONDS, or if the provider fails: the
+        error is raised after the chunks already sent, so callers never take a partial answer
+        for a complete one.
+        """
+        start = time.perf_counter()
+        with prompt_build_latency.time():
+            context_text = self._build_context_text(context)
+            history_text = self._build_history_text(history, summary)
+        deadline = Deadline(settings.LLM_DEADLINE_SECONDS)
+        attempts = 0
+        
+        for provider in self.router.ranked():
+            if deadline.expired:
+                print(f"{log_prefix()}LLM deadline exceeded, answering from context")
+                break
+            if not self.router.acquire(provider):
+                continue
+            attempts += 1
+            attempt_start = time.perf_counter()
+            try:
+                first, rest = self._with_timeout(
+                    self._open_stream, deadline.timeout(settings.PROVIDER_TIMEOUT_SECONDS),
+                    provider, query, context_text, history_text, deadline
+                )
+            except Exception as e:
+                self.router.record_failure(provider, time.perf_counter() - attempt_start, self._classify_error(e))
+                self._log_provider_error(provider, e)
+                continue
+            if first is None:
+                self.router.record_failure(provider, time.perf_counter() - attempt_start)
+                continue
             
+            # Time to first chunk is what users feel, so it drives the provider's latency stats
+            self.router.record_success(provider, time.perf_counter() - attempt_start)
+            llm_ttft.observe(time.perf_counter() - start, provider=provider.split(":")[0])
+            fallback_depth.observe(attempts - 1, answered_by="provider")
+            yield first
             try:
-                response = self.gemini_model.generate_content(prompt)
-                return response.text
+                yield from self._iterate_with_timeout(rest, Deadline(settings.STREAM_DEADLINE_SECONDS))
             except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg or "quota" in error_msg.lower():
-                    print(f"Gemini quota exceeded, falling back to HuggingFace...")
-                else:
-                    print(f"Gemini error: {e}, falling back...")
-        
-        # Fallback to Hugging Face
-        if self.use_hf_api:
-            return self._try_huggingface(query, context_text)
+                # Text has already been sent and cannot be retracted, only reported as incomplete
+                print(f"{log_prefix()}{provider} stream interrupted: {e}")
+                raise
+            return
         
         # Final fallback - format context nicely
-        return self._format_context_response(context_text, query)
+        llm_ttft.observe(time.perf_counter() - start, provider="fallback")
+        fallback_depth.observe(attempts, answered_by="context")
+        yield self._format_context_response(context_text, intent or classify(query))
+    
+    def _open_stream(self, provider: str, query: str, context_text: str, history_text: str,
+                     deadline: Deadline) -> Tuple[Optional[str], Iterator[str]]:
+        """Start a provider stream and wait for its first non-empty chunk; returns (first chunk, rest)"""
+        if provider == "gemini":
+            stream = self.gemini_model.generate_content(
+                self._build_gemini_prompt(query, context_text, history_text),
+                stream=True
+            )
+            chunks = (chunk.text for chunk in stream)
+        else:
+            chunks = self._stream_huggingface(provider[len("hf:"):], query, context_text, history_text, deadline)
+        chunks = (chunk for chunk in chunks if chunk)
+        return next(chunks, None), chunks
     
-    def _try_huggingface(self, query: str, context_text: str) -> str:
-        """Try HuggingFace models with fallback"""
-        headers = {"Authorization": f"Bearer {self.hf_token}"}
+    def _iterate_with_timeout(self, chunks: Iterator[str], deadline: Deadline) -> Iterator[str]:
+        """Pull each chunk on the call pool, giving up on a stalled or overlong stream.
         
-        # Try each model until one works
-        for i in range(len(self.hf_models)):
-            model_name = self.hf_models[self.current_hf_model]
-            print(f"Trying HF model: {model_name}")
-            
-            # Format prompt based on model type
-            if "mistral" in model_name.lower() or "llama" in model_name.lower():
-                prompt = f"[INST] You are a helpful assistant. Based on this context:\n{context_text[:1000]}\n\nAnswer this question: {query} [/INST]"
-            else:  # T5 style
-                prompt = f"Answer based on context. Context: {context_text[:500]} Question: {query} Answer:"
+        The stream is closed when iteration ends for any reason: right away, or once the
+        stalled read returns, so the provider connection is released either way.
+        """
+        pending: Optional[Future] = None
+        try:
+            while True:
+                timeout = deadline.timeout(settings.STREAM_CHUNK_TIMEOUT_SECONDS)
+                if timeout <= 0:
+                    raise ProviderError("stream deadline exceeded", "timeout")
+                pending = self._call_pool.submit(contextvars.copy_context().run, next, chunks, None)
+                try:
+                    chunk = pending.result(timeout=timeout)
+                except FutureTimeout:
+                    raise ProviderError(f"no chunk for {timeout:.1f}s", "timeout")
+                pending = None
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                if pending is None:
+                    close()
+                else:
+                    pending.add_done_callback(lambda _: close())
+    
+    async def astream_response(self, query: str, context: List[Dict], history: List[ChatMessage],
+                               summary: str = "", intent: Optional[QueryIntent] = None) -> AsyncIterator[str]:
+        """Async variant of stream_response; the blocking provider stream is consumed on the worker pool."""
+        async for chunk in iterate_blocking(self.stream_response, query, context, history, summary, intent):
+            yield chunk
+    
+    def _parse_hf_result(self, result) -> str:
+        """Pull the generated text out of an HF Inference API JSON response."""
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get('generated_text', '').strip()
+        elif isinstance(result, dict):
+            return result.get('generated_text', '').strip()
+        return ''
+    
+    def _stream_huggingface(self, model_name: str, query: str, context_text: str, history_text: str,
+                            deadline: Deadline) -> Iterator[str]:
+        """Stream tokens from one HuggingFace model.
+        
+        Text-generation-inference models answer with server-sent events; models without
+        streaming support return plain JSON, which is yielded as a single chunk.
+        """
+        print(f"{log_prefix()}Streaming from HF model: {model_name}")
+        payload = self._build_hf_payload(model_name, query, context_text, stream=True, history_text=history_text)
+        
+        timeout = deadline.timeout(settings.PROVIDER_TIMEOUT_SECONDS)
+        with self.hf_client.stream(self._get_hf_url(model_name), payload, timeout) as (response, lines):
+            self._raise_for_hf_status(model_name, response.status_code)
             
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 300,
-                    "temperature": 0.7,
-                    "do_sample": True,
-                    "return_full_text": False
-                }
-            }
+            if "text/event-stream" not in response.headers.get("content-type", ""):
+                yield self._parse_hf_result(response.json())
+                return
             
-            try:
-                response = requests.post(
-                    self._get_hf_url(), 
-                    headers=headers, 
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        answer = result[0].get('generated_text', '').strip()
-                        if answer:
-                            return answer
-                    elif isinstance(result, dict):
-                        answer = result.get('generated_text', '').strip()
-                        if answer:
-                            return answer
-                elif response.status_code == 503:
-                    # Model is loading, try next one
-                    self.current_hf_model = (self.current_hf_model + 1) % len(self.hf_models)
+            for line in lines:
+                if not line or not line.startswith("data:"):
                     continue
-                else:
-                    print(f"HF API error for {model_name}: {response.status_code}")
-                    self.current_hf_model = (self.current_hf_model + 1) % len(self.hf_models)
+                event = json.loads(line[len("data:"):].strip())
+                token = event.get("token", {})
+                if token.get("special"):
                     continue
-            except Exception as e:
-                print(f"HF error for {model_name}: {e}")
-                self.current_hf_model = (self.current_hf_model + 1) % len(self.hf_models)
-                continue
-        
-        # If all HF models fail, return formatted context
-        return self._format_context_response(context_text, query)
+                yield token.get("text", "")
     
-    def _format_context_response(self, context_text: str, query: str) -> str:
+    def _format_context_response(self, context_text: str, intent: QueryIntent) -> ContextAnswer:
         """Format context as a response when AI is not available."""
-        query_lower = query.lower()
-        
         # Provide structured answers for common questions
-        if 'ossu' in query_lower and ('what' in query_lower or 'about' in query_lower):
-            return """OSSU (Open Source Society University) is a complete, self-taught education in Computer Science using free online materials. 
-
-It's designed to mirror the curriculum of an undergraduate CS degree and includes:
-- Rigorous coursework from MIT, Harvard, Princeton, and other top universities
-- Projects and assignments to build practical skills
-- A supportive community of learners
-- No tuition fees - completely free
-
-The curriculum covers everything from programming basics to advanced topics like machine learning and distributed systems."""
-
-        elif 'core cs' in query_lower or 'core curriculum' in query_lower:
-            return """The Core CS curriculum consists of the following courses:
-
-**Core Programming** (3 courses):
-• How to Code: Simple Data
-• How to Code: Complex Data
-• Programming Languages (Parts A, B, C)
-
-**Core Math** (3 courses):
-• Mathematics for Computer Science
-• Linear Algebra
-• Calculus
-
-**Core Systems** (3 courses):
-• Build a Modern Computer (Nand2Tetris)
-• Operating Systems: Three Easy Pieces
-• Computer Networking
-
-**Core Theory** (3 courses):
-• Algorithms and Data Structures
-• Computability and Complexity
-• Computer Science Theory
-
-**Core Security** (2 courses):
-• Information Security
-• Cryptography I
-
-**Core Applications** (4 courses):
-• Databases
-• Machine Learning
-• Computer Graphics
-• Software Engineering"""
-
-        elif 'programming language' in query_lower:
-            return """The OSSU curriculum teaches various programming languages:
-
-**Introductory**: Python, Scheme/Racket  
-**Systems**: C, Assembly  
-**Object-Oriented**: Java, C++  
-**Functional**: Haskell, ML/OCaml  
-**Web**: JavaScript, HTML/CSS  
-**Databases**: SQL
-
-Each language is chosen to teach specific programming paradigms and concepts."""
-
+        answer = topic_answer(intent, ("about_ossu", "core_cs", "languages"))
+        if answer:
+            return ContextAnswer(answer)
+        
         # Default context response
         if context_text:
-            return f"Based on the documentation:\n\n{context_text[:800]}"
+            return ContextAnswer(f"Based on the documentation:\n\n{context_text[:800]}")
         else:
-            return "I couldn't find relevant information in the documentation for your question. Try asking about the OSSU curriculum, core CS courses, or programming languages used."
\ No newline at end of file
+            return ContextAnswer("I couldn't find relevant information in the documentation for your question. Try asking about the OSSU curriculum, core CS courses, or programming languages used.")
\ No newline at end of file
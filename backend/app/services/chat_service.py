@@ -3,46 +3,71 @@
 from typing import List, Dict, Optional
 from .vector_store import VectorStore
 from .ai_service import AIService
+from .intents import HELP_TOPICS, QueryIntent, canned_answer, classify, topic_answer
+from ..config import settings
 from ..models import ChatMessage
+from ..concurrency import run_blocking
+from ..request_context import current_request_id, log_prefix, start_request
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Questions advertised to users; their embeddings are precomputed at startup
+SUGGESTED_QUESTIONS = [
+    "What is OSSU?",
+    "Which programming languages are taught?",
+    "How long does the curriculum take to complete?",
+    "What are the prerequisites?",
+    "Tell me about the Core CS courses",
+    "What mathematics courses are included?",
+    "How is OSSU different from a traditional CS degree?",
+    "What projects will I build?"
+]
+
 class ChatService:
-    def __init__(self):
-        """Initialize chat service with vector store and AI service"""
+    def __init__(self, vector_store: Optional[VectorStore] = None, ai_service: Optional[AIService] = None):
+        """Initialize chat service with vector store and AI service (shared instances can be passed in)"""
         try:
-            self.vector_store = VectorStore()
-            self.ai_service = AIService()
+            self.vector_store = vector_store or VectorStore()
+            self.ai_service = ai_service or AIService()
             logger.info("ChatService initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing ChatService: {e}")
             raise
     
-    def process_message(self, message: str, history: List[ChatMessage]) -> Dict:
+    def process_message(self, message: str, history: List[ChatMessage], request_id: Optional[str] = None) -> Dict:
         """
         Process a chat message and return response with sources
         
         Args:
             message: User's message
             history: Chat history
+            request_id: ID to log the message under; defaults to the current request's, or a new one
             
         Returns:
-            Dict with 'response' and 'sources' keys
+            Dict with 'response', 'sources' and 'request_id' keys
         """
+        request_id = start_request(request_id or current_request_id())
+        # Matched once; the canned answers and the fallbacks below all reuse it
+        intent = classify(message)
         try:
             # Log the incoming message
-            logger.info(f"Processing message: {message[:100]}...")
+            logger.info(f"{log_prefix()}Processing message: {message[:100]}...")
+            
+            canned = canned_answer(intent) if settings.CANNED_ANSWERS_ENABLED else None
+            if canned:
+                return {'response': canned, 'sources': [], 'request_id': request_id}
             
             # Search for relevant documents
-            relevant_docs = self.vector_store.similarity_search(message, k=4)
-            logger.info(f"Found {len(relevant_docs)} relevant documents")
+            relevant_docs = self.vector_store.similarity_search(message)
+            logger.info(f"{log_prefix()}Found {len(relevant_docs)} relevant documents")
             
             # Generate response using AI service
             response = self.ai_service.generate_response(
                 query=message,
                 context=relevant_docs,
-                history=history
+                history=history,
+                intent=intent
             )
             
             # Format sources - remove duplicates and clean up
@@ -80,77 +105,34 @@ class ChatService:
             
             return {
                 'response': response,
-                'sources': sources
+                'sources': sources,
+                'request_id': request_id
             }
             
         except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
+            logger.error(f"{log_prefix()}Error processing message: {e}", exc_info=True)
             
             # Try to provide a helpful fallback response
-            fallback_response = self._get_fallback_response(message)
+            fallback_response = self._get_fallback_response(intent)
             
             return {
                 'response': fallback_response,
-                'sources': []
+                'sources': [],
+                'request_id': request_id
             }
     
-    def _get_fallback_response(self, message: str) -> str:
+    async def aprocess_message(self, message: str, history: List[ChatMessage],
+                               request_id: Optional[str] = None) -> Dict:
+        """Async variant of process_message that keeps the event loop free"""
+        return await run_blocking(self.process_message, message, history, request_id)
+    
+    def _get_fallback_response(self, intent: QueryIntent) -> str:
         """Provide a fallback response when AI services fail"""
-        message_lower = message.lower()
-        
-        if 'programming language' in message_lower:
-            return """The OSSU curriculum teaches multiple programming languages:
-            
-• **Python** - Used in introductory courses and data science
-• **JavaScript** - For web development and full-stack applications  
-• **C** - For systems programming and understanding low-level concepts
-• **Java** - For object-oriented programming and algorithms
-• **Haskell** - For functional programming paradigms
-• **SQL** - For database management
-• **Assembly** - In computer architecture courses (Nand2Tetris)
-
-Each language is chosen to teach specific concepts and paradigms."""
-
-        elif 'ossu' in message_lower and ('what' in message_lower or 'about' in message_lower):
-            return """OSSU (Open Source Society University) is a complete, free, self-taught education in Computer Science using online materials. It follows the curriculum standards of undergraduate CS programs at top universities.
-
-Key features:
-• Completely free education using MOOCs and online resources
-• Comprehensive curriculum covering all major CS topics
-• Project-based learning with real-world applications
-• Active community of learners worldwide
-• Self-paced learning with suggested timelines"""
-
-        elif 'how long' in message_lower or 'duration' in message_lower:
-            return """The OSSU Computer Science curriculum typically takes 2-4 years to complete, depending on your pace:
-
-• **Part-time (10-20 hours/week)**: 4-6 years
-• **Half-time (20-30 hours/week)**: 2-3 years  
-• **Full-time (40+ hours/week)**: 1.5-2 years
-
-The curriculum includes approximately 2000 hours of study, similar to a traditional CS degree."""
-
-        else:
-            return """I apologize, but I'm having trouble accessing my knowledge base at the moment. 
-
-Here are some topics I can help you with:
-• Information about the OSSU curriculum structure
-• Programming languages used in the courses
-• Course prerequisites and difficulty levels
-• Time commitment and duration estimates
-• Specific course recommendations
-
-Please feel free to ask about any of these topics!"""
+        answer = topic_answer(intent, ("languages", "about_ossu", "duration"))
+        if answer:
+            return answer
+        return "I apologize, but I'm having trouble accessing my knowledge base at the moment. \n\n" + HELP_TOPICS
     
     def get_suggested_questions(self) -> List[str]:
         """Return a list of suggested questions for the user"""
-        return [
-            "What is OSSU?",
-            "Which programming languages are taught?",
-            "How long does the curriculum take to complete?",
-            "What are the prerequisites?",
-            "Tell me about the Core CS courses",
-            "What mathematics courses are included?",
-            "How is OSSU different from a traditional CS degree?",
-            "What projects will I build?"
-        ]
\ No newline at end of file
+        return list(SUGGESTED_QUESTIONS)
@@ -0,0 +1,122 @@
+# backend/app/services/conversation.py
+
+import math
+import re
+from typing import Dict, List, Tuple
+from ..models import ChatMessage
+
+# Openers that mark a message as a follow-up to the previous question
+FOLLOW_UP_OPENERS = ("and ", "also ", "what about", "how about", "which one", "the first", "the second",
+                     "the last", "the next", "the other")
+
+# Pronouns that refer back to the previous question ("is it hard?", "how long does that take?").
+# "this"/"that" only count after an auxiliary or at the end; elsewhere they are usually
+# determiners or relative clauses ("languages that are functional")
+_REFERENCE_RE = re.compile(
+    r"\b(?:it|its|they|them|those|these)\b"
+    r"|\b(?:is|was|does|do|did|will|would|can|should) (?:this|that)\b"
+    r"|\b(?:this|that)(?: one)?[?.! ]*$"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English with Gemini/Llama tokenizers).
+
+    Good enough for budgeting; exact counts would need a tokenizer round trip per request.
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * 4 - 3)].rsplit(" ", 1)[0] + "..."
+
+
+def _first_sentence(text: str, max_chars: int = 160) -> str:
+    sentence = re.split(r"(?<=[.!?])\s|\n", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def compact_messages(messages: List[ChatMessage]) -> List[str]:
+    """One summary line per message: the user's question, or the gist of the answer."""
+    lines = []
+    for message in messages:
+        if message.role == "user":
+            lines.append(f"- User asked: {_first_sentence(message.content, 200)}")
+        else:
+            lines.append(f"  Assistant answered: {_first_sentence(message.content)}")
+    return lines
+
+
+def fold_into_summary(summary: str, messages: List[ChatMessage], max_tokens: int) -> str:
+    """Append compacted messages to a running summary, dropping its oldest lines past max_tokens.
+
+    Called as messages fall out of the stored history window, so each message is
+    compacted exactly once.
+    """
+    lines = (summary.splitlines() if summary else []) + compact_messages(messages)
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def build_history_text(history: List[ChatMessage], summary: str, budget: int,
+                       summary_budget: int) -> Tuple[str, Dict[str, int]]:
+    """Render conversation history for the prompt within a token budget.
+
+    The newest messages are kept verbatim while they fit in budget; older ones are
+    compacted into the summary section, which is capped at summary_budget. The
+    history section therefore never exceeds budget + summary_budget tokens.
+
+    Returns:
+        (history text, token counts for the "summary" and "recent" sections)
+    """
+    recent: List[str] = []
+    used = 0
+    overflow: List[ChatMessage] = []
+    for i in range(len(history) - 1, -1, -1):
+        message = history[i]
+        speaker = "User" if message.role == "user" else "Assistant"
+        line = f"{speaker}: {message.content.strip()}"
+        tokens = estimate_tokens(line)
+        if used + tokens > budget:
+            if not recent:
+                # A single oversized message (e.g. a long answer): keep its beginning
+                line = truncate_to_tokens(line, budget)
+                recent.append(line)
+                used = estimate_tokens(line)
+                overflow = history[:i]
+            else:
+                overflow = history[:i + 1]
+            break
+        recent.append(line)
+        used += tokens
+    recent.reverse()
+
+    if overflow:
+        summary = fold_into_summary(summary, overflow, summary_budget)
+    summary = truncate_to_tokens(summary, summary_budget) if summary else ""
+
+    sections = []
+    if summary:
+        sections.append(f"Earlier in the conversation:\n{summary}")
+    if recent:
+        sections.append("Recent messages:\n" + "\n".join(recent))
+    return "\n\n".join(sections), {"summary": estimate_tokens(summary), "recent": used}
+
+
+def retrieval_query(message: str, history: List[ChatMessage]) -> str:
+    """Query to search the docs with: follow-ups ("what about the second one?") carry the previous question.
+
+    A follow-up opens with a follow-up phrase or refers back with a pronoun; standalone
+    questions ("What is OSSU?", "hi") are searched as they are, however short.
+    """
+    if not history:
+        return message
+    lowered = message.strip().lower()
+    is_follow_up = lowered.startswith(FOLLOW_UP_OPENERS) or _REFERENCE_RE.search(lowered) is not None
+    if not is_follow_up:
+        return message
+    previous = next((m.content for m in reversed(history) if m.role == "user"), None)
+    return f"{previous.strip()} {message}" if previous else message
@@ -0,0 +1,316 @@
+# backend/app/services/course_catalog.py
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+from .course_parser import CourseParser
+from .markdown_chunker import HEADING_SEPARATOR, parse_sections
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+CATALOG_FILE = "course_catalog.json"
+
+# A course page linked from a table must name a language this often before the course
+# is said to use it (one mention is usually a comparison: "not the things that make Java unique")
+PAGE_LANGUAGE_MIN_MENTIONS = 2
+
+FIELDS = ("duration", "effort", "prerequisites", "languages")
+_FIELD_LABELS = {"duration": "Duration", "effort": "Effort", "prerequisites": "Prerequisites", "languages": "Languages"}
+
+# Matched against the normalized question (see normalize_name)
+_FIELD_RES = {
+    "effort": re.compile(r"\b(?:hours?|effort|workload|per week|a week|weekly|time commitment|how much time)\b"),
+    "duration": re.compile(r"\b(?:how long|duration|how many weeks|weeks?|length)\b"),
+    "prerequisites": re.compile(r"\b(?:prereq\w*|requirements?|need to (?:know|take|have)|before (?:taking|starting|i take)"
+                                r"|background|what do i need)\b"),
+    "languages": re.compile(r"\blanguages?\b"),
+}
+_LIST_RE = re.compile(r"\b(?:which|what|list|show|how many)\b.*\bcourses?\b")
+# Only questions asking what the curriculum uses get the fixed language list; advice
+# ("which language should I learn first?") and comparisons are left to the LLM
+_LANGUAGE_LIST_RE = re.compile(r"\blist\b.*\blanguages?\b|\b(?:which|what)\b.*\blanguages?\b.*"
+                               r"\b(?:used?|uses|taught|teach(?:es)?|covers?|covered|learn|in (?:the|ossu))\b")
+_ADVICE_RE = re.compile(r"\b(?:should|best|better|worse|recommend\w*|suggest\w*|first|start\w*|begin\w*|easiest"
+                        r"|hardest|prefer\w*|worth|most|least|vs|versus|or|job|jobs|career)\b")
+_NAME_CHARS_RE = re.compile(r"[^a-z0-9+#]+")
+_ALIAS_PREFIXES = ("the ", "from ")
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase words only, so names and questions compare regardless of punctuation."""
+    return _NAME_CHARS_RE.sub(" ", text.lower().replace("&", " and ")).strip()
+
+
+def _name_aliases(name: str) -> List[str]:
+    """Ways a question may refer to a course: its full name and each side of a 'Series: Title' name.
+
+    A side needs two words or more: "Software Engineering: Introduction" is not "introduction".
+    """
+    aliases = [normalize_name(name)]
+    for part in [name] + (name.split(":") if ":" in name else []):
+        alias = normalize_name(re.sub(r"\(.*?\)", " ", part))
+        for prefix in _ALIAS_PREFIXES:
+            if alias.startswith(prefix):
+                alias = alias[len(prefix):]
+        if len(alias.split()) > 1:
+            aliases.append(alias)
+    return aliases
+
+
+def _alternation(phrases) -> Optional["re.Pattern"]:
+    """One pattern for all phrases matching whole words of a normalized question.
+
+    The match is a lookahead, so phrases that overlap ("from nand to tetris part ii"
+    holds two course aliases) are all found, one per start position, longest first.
+    """
+    phrases = sorted(phrases, key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile(r"(?<![a-z0-9+#])(?=(" + "|".join(map(re.escape, phrases)) + r")(?![a-z0-9+#]))")
+
+
+def _longest_match(pattern: Optional["re.Pattern"], text: str) -> Optional[str]:
+    if pattern is None:
+        return None
+    return max((match.group(1) for match in pattern.finditer(text)), key=len, default=None)
+
+
+def extract_file_catalog(text: str) -> Dict:
+    """The catalog entry for one markdown file.
+
+    courses are its course table rows (see CourseParser.extract_courses), section_languages
+    the languages the prose of each section with a course table names, and languages counts
+    mentions in the whole file, used when a course table links to the file as the course page.
+    """
+    courses = CourseParser.extract_courses(text)
+    course_paths = {course["heading_path"] for course in courses}
+    section_languages = {}
+    for path, blocks in parse_sections(text):
+        heading_path = HEADING_SEPARATOR.join(path)
+        if heading_path in course_paths:
+            prose = "\n".join(block.text for block in blocks if block.kind == "text")
+            section_languages[heading_path] = CourseParser.extract_programming_languages(prose)
+    return {
+        "courses": courses,
+        "section_languages": section_languages,
+        "languages": CourseParser.count_programming_languages(text)
+    }
+
+
+class _CatalogIndex:
+    """Lookup structures over every file's entry, rebuilt whole after an index sync."""
+
+    def __init__(self, files: Dict[str, Dict]):
+        self.courses: List[Dict] = []
+        self.sections: List[Dict] = []
+        aliases: Dict[str, Optional[Dict]] = {}
+        full_names: Dict[str, Dict] = {}
+        section_titles: Dict[str, Dict] = {}
+
+        for rel_path in sorted(files):
+            entry = files[rel_path]
+            sections: Dict[str, Dict] = {}
+            for parsed in entry["courses"]:
+                key = normalize_name(parsed["name"])
+                if key in full_names:  # listed in more than one file: the first one wins
+                    continue
+                course = dict(parsed, source=rel_path,
+                              languages=sorted(set(parsed["languages"]) | set(self._page_languages(files, rel_path, parsed["url"]))))
+                full_names[key] = course
+                self.courses.append(course)
+                for alias in _name_aliases(parsed["name"]):
+                    # A shared alias ("databases" for three Databases: courses) names no course in particular
+                    aliases[alias] = course if aliases.get(alias, course) is course else None
+
+                heading_path = parsed["heading_path"]
+                if heading_path not in sections:
+                    sections[heading_path] = {
+                        "title": parsed["section"],
+                        "heading_path": heading_path,
+                        "source": rel_path,
+                        "courses": [],
+                        "languages": set(entry["section_languages"].get(heading_path, []))
+                    }
+                sections[heading_path]["courses"].append(course)
+                sections[heading_path]["languages"].update(course["languages"])
+            for section in sections.values():
+                section["languages"] = sorted(section["languages"])
+                self.sections.append(section)
+                section_titles.setdefault(normalize_name(section["title"]), section)
+
+        aliases.update(full_names)
+        self.by_alias = {alias: course for alias, course in aliases.items() if course is not None}
+        self.by_section = section_titles
+        self.course_re = _alternation(self.by_alias)
+        self.section_re = _alternation(self.by_section)
+        languages = {language for section in self.sections for language in section["languages"]}
+        # One-letter names are ordinary words in a lowercased question
+        self.by_language = {normalize_name(language): language for language in languages if len(language) > 1}
+        self.language_re = _alternation(self.by_language)
+
+    @staticmethod
+    def _page_languages(files: Dict[str, Dict], rel_path: str, url: str) -> List[str]:
+        url = url.split("#")[0]
+        if not url or "://" in url or url.startswith("/"):
+            return []
+        page = files.get(os.path.normpath(os.path.join(os.path.dirname(rel_path), url)))
+        if page is None:
+            return []
+        return [language for language, count in page["languages"].items() if count >= PAGE_LANGUAGE_MIN_MENTIONS]
+
+
+class CourseCatalog:
+    """Course table rows and language mentions extracted once per file at index time.
+
+    The IncrementalIndexer updates the entries of new, changed and removed files and saves
+    the catalog next to the index manifest; answer() then replies to questions about a
+    course's duration, effort, prerequisites or languages, the courses of a section and
+    the languages the curriculum uses, without retrieval or an LLM call. Anything else
+    returns None and takes the normal path.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        self._index = _CatalogIndex({})
+
+    def __len__(self) -> int:
+        return len(self._index.courses)
+
+    def load(self) -> bool:
+        """Read the saved catalog; without a current one, the entries start empty.
+
+        Answers keep coming from the previous index until rebuild().
+        """
+        if not self.path:
+            return False
+        data = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable course catalog: {e}")
+        if data.get("version") != CATALOG_VERSION:
+            self.files = {}
+            return False
+        self.files = data["files"]
+        return True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CATALOG_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def file_hash(self, rel_path: str) -> Optional[str]:
+        """Content hash of the file the entry was extracted from."""
+        entry = self.files.get(rel_path)
+        return entry["hash"] if entry else None
+
+    def update_file(self, rel_path: str, file_hash: str, entry: Dict) -> None:
+        self.files[rel_path] = dict(entry, hash=file_hash)
+
+    def remove_file(self, rel_path: str) -> None:
+        self.files.pop(rel_path, None)
+
+    def rebuild(self) -> None:
+        """Make updates visible to answer(); the swap is atomic, so requests never see a half-built index."""
+        self._index = _CatalogIndex(self.files)
+
+    def stats(self) -> Dict:
+        index = self._index
+        return {"files": len(self.files), "courses": len(index.courses), "sections": len(index.sections)}
+
+    def answer(self, question: str) -> Optional[Dict]:
+        """Answer a catalog question, or None if it isn't one.
+
+        Returns {"response", "context", "kind"}; context holds one dict per course used,
+        shaped like search results so sources are reported as usual.
+        """
+        index = self._index
+        if not index.courses:
+            return None
+        text = normalize_name(question)
+        course_alias = _longest_match(index.course_re, text)
+        # "Programming Languages, Part A" asks nothing about languages
+        asked = text.replace(course_alias, " ") if course_alias else text
+        fields = [field for field, pattern in _FIELD_RES.items() if pattern.search(asked)]
+        if course_alias and fields:
+            return self._course_answer(index.by_alias[course_alias], fields)
+
+        if _LIST_RE.search(text):
+            section_title = _longest_match(index.section_re, text)
+            if section_title:
+                return self._section_answer(index.by_section[section_title])
+            language = _longest_match(index.language_re, text)
+            if language:
+                return self._language_courses_answer(index, index.by_language[language])
+
+        if _LANGUAGE_LIST_RE.search(text) and not _ADVICE_RE.search(text) and not course_alias:
+            return self._languages_answer(index)
+        return None
+
+    def _course_answer(self, course: Dict, fields: List[str]) -> Optional[Dict]:
+        if not any(course[field] for field in fields):
+            return None  # Nothing to say from the table; retrieval and the LLM may do better
+        lines = [f"**{course['name']}** ({_place(course)})", ""]
+        for field in fields + [field for field in FIELDS if field not in fields]:
+            value = course[field]
+            if isinstance(value, list):
+                value = ", ".join(value)
+            if value or field in fields:
+                lines.append(f"• {_FIELD_LABELS[field]}: {value or 'not listed'}")
+        return {"response": "\n".join(lines), "context": [_context(course)], "kind": fields[0]}
+
+    def _section_answer(self, section: Dict) -> Dict:
+        courses = section["courses"]
+        lines = [f"{_place(section)} has {len(courses)} course{'s' if len(courses) != 1 else ''}:", ""]
+        lines.extend(f"• {_course_line(course)}" for course in courses)
+        if section["languages"]:
+            lines.extend(["", f"Languages: {', '.join(section['languages'])}"])
+        return {"response": "\n".join(lines), "context": [_context(course) for course in courses], "kind": "section"}
+
+    def _language_courses_answer(self, index: _CatalogIndex, language: str) -> Dict:
+        courses = [course for course in index.courses if language in course["languages"]]
+        sections = [section for section in index.sections if language in section["languages"]]
+        lines = [f"{language} in the curriculum:", ""]
+        lines.extend(f"• {_course_line(course)} — {_place(course)}" for course in courses)
+        listed = {id(course) for course in courses}
+        lines.extend(f"• {_place(section)}: {', '.join(course['name'] for course in section['courses'])}"
+                     for section in sections if not any(id(course) in listed for course in section["courses"]))
+        context = courses or [course for section in sections for course in section["courses"]]
+        return {"response": "\n".join(lines), "context": [_context(course) for course in context], "kind": "language"}
+
+    def _languages_answer(self, index: _CatalogIndex) -> Optional[Dict]:
+        sections = [section for section in index.sections if section["languages"]]
+        if not sections:
+            return None
+        lines = ["Programming languages used by the courses, by section:", ""]
+        lines.extend(f"• {_place(section)}: {', '.join(section['languages'])}" for section in sections)
+        context = [course for section in sections for course in section["courses"] if course["languages"]]
+        return {"response": "\n".join(lines), "context": [_context(course) for course in context], "kind": "languages"}
+
+
+def _place(item: Dict) -> str:
+    return item["heading_path"] or item["source"]
+
+
+def _course_line(course: Dict) -> str:
+    facts = ", ".join(value for value in (course["duration"], course["effort"]) if value)
+    return f"{course['name']} ({facts})" if facts else course["name"]
+
+
+def _context(course: Dict) -> Dict:
+    row = " | ".join([course["name"], course["duration"], course["effort"], course["prerequisites"]])
+    return {
+        "content": row,
+        "metadata": {"source": course["source"], "heading_path": course["heading_path"], "section": course["section"]}
+    }
+
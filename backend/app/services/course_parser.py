@@ -1,75 +1,119 @@
 import re
-from typing import List, Dict
+from collections import Counter
+from typing import List, Dict, Optional
+from .markdown_chunker import HEADING_SEPARATOR, parse_sections
 
-class CourseParser:
-    @staticmethod
-    def extract_programming_languages(text: str) -> List[str]:
-        """Extract programming languages mentioned in the text."""
-        languages = set()
+# Canonical name → pattern, matched case-sensitively: lowercase "go", "c" or "r" are
+# ordinary words, so the short names also need a language context around them
+_LANGUAGE_PATTERNS = [
+    ('Python', r'Python'),
+    ('JavaScript', r'JavaScript'),
+    ('Java', r'Java(?!Script)'),
+    ('C++', r'C\+\+'),
+    ('C#', r'C#'),
+    ('C', r'(?<!Part )C(?![+#\w]|\.\w)'),
+    ('Scheme', r'Scheme'),
+    ('Racket', r'Racket'),
+    ('Standard ML', r'Standard ML|SML'),
+    ('OCaml', r'OCaml'),
+    ('Haskell', r'Haskell'),
+    ('Ruby', r'Ruby'),
+    ('Rust', r'Rust'),
+    ('Scala', r'Scala'),
+    ('Prolog', r'Prolog'),
+    ('Kotlin', r'Kotlin'),
+    ('Go', r'Golang|Go(?= (?:language|programming|code))'),
+    ('SQL', r'SQL'),
+    ('Assembly', r'[Aa]ssembly(?= (?:language|code|programming))|x86 assembly'),
+    ('MATLAB', r'MATLAB'),
+    ('R', r'R(?= (?:language|programming))'),
+]
+_LANGUAGE_RE = re.compile('|'.join(
+    f'(?P<g{i}>(?<![\\w+#])(?:{pattern})(?![\\w]))' if not name.endswith(('+', '#'))
+    else f'(?P<g{i}>(?<![\\w+#])(?:{pattern}))'
+    for i, (name, pattern) in enumerate(_LANGUAGE_PATTERNS)
+))
+_LANGUAGE_NAMES = {f'g{i}': name for i, (name, _) in enumerate(_LANGUAGE_PATTERNS)}
 
-        language_patterns = [
-            r'\b(Python)\b',
-            r'\b(Java)(?!Script)\b',
-            r'\b(JavaScript|JS)\b',
-            r'\b(C\+\+|C)\b',
-            r'\b(Scheme)\b',
-            r'\b(Racket)\b',
-            r'\b(ML|OCaml|SML)\b',
-            r'\b(Haskell)\b',
-            r'\b(Ruby)\b',
-            r'\b(Rust)\b',
-            r'\b(Go|Golang)\b',
-            r'\b(SQL)\b',
-            r'\b(Assembly)\b',
-            r'\b(MATLAB)\b',
-            r'\b(R)\b',
-        ]
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)\s]+)[^)]*\)')
+# Table columns that hold the course rather than facts about it
+_IGNORED_COLUMNS = ('discussion',)
 
-        for pattern in language_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            languages.update(m.capitalize() if isinstance(m, str) else m[0].capitalize() for m in matches)
 
-        # Normalize language names
-        normalized = set()
-        for lang in languages:
-            if lang.lower() in ['c', 'c++']:
-                normalized.add(lang.upper())
-            elif lang.upper() in ['SQL', 'ML', 'JS', 'R']:
-                normalized.add(lang.upper())
-            else:
-                normalized.add(lang.capitalize())
+def _cell_text(cell: str) -> str:
+    """A table cell without link targets or markup; '-' means empty."""
+    text = _LINK_RE.sub(r'\1', cell).replace('*', '').replace('`', '')
+    text = re.sub(r'\s+', ' ', text).strip()
+    return '' if text in ('-', '–') else text
 
-        return sorted(normalized)
 
-    @staticmethod
-    def extract_courses(text: str) -> List[Dict[str, str]]:
-        """Extract course information from markdown tables."""
-        courses = []
-        lines = text.split('\n')
+def _split_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
 
-        in_table = False
-        for line in lines:
-            if '|' in line and line.count('|') >= 2:
-                if '---' in line:  # Start of table
-                    in_table = True
-                    continue
 
-                if in_table:
-                    parts = [p.strip() for p in line.split('|')]
-                    if len(parts) >= 3 and parts[1]:  # Has course name
-                        course_name = parts[1]
+class CourseParser:
+    @staticmethod
+    def count_programming_languages(text: str) -> Dict[str, int]:
+        """Count mentions of each programming language in the text."""
+        return dict(Counter(_LANGUAGE_NAMES[match.lastgroup] for match in _LANGUAGE_RE.finditer(text)))
 
-                        # Clean up markdown links: [Name](URL) → Name
-                        match = re.match(r'\[([^\]]+)\]\([^)]+\)', course_name)
-                        if match:
-                            course_name = match.group(1)
+    @staticmethod
+    def extract_programming_languages(text: str) -> List[str]:
+        """Extract programming languages mentioned in the text."""
+        return sorted(CourseParser.count_programming_languages(text))
 
-                        if course_name and not course_name.startswith('-'):
-                            course_info = {
-                                'name': course_name,
-                                'duration': parts[2] if len(parts) > 2 else '',
-                                'effort': parts[3] if len(parts) > 3 else ''
-                            }
-                            courses.append(course_info)
+    @staticmethod
+    def extract_courses(text: str) -> List[Dict[str, str]]:
+        """Extract course information from markdown tables.
 
+        A course table is one whose header has a Duration column; rows may or may not
+        start with a pipe. Columns are mapped by header name, so tables with extra
+        columns (Notes, Additional Text) keep duration, effort and prerequisites apart.
+        Each course has name, url, duration, effort, prerequisites, notes, section,
+        heading_path and the languages named in its row (prerequisites excluded).
+        """
+        courses = []
+        for path, blocks in parse_sections(text):
+            for block in blocks:
+                if block.kind != 'table':
+                    continue
+                lines = block.text.split('\n')
+                header = [cell.lower() for cell in _split_row(lines[0])]
+                if 'duration' not in header:
+                    continue
+                for line in lines[2:]:
+                    cells = _split_row(line)
+                    if not cells or not cells[0]:
+                        continue
+                    course = CourseParser._parse_row(header, cells)
+                    if course:
+                        course['section'] = path[-1] if path else ''
+                        course['heading_path'] = HEADING_SEPARATOR.join(path)
+                        courses.append(course)
         return courses
+
+    @staticmethod
+    def _parse_row(header: List[str], cells: List[str]) -> Optional[Dict]:
+        link = _LINK_RE.search(cells[0])
+        name = _cell_text(link.group(1) if link else cells[0])
+        if not name or name.startswith('-'):
+            return None
+        columns = dict(zip(header[1:], cells[1:]))
+        notes = [
+            _cell_text(value) for column, value in columns.items()
+            if column not in ('duration', 'effort', 'prerequisites') + _IGNORED_COLUMNS and _cell_text(value)
+        ]
+        return {
+            'name': name,
+            'url': link.group(2) if link else '',
+            'duration': _cell_text(columns.get('duration', '')),
+            'effort': _cell_text(columns.get('effort', '')),
+            'prerequisites': _cell_text(columns.get('prerequisites', '')),
+            'notes': '; '.join(notes),
+            'languages': CourseParser.extract_programming_languages(' '.join([name] + notes))
+        }
@@ -1,47 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
 import os
-from typing import List, Dict
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, List, Dict, Iterator, Optional, Tuple
+from ..config import settings
+from .course_catalog import extract_file_catalog
+from .markdown_chunker import MarkdownChunker, heading_metadata
 import logging
 
+if TYPE_CHECKING:
+    from langchain.schema import Document  # langchain is imported lazily, on first use
+
 logger = logging.getLogger(__name__)
 
+# Files sent to a worker process per task, so pickling and IPC are paid per batch, not per file
+FILES_PER_TASK = 16
+# Batches in flight per worker: keeps every core busy while results are streamed
+# back in order, without holding the whole corpus in memory
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+_worker_chunker: Optional[MarkdownChunker] = None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    global _worker_chunker
+    _worker_chunker = MarkdownChunker(chunk_size, chunk_overlap)
+
+
+def read_and_split(chunker: MarkdownChunker, file_path: str, rel_path: str,
+                   known_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Read, hash and chunk one file; chunking is skipped when the hash matches known_hash.
+
+    Returns plain (text, metadata) pairs so results pickle cheaply across processes,
+    plus the file's course catalog entry, extracted in the same pass.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        return {"file_path": file_path, "rel_path": rel_path, "hash": None, "chunks": None, "catalog": None,
+                "error": str(e)}
+    file_hash = content_hash(content)
+    chunks = catalog = None
+    if file_hash != known_hash:
+        chunks = [
+            (text, {"source": rel_path, "file": os.path.basename(rel_path), **heading_metadata(path)})
+            for text, path in chunker.split(content)
+        ]
+        catalog = extract_file_catalog(content)
+    return {"file_path": file_path, "rel_path": rel_path, "hash": file_hash, "chunks": chunks, "catalog": catalog,
+            "error": None}
+
+
+def _read_and_split_batch(tasks: List[Tuple[str, str, Optional[str]]]) -> List[Dict[str, Any]]:
+    return [read_and_split(_worker_chunker, *task) for task in tasks]
+
+
 class DocumentProcessor:
-    def __init__(self, markdown_dir: str):
+    def __init__(self, markdown_dir: str, chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None):
         self.markdown_dir = markdown_dir
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+        # Sizes are in tokens (see estimate_tokens)
+        self.chunker = MarkdownChunker(
+            chunk_size or settings.CHUNK_SIZE,
+            settings.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         )
-    
-    def process_documents(self) -> List[Document]:
-        """Process all markdown files in the directory and subdirectories."""
-        documents = []
-        
-        # Walk through all subdirectories
+
+    def iter_markdown_files(self) -> Iterator[Tuple[str, str]]:
+        """Yield (absolute path, path relative to markdown_dir) for every markdown file, in a stable order."""
         for root, dirs, files in os.walk(self.markdown_dir):
-            for file in files:
+            dirs.sort()
+            for file in sorted(files):
                 if file.endswith('.md'):
                     file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Create relative path for source
-                        rel_path = os.path.relpath(file_path, self.markdown_dir)
-                        
-                        # Split into chunks
-                        chunks = self.text_splitter.create_documents(
-                            texts=[content],
-                            metadatas=[{"source": rel_path, "file": file}]
-                        )
-                        
-                        documents.extend(chunks)
-                        logger.info(f"Processed: {rel_path} ({len(chunks)} chunks)")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing {file_path}: {e}")
-        
+                    yield file_path, os.path.relpath(file_path, self.markdown_dir)
+
+    def split_text(self, content: str, rel_path: str) -> List[Document]:
+        """Split one file's content into chunks tagged with its source and heading path."""
+        from langchain.schema import Document
+        return [
+            Document(
+                page_content=text,
+                metadata={"source": rel_path, "file": os.path.basename(rel_path), **heading_metadata(path)}
+            )
+            for text, path in self.chunker.split(content)
+        ]
+
+    def iter_processed(self, known_hashes: Optional[Dict[str, str]] = None,
+                       workers: int = 1) -> Iterator[Dict[str, Any]]:
+        """Read and chunk every markdown file, yielding one result per file in iter_markdown_files order.
+
+        Each result has file_path, rel_path, hash, error, and chunks as Documents and the
+        course catalog entry, both None when the file's hash equals known_hashes[rel_path]
+        (unchanged since the last index) or it could not be read. With workers > 1, files
+        are read and chunked in a pool of processes; results still come back in the same
+        order, so chunk IDs and the manifest don't depend on the worker count.
+        """
+        from langchain.schema import Document
+
+        known_hashes = known_hashes or {}
+        tasks = ((file_path, rel_path, known_hashes.get(rel_path))
+                 for file_path, rel_path in self.iter_markdown_files())
+        if workers > 1:
+            results = self._process_in_pool(tasks, workers)
+        else:
+            results = (read_and_split(self.chunker, *task) for task in tasks)
+
+        for result in results:
+            if result["chunks"] is not None:
+                result["chunks"] = [Document(page_content=text, metadata=metadata) for text, metadata in result["chunks"]]
+            yield result
+
+    def _process_in_pool(self, tasks: Iterator[Tuple[str, str, Optional[str]]],
+                         workers: int) -> Iterator[Dict[str, Any]]:
+        # spawn, not fork: the server process runs threads (event loop, worker pool)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(self.chunker.chunk_size, self.chunker.chunk_overlap)) as pool:
+            pending = deque()
+            batch = []
+            for task in tasks:
+                batch.append(task)
+                if len(batch) == FILES_PER_TASK:
+                    pending.append(pool.submit(_read_and_split_batch, batch))
+                    batch = []
+                if len(pending) >= workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                    yield from pending.popleft().result()
+            if batch:
+                pending.append(pool.submit(_read_and_split_batch, batch))
+            while pending:
+                yield from pending.popleft().result()
+
+    def process_documents(self, workers: int = 1) -> List[Document]:
+        """Process all markdown files in the directory and subdirectories."""
+        documents = []
+
+        # Walk through all subdirectories
+        for result in self.iter_processed(workers=workers):
+            if result["error"]:
+                logger.error(f"Error processing {result['file_path']}: {result['error']}")
+                continue
+            documents.extend(result["chunks"])
+            logger.info(f"Processed: {result['rel_path']} ({len(result['chunks'])} chunks)")
+
         logger.info(f"Total documents processed: {len(documents)}")
         return documents
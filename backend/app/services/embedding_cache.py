@@ -0,0 +1,285 @@
+# backend/app/services/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List
+from ..metrics import metrics
+from .text_utils import normalize_query
+import logging
+
+logger = logging.getLogger(__name__)
+
+query_cache_lookups = metrics.counter(
+    "query_embedding_cache_lookups_total",
+    "In-memory query embedding cache lookups by result (hit, miss)"
+)
+query_embedding_latency = metrics.histogram(
+    "query_embedding_seconds",
+    "Time spent embedding a query with the provider (cache misses only)"
+)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed embedding cache in SQLite, keyed by (model, text hash).
+
+    Vectors are stored as float32 blobs. The database runs in WAL mode, so several
+    uvicorn workers and the rebuild CLI can read it concurrently while one writes.
+    When the file grows past max_bytes the least recently used rows are evicted.
+    """
+
+    TOUCH_FLUSH_SECONDS = 60
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_touch = set()
+        self._last_touch_flush = time.time()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the hashes that are present."""
+        if not hashes:
+            return {}
+        conn = self._conn()
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            part = unique[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *part]
+            ).fetchall()
+            for digest, blob in rows:
+                found[digest] = array("f", blob).tolist()
+
+        self.hits += sum(1 for digest in hashes if digest in found)
+        self.misses += sum(1 for digest in hashes if digest not in found)
+
+        if found:
+            self._touch(model, found.keys())
+        return found
+
+    def _touch(self, model: str, digests) -> None:
+        """Record recency for eviction without turning every read into a write transaction.
+
+        Touches are buffered and flushed at most every TOUCH_FLUSH_SECONDS (or on the next put),
+        so concurrent readers in other workers are not serialized behind the write lock.
+        """
+        with self._write_lock:
+            self._pending_touch.update((model, digest) for digest in digests)
+            due = time.time() - self._last_touch_flush > self.TOUCH_FLUSH_SECONDS
+        if due:
+            try:
+                self._flush_touches(self._conn())
+            except sqlite3.OperationalError as e:
+                # Another process holds the write lock; recency is best-effort
+                logger.debug(f"Skipped embedding cache recency update: {e}")
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        with self._write_lock:
+            pending, self._pending_touch = self._pending_touch, set()
+            self._last_touch_flush = time.time()
+            if not pending:
+                return
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(self._last_touch_flush, model, digest) for model, digest in pending]
+            )
+            conn.commit()
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        conn = self._conn()
+        self._flush_touches(conn)
+        with self._write_lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, digest, array("f", vector).tobytes(), now) for digest, vector in items.items()]
+            )
+            conn.commit()
+            self._evict_if_needed(conn)
+
+    def _size_bytes(self, conn: sqlite3.Connection) -> int:
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used rows until the data fits in 90% of max_bytes."""
+        size = self._size_bytes(conn)
+        if size <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if not rows:
+            return
+        target = int(rows * (1 - (size - self.max_bytes * 0.9) / size))
+        evict = max(1, rows - max(0, target))
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (evict,)
+        )
+        conn.commit()
+        self.evictions += evict
+        logger.info(f"Evicted {evict} embeddings from cache ({size / 1e6:.1f} MB > {self.max_bytes / 1e6:.1f} MB)")
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0],
+            "size_bytes": self._size_bytes(conn),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions
+        }
+
+
+class CachedEmbeddings:
+    """Wraps a langchain embeddings object so repeated texts are read from an EmbeddingCache.
+
+    Query and document embeddings are cached separately because some models (Gemini)
+    embed them with different task types.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache, model_name: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def _cached(self, kind: str, texts: List[str], embed) -> List[List[float]]:
+        model = f"{self.model_name}:{kind}"
+        hashes = [text_hash(text) for text in texts]
+        try:
+            found = self.cache.get_many(model, hashes)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            found = {}
+
+        missing = [i for i, digest in enumerate(hashes) if digest not in found]
+        if missing:
+            vectors = embed([texts[i] for i in missing])
+            new_items = {hashes[i]: vector for i, vector in zip(missing, vectors)}
+            found.update(new_items)
+            try:
+                self.cache.put_many(model, new_items)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+        return [found[digest] for digest in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._cached("document", texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._cached("query", [text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+
+class QueryEmbeddingLRU:
+    """Bounded in-memory LRU of query embeddings, keyed by the normalized query text.
+
+    Sits on the similarity_search hot path, so repeated questions ("What is OSSU?")
+    skip the provider round trip entirely.
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]], max_entries: int):
+        self._embed_query = embed_query
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> List[float]:
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                query_cache_lookups.inc(result="hit")
+                return vector
+            self.misses += 1
+        query_cache_lookups.inc(result="miss")
+
+        start = time.perf_counter()
+        vector = self._embed_query(query)
+        query_embedding_latency.observe(time.perf_counter() - start)
+        self._store(key, vector)
+        return vector
+
+    def _store(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def precompute(self, queries: Iterable[str]) -> int:
+        """Embed queries ahead of time (e.g. the suggested questions); returns how many were new."""
+        added = 0
+        for query in queries:
+            key = normalize_query(query)
+            with self._lock:
+                if key in self._entries:
+                    continue
+            try:
+                self._store(key, self._embed_query(query))
+                added += 1
+            except Exception as e:
+                logger.warning(f"Could not precompute embedding for {query!r}: {e}")
+        return added
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None
+        }
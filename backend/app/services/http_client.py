@@ -0,0 +1,144 @@
+# backend/app/services/http_client.py
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from ..metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+http_requests = metrics.counter(
+    "http_client_requests_total",
+    "Outbound HTTP requests made through a pooled client, by client and protocol"
+)
+
+http_connections = metrics.counter(
+    "http_client_connections_opened_total",
+    "New TCP(+TLS) connections opened by a pooled client; requests minus connections were served on reused ones"
+)
+
+
+def is_timeout_error(error: Exception) -> bool:
+    """Connect or read timeout from either HTTP backend."""
+    if isinstance(error, requests.Timeout):
+        return True
+    return type(error).__module__.startswith("httpx") and "Timeout" in type(error).__name__
+
+
+def _counting_pool(base, client_name: str):
+    """urllib3 pool class that counts every new connection it opens."""
+    class CountingPool(base):
+        def _new_conn(self):
+            http_connections.inc(client=client_name)
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    def __init__(self, client_name: str, **kwargs):
+        self.client_name = client_name
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.client_name),
+            "https": _counting_pool(HTTPSConnectionPool, self.client_name)
+        }
+
+
+class PooledHTTPClient:
+    """Long-lived keep-alive HTTP client for one upstream API.
+
+    Uses httpx with HTTP/2 when `http2` is requested and httpx + h2 are installed
+    (one multiplexed connection per host); otherwise a requests Session whose
+    connection pool keeps up to `pool_size` connections per host alive between calls.
+    Default headers (e.g. Authorization) are set once. Thread-safe: the provider
+    calls share one client across the worker pool.
+    """
+
+    def __init__(self, name: str, headers: Optional[Dict[str, str]] = None, pool_size: int = 10,
+                 connect_timeout: float = 3.0, http2: bool = False):
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self._httpx = None
+        self._session = None
+
+        if http2:
+            try:
+                import httpx
+                import h2  # noqa: F401  (httpx needs it for HTTP/2)
+                self._httpx = httpx.Client(
+                    http2=True,
+                    headers=headers,
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                )
+            except ImportError:
+                logger.info(f"{name}: httpx[http2] not installed, using HTTP/1.1 keep-alive")
+
+        if self._httpx is None:
+            self._session = requests.Session()
+            self._session.headers.update(headers or {})
+            adapter = _CountingAdapter(name, pool_connections=4, pool_maxsize=pool_size)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    @property
+    def protocol(self) -> str:
+        return "http2" if self._httpx is not None else "http1.1"
+
+    def _trace(self, event: str, info: Dict) -> None:
+        # httpcore reports a TCP connect only when no pooled connection could be reused
+        if event == "connection.connect_tcp.complete":
+            http_connections.inc(client=self.name)
+
+    def _timeout(self, timeout: float):
+        if self._httpx is not None:
+            import httpx
+            return httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        return (min(self.connect_timeout, timeout), timeout)
+
+    def post(self, url: str, json: Dict, timeout: float):
+        """POST a JSON body; returns a response with status_code, headers and json()."""
+        http_requests.inc(client=self.name, protocol=self.protocol)
+        if self._httpx is not None:
+            return self._httpx.post(url, json=json, timeout=self._timeout(timeout),
+                                    extensions={"trace": self._trace})
+        return self._session.post(url, json=json, timeout=self._timeout(timeout))
+
+    @contextmanager
+    def stream(self, url: str, json: Dict, timeout: float) -> Iterator[Tuple[object, Iterator[str]]]:
+        """POST a JSON body and stream the response: yields (response, decoded lines).
+
+        The connection goes back to the pool when the block exits.
+        """
+        http_requests.inc(client=self.name, protocol=self.protocol)
+        if self._httpx is not None:
+            with self._httpx.stream("POST", url, json=json, timeout=self._timeout(timeout),
+                                    extensions={"trace": self._trace}) as response:
+                if response.status_code != 200 or "text/event-stream" not in response.headers.get("content-type", ""):
+                    response.read()
+                yield response, response.iter_lines()
+            return
+        with self._session.post(url, json=json, timeout=self._timeout(timeout), stream=True) as response:
+            yield response, response.iter_lines(decode_unicode=True)
+
+    def stats(self) -> Dict:
+        requests_made = http_requests.value(client=self.name, protocol=self.protocol)
+        opened = http_connections.value(client=self.name)
+        return {
+            "protocol": self.protocol,
+            "requests": int(requests_made),
+            "connections_opened": int(opened),
+            "reuse_ratio": round(1 - opened / requests_made, 3) if requests_made else None
+        }
+
+    def close(self) -> None:
+        if self._httpx is not None:
+            self._httpx.close()
+        else:
+            self._session.close()
@@ -0,0 +1,342 @@
+# backend/app/services/indexer.py
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional
+from ..config import settings
+from .course_catalog import CATALOG_FILE, CourseCatalog
+from .document_processor import DocumentProcessor, content_hash
+from .vector_store import VectorStore
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single-worker only
+    fcntl = None
+
+if TYPE_CHECKING:
+    from langchain.schema import Document  # langchain is imported lazily, on first use
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "index_manifest.json"
+
+
+def chunk_ids(rel_path: str, chunks: List[Document]) -> List[str]:
+    """Stable IDs derived from each chunk's content, so unchanged chunks keep their ID across edits.
+
+    Identical chunks within one file get an occurrence suffix to stay unique.
+    """
+    ids = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        digest = content_hash(f"{rel_path}\0{chunk.page_content}")[:32]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(f"{digest}-{occurrence}")
+    return ids
+
+
+class IndexGeneration:
+    """The generation of the index in a Chroma directory, as recorded in its manifest.
+
+    Every sync that changes the index gives it a new generation, whichever process ran
+    it (a server worker or rebuild_vector_store.py). current() only re-reads the manifest
+    when the file changed, so checking it per request costs one stat(). None means there
+    is no manifest (no index yet, or the directory was wiped).
+    """
+
+    def __init__(self, chroma_dir: str):
+        self.path = os.path.join(chroma_dir, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._generation: Optional[str] = None
+
+    def current(self) -> Optional[str]:
+        try:
+            info = os.stat(self.path)
+            stamp = (info.st_mtime_ns, info.st_size, info.st_ino)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp != self._stamp:
+                self._stamp = stamp
+                self._generation = self._read() if stamp else None
+            return self._generation
+
+    def _read(self) -> Optional[str]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("generation")
+        except Exception as e:
+            logger.warning(f"Could not read the index generation: {e}")
+            return None
+
+
+class IndexProgress:
+    """Live state of an index sync, reported by /health while it runs in the background.
+
+    phase: pending → scanning → embedding → ready, or failed.
+    """
+
+    def __init__(self):
+        self.phase = "pending"
+        self.files_total = 0
+        self.files_scanned = 0
+        self.chunks_to_embed = 0
+        self.chunks_embedded = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == "ready"
+
+    def start(self) -> None:
+        self.phase = "scanning"
+        self.started_at = time.time()
+
+    def embedded(self, written: int, total: int) -> None:
+        self.chunks_embedded = written
+
+    def finish(self, error: Optional[str] = None) -> None:
+        self.phase = "failed" if error else "ready"
+        self.error = error
+        self.finished_at = time.time()
+
+    def snapshot(self) -> Dict:
+        percent = 100.0 if self.ready else 0.0
+        if self.phase == "embedding" and self.chunks_to_embed:
+            percent = 100 * self.chunks_embedded / self.chunks_to_embed
+        end = self.finished_at or time.time()
+        return {
+            "phase": self.phase,
+            "percent": round(percent, 1),
+            "files_scanned": self.files_scanned,
+            "files_total": self.files_total,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_to_embed": self.chunks_to_embed,
+            "elapsed_seconds": round(end - self.started_at, 1) if self.started_at else None,
+            "error": self.error
+        }
+
+
+class IncrementalIndexer:
+    """Keeps the vector store in sync with MARKDOWN_DIR using a manifest of file and chunk hashes.
+
+    Only new or changed chunks are embedded; chunks of edited or deleted files that no
+    longer exist are removed. The manifest lives next to the Chroma files so wiping
+    CHROMA_DIR also resets it, and so does the course catalog, whose entries are
+    refreshed for the same changed and removed files.
+    """
+
+    def __init__(self, vector_store: VectorStore, processor: DocumentProcessor,
+                 catalog: Optional[CourseCatalog] = None):
+        self.vector_store = vector_store
+        self.processor = processor
+        if catalog is None and settings.COURSE_CATALOG_ENABLED:
+            catalog = CourseCatalog(os.path.join(vector_store.chroma_dir, CATALOG_FILE))
+        self.catalog = catalog
+        self.manifest_path = os.path.join(vector_store.chroma_dir, MANIFEST_FILE)
+        self.lock_path = os.path.join(vector_store.chroma_dir, "index_manifest.lock")
+
+    def load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index manifest: {e}")
+        return self._empty_manifest()
+
+    def _empty_manifest(self) -> Dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "embedding_model": self.vector_store.embedding_model_name,
+            "chunker": self.processor.chunker.signature,
+            "files": {}
+        }
+
+    def save_manifest(self, manifest: Dict) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize syncs across uvicorn workers sharing one CHROMA_DIR."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def sync(self, full: bool = False, progress: Optional[IndexProgress] = None,
+             workers: Optional[int] = None) -> Dict:
+        """Bring the vector store up to date with the markdown directory.
+
+        Args:
+            full: Ignore the manifest and re-embed every chunk
+            progress: Updated as files are scanned and chunks embedded
+            workers: Processes reading and chunking files (default settings.INDEX_WORKERS)
+
+        Returns:
+            Dict with counts of scanned/changed/removed files and added/deleted chunks
+        """
+        start = time.perf_counter()
+        progress = progress or IndexProgress()
+        with self._locked():
+            manifest = self.load_manifest()
+            generation = manifest.get("generation")
+            stored_count = self.vector_store.get_document_count()
+
+            reset_reason = None
+            if full:
+                reset_reason = "full rebuild requested"
+            elif manifest["embedding_model"] != self.vector_store.embedding_model_name:
+                reset_reason = f"embedding model changed ({manifest['embedding_model']} → {self.vector_store.embedding_model_name})"
+            elif manifest.get("chunker") != self.processor.chunker.signature:
+                reset_reason = f"chunking changed ({manifest.get('chunker')} → {self.processor.chunker.signature})"
+            elif not manifest["files"] and stored_count:
+                reset_reason = "existing index has no manifest"
+            elif manifest["files"] and not stored_count:
+                reset_reason = "vector store is empty"
+
+            if reset_reason:
+                logger.info(f"Re-indexing from scratch: {reset_reason}")
+                if stored_count and not self.vector_store.delete_all():
+                    raise RuntimeError("could not clear the vector store before re-indexing")
+                manifest = self._empty_manifest()
+
+            old_files = manifest["files"]
+            new_files: Dict[str, Dict] = {}
+            to_add: List[Document] = []
+            add_ids: List[str] = []
+            to_delete: List[str] = []
+            changed_files = 0
+
+            progress.files_total = sum(1 for _ in self.processor.iter_markdown_files())
+            known_hashes = {rel_path: entry["hash"] for rel_path, entry in old_files.items()}
+            if self.catalog is not None:
+                # Another worker may have synced since this one loaded the catalog
+                self.catalog.load()
+                # Re-read files the catalog is missing (it is new, or older than the manifest);
+                # their chunks keep their IDs, so nothing is re-embedded
+                known_hashes = {rel_path: file_hash for rel_path, file_hash in known_hashes.items()
+                                if self.catalog.file_hash(rel_path) == file_hash}
+            workers = workers or settings.INDEX_WORKERS
+            scan_start = time.perf_counter()
+            for result in self.processor.iter_processed(known_hashes, workers):
+                progress.files_scanned += 1
+                rel_path = result["rel_path"]
+                previous = old_files.get(rel_path)
+                if result["error"]:
+                    logger.error(f"Error reading {result['file_path']}: {result['error']}")
+                    # Keep the previous chunks rather than dropping the file on a transient error
+                    if previous:
+                        new_files[rel_path] = previous
+                    continue
+                if result["chunks"] is None:
+                    new_files[rel_path] = previous
+                    continue
+
+                if self.catalog is not None:
+                    self.catalog.update_file(rel_path, result["hash"], result["catalog"])
+                if previous and previous["hash"] == result["hash"]:
+                    new_files[rel_path] = previous
+                    continue
+
+                changed_files += 1
+                chunks = result["chunks"]
+                ids = chunk_ids(rel_path, chunks)
+                old_ids = set(previous["chunks"]) if previous else set()
+
+                for chunk, chunk_id in zip(chunks, ids):
+                    if chunk_id not in old_ids:
+                        chunk.metadata["chunk_id"] = chunk_id
+                        to_add.append(chunk)
+                        add_ids.append(chunk_id)
+                to_delete.extend(old_ids - set(ids))
+                new_files[rel_path] = {"hash": result["hash"], "chunks": ids}
+                logger.info(f"Changed: {rel_path} ({len(chunks)} chunks)")
+
+            scan_seconds = time.perf_counter() - scan_start
+            removed_files = [rel_path for rel_path in old_files if rel_path not in new_files]
+            for rel_path in removed_files:
+                to_delete.extend(old_files[rel_path]["chunks"])
+                logger.info(f"Removed: {rel_path}")
+
+            # Chunks a previous sync failed to delete are retried, unless a file has them again
+            live_ids = {chunk_id for entry in new_files.values() for chunk_id in entry["chunks"]}
+            to_delete.extend(chunk_id for chunk_id in manifest.get("pending_deletes", [])
+                             if chunk_id not in live_ids)
+            # Keep failed deletes in the manifest so they are not orphaned in Chroma
+            pending_deletes = [] if self.vector_store.delete_documents(to_delete) else to_delete
+            ingest_stats = None
+            if to_add:
+                progress.phase = "embedding"
+                progress.chunks_to_embed = len(to_add)
+                total_chunks = sum(len(entry["chunks"]) for entry in new_files.values())
+                # Cold build: make everything keyword-searchable now instead of after minutes of embedding
+                keyword_only = settings.DEGRADED_KEYWORD_SEARCH and len(to_add) * 2 > total_chunks
+                if keyword_only:
+                    self.vector_store.keyword_index.add(
+                        add_ids, [chunk.page_content for chunk in to_add], [chunk.metadata for chunk in to_add]
+                    )
+                    self.vector_store.keyword_only = True
+                try:
+                    ingest_stats = self.vector_store.add_documents_with_ids(to_add, add_ids, progress.embedded)
+                except Exception:
+                    if keyword_only:
+                        # Back to what Chroma actually holds
+                        self.vector_store.load_search_indexes()
+                    raise
+                finally:
+                    self.vector_store.keyword_only = False
+
+            # A new generation tells running servers that cached answers may be stale
+            if reset_reason or to_add or len(to_delete) > len(pending_deletes) or generation is None:
+                generation = uuid.uuid4().hex
+            manifest["generation"] = generation
+            manifest["files"] = new_files
+            manifest["pending_deletes"] = pending_deletes
+            manifest["embedding_model"] = self.vector_store.embedding_model_name
+            manifest["chunker"] = self.processor.chunker.signature
+            self.save_manifest(manifest)
+
+            if self.catalog is not None:
+                for rel_path in [rel_path for rel_path in self.catalog.files if rel_path not in new_files]:
+                    self.catalog.remove_file(rel_path)
+                self.catalog.save()
+                self.catalog.rebuild()
+
+        stats = {
+            "files_scanned": len(new_files),
+            "files_changed": changed_files,
+            "files_removed": len(removed_files),
+            "chunks_added": len(to_add),
+            "chunks_deleted": len(to_delete) - len(pending_deletes),
+            "total_chunks": sum(len(entry["chunks"]) for entry in new_files.values()),
+            "chunks_per_second": ingest_stats["chunks_per_second"] if ingest_stats else None,
+            "files_per_second": round(progress.files_scanned / scan_seconds, 1) if scan_seconds else None,
+            "catalog_courses": len(self.catalog) if self.catalog is not None else None,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+        logger.info(f"Index sync: {stats}")
+        return stats
@@ -0,0 +1,110 @@
+# backend/app/services/ingestion.py
+
+from __future__ import annotations
+
+import random
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+import logging
+
+if TYPE_CHECKING:
+    from langchain.schema import Document  # langchain is imported lazily, on first use
+
+logger = logging.getLogger(__name__)
+
+# Texts per embedding request for each backend. Gemini's batch endpoint accepts up
+# to 100 texts; the local MiniLM model vectorizes well at 64 on CPU.
+BATCH_SIZE_DEFAULTS = {
+    "gemini": 100,
+    "huggingface": 64,
+}
+DEFAULT_BATCH_SIZE = 32
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Recognize 429 / quota errors from the Gemini and HF clients (they don't share an exception type)."""
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "resource exhausted" in message or "rate limit" in message
+
+
+def embed_with_retry(embed: Callable[[List[str]], List[List[float]]], texts: List[str],
+                     max_retries: int, backoff_seconds: float) -> List[List[float]]:
+    """Embed one batch, retrying rate-limit errors with exponential backoff and jitter."""
+    for attempt in range(max_retries + 1):
+        try:
+            return embed(texts)
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit_error(e):
+                raise
+            delay = backoff_seconds * (2 ** attempt) * (1 + random.random())
+            logger.warning(f"Embedding rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+def ingest_documents(embed: Callable[[List[str]], List[List[float]]],
+                     write: Callable[[List[str], List[List[float]], List[Document]], None],
+                     documents: Sequence[Document],
+                     ids: Optional[Sequence[str]] = None,
+                     batch_size: int = DEFAULT_BATCH_SIZE,
+                     workers: int = 4,
+                     max_retries: int = 5,
+                     backoff_seconds: float = 1.0,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Embed documents in batches on a bounded pool and write each batch as soon as it is ready.
+
+    At most 2 * workers batches are in flight, so memory stays bounded, and writes of
+    finished batches overlap with embedding of the next ones. Writes happen on the
+    calling thread, so the store never sees concurrent writers. progress, if given, is
+    called with (chunks written, total chunks) after every write.
+
+    Returns:
+        Dict with chunk/batch counts, elapsed seconds and chunks_per_second
+    """
+    start = time.perf_counter()
+    ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+    batches = [
+        (list(documents[i:i + batch_size]), ids[i:i + batch_size])
+        for i in range(0, len(documents), batch_size)
+    ]
+    remaining = iter(batches)
+    written = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="embed") as pool:
+        pending = {}
+
+        def submit_next() -> None:
+            batch = next(remaining, None)
+            if batch is not None:
+                texts = [doc.page_content for doc in batch[0]]
+                pending[pool.submit(embed_with_retry, embed, texts, max_retries, backoff_seconds)] = batch
+
+        for _ in range(max(1, workers) * 2):
+            submit_next()
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_docs, batch_ids = pending.pop(future)
+                    write(batch_ids, future.result(), batch_docs)
+                    written += len(batch_docs)
+                    if progress is not None:
+                        progress(written, len(documents))
+                    submit_next()
+                    logger.info(f"Embedded {written}/{len(documents)} chunks")
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+
+    elapsed = time.perf_counter() - start
+    return {
+        "chunks": written,
+        "batches": len(batches),
+        "batch_size": batch_size,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(written / elapsed, 1) if elapsed > 0 else None
+    }
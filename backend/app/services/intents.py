@@ -0,0 +1,154 @@
+# backend/app/services/intents.py
+
+import re
+from typing import FrozenSet, Optional, Sequence, Tuple
+
+# Keywords the fallback answers key on, matched as whole words anywhere in the query
+_TERMS = {
+    "ossu": r"ossu|open source society",
+    "asks_what": r"what|about",
+    "core_cs": r"core cs|core curriculum",
+    "languages": r"programming languages?",
+    "duration": r"how long|duration",
+}
+
+# One plain alternation, scanned only when a fallback asks for topics
+_TERM_RE = re.compile(r"\b(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _TERMS.items()) + r")\b")
+
+# Whole questions with a fixed answer, served before retrieval and the LLM
+_CANNED = {
+    "about_ossu": [f"{ask} {article}{name}"
+                   for ask in ("what is", "what's", "whats", "what are", "tell me about", "explain")
+                   for article in ("", "the ")
+                   for name in ("ossu", "open source society university")],
+    "greeting": [f"{hello}{there}"
+                 for hello in ("hi", "hello", "hey", "good morning", "good afternoon", "good evening")
+                 for there in ("", " there")],
+    "help": ["help", "what can you do", "what can i ask", "what can i ask you", "what do you know"],
+}
+
+
+def _normalize(query: str) -> str:
+    """Lower-case and drop surrounding whitespace and trailing punctuation, without a regex."""
+    return query.lower().strip(" ?!.\t\n")
+
+
+# Normalized question → canned intent: deciding a canned answer is one dict lookup
+_CANNED_QUERIES = {_normalize(question): name for name, questions in _CANNED.items() for question in questions}
+
+HELP_TOPICS = """Here are some topics I can help you with:
+• Information about the OSSU curriculum structure
+• Programming languages used in the courses
+• Course prerequisites and difficulty levels
+• Time commitment and duration estimates
+• Specific course recommendations
+
+Please feel free to ask about any of these topics!"""
+
+ANSWERS = {
+    "about_ossu": """OSSU (Open Source Society University) is a complete, self-taught education in Computer Science using free online materials.
+
+It's designed to mirror the curriculum of an undergraduate CS degree and includes:
+- Rigorous coursework from MIT, Harvard, Princeton, and other top universities
+- Projects and assignments to build practical skills
+- A supportive community of learners
+- No tuition fees - completely free
+
+The curriculum covers everything from programming basics to advanced topics like machine learning and distributed systems.""",
+
+    "core_cs": """The Core CS curriculum consists of the following courses:
+
+**Core Programming** (3 courses):
+• How to Code: Simple Data
+• How to Code: Complex Data
+• Programming Languages (Parts A, B, C)
+
+**Core Math** (3 courses):
+• Mathematics for Computer Science
+• Linear Algebra
+• Calculus
+
+**Core Systems** (3 courses):
+• Build a Modern Computer (Nand2Tetris)
+• Operating Systems: Three Easy Pieces
+• Computer Networking
+
+**Core Theory** (3 courses):
+• Algorithms and Data Structures
+• Computability and Complexity
+• Computer Science Theory
+
+**Core Security** (2 courses):
+• Information Security
+• Cryptography I
+
+**Core Applications** (4 courses):
+• Databases
+• Machine Learning
+• Computer Graphics
+• Software Engineering""",
+
+    "languages": """The OSSU curriculum teaches various programming languages:
+
+**Introductory**: Python, Scheme/Racket  
+**Systems**: C, Assembly  
+**Object-Oriented**: Java, C++  
+**Functional**: Haskell, ML/OCaml  
+**Web**: JavaScript, HTML/CSS  
+**Databases**: SQL
+
+Each language is chosen to teach specific programming paradigms and concepts.""",
+
+    "duration": """The OSSU Computer Science curriculum typically takes 2-4 years to complete, depending on your pace:
+
+• **Part-time (10-20 hours/week)**: 4-6 years
+• **Half-time (20-30 hours/week)**: 2-3 years
+• **Full-time (40+ hours/week)**: 1.5-2 years
+
+The curriculum includes approximately 2000 hours of study, similar to a traditional CS degree.""",
+
+    "greeting": "Hi! I answer questions about the OSSU computer science curriculum.\n\n" + HELP_TOPICS,
+
+    "help": HELP_TOPICS,
+}
+
+
+# What a query asks about, from classify(): (normalized query, name of its canned answer or None).
+# Computed once per request and handed to every stage (canned answers, the fallback answers
+# of AIService and ChatService) instead of each re-scanning the text. A plain tuple, so
+# classifying costs no more than the keyword chains it replaced; the keyword scan only
+# runs when a fallback asks for topics.
+QueryIntent = Tuple[str, Optional[str]]
+
+
+def classify(query: str) -> QueryIntent:
+    text = _normalize(query)
+    return text, _CANNED_QUERIES.get(text)
+
+
+def canned_answer(intent: QueryIntent) -> Optional[str]:
+    """The fixed answer to a canned question, or None."""
+    return ANSWERS[intent[1]] if intent[1] else None
+
+
+def query_terms(intent: QueryIntent) -> FrozenSet[str]:
+    """The keyword terms in the query."""
+    return frozenset(match.lastgroup for match in _TERM_RE.finditer(intent[0]))
+
+
+def first_topic(intent: QueryIntent, topics: Sequence[str]) -> Optional[str]:
+    """The first of topics the query's keywords point at, or None."""
+    terms = query_terms(intent)
+    for topic in topics:
+        if topic == "about_ossu":
+            if "ossu" in terms and "asks_what" in terms:
+                return topic
+        elif topic in terms:
+            return topic
+    return None
+
+
+def topic_answer(intent: QueryIntent, topics: Sequence[str]) -> Optional[str]:
+    """The answer for the first of topics the query's keywords match, or None."""
+    topic = first_topic(intent, topics)
+    return ANSWERS[topic] if topic else None
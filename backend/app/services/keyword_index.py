@@ -0,0 +1,103 @@
+# backend/app/services/keyword_index.py
+
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .text_utils import tokenize
+
+
+class BM25Index:
+    """In-memory inverted index scored with Okapi BM25.
+
+    Postings map each term to {chunk id: term frequency}, so adding or removing a
+    chunk only touches that chunk's terms; corpus statistics (document count, average
+    length) are kept as running totals. The chunk text and metadata are kept alongside
+    so keyword hits can be returned without a round trip to Chroma.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Tuple[str, Dict]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[Dict]] = None) -> None:
+        """Index chunks; re-adding an existing ID replaces it."""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove(doc_id)
+                terms = Counter(tokenize(text))
+                for term, count in terms.items():
+                    self._postings[term][doc_id] = count
+                length = sum(terms.values())
+                self._doc_terms[doc_id] = terms
+                self._doc_lengths[doc_id] = length
+                self._documents[doc_id] = (text, metadata or {})
+                self._total_length += length
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        del self._documents[doc_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._documents.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, BM25 score) pairs for the query, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._doc_lengths)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / average_length
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def get(self, doc_id: str) -> Optional[Tuple[str, Dict]]:
+        """(text, metadata) of an indexed chunk."""
+        return self._documents.get(doc_id)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[str]:
+    """Merge ranked ID lists: each ID scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
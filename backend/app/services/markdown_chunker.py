@@ -0,0 +1,251 @@
+# backend/app/services/markdown_chunker.py
+
+import re
+from typing import Dict, List, Optional, Tuple
+from .conversation import estimate_tokens
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+_TABLE_DELIMITER_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?\s*$")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n")
+
+HEADING_SEPARATOR = " > "
+
+
+class Block:
+    """A unit the chunker never splits unless it alone exceeds the chunk size: a heading,
+    a paragraph or list, a table or a fenced code block."""
+
+    __slots__ = ("kind", "text", "level", "title")
+
+    def __init__(self, kind: str, text: str, level: int = 0, title: str = ""):
+        self.kind = kind
+        self.text = text
+        self.level = level
+        self.title = title
+
+
+def heading_title(text: str) -> str:
+    """Heading text without link targets, emphasis or code markers."""
+    return _LINK_RE.sub(r"\1", text).replace("*", "").replace("`", "").strip()
+
+
+def parse_blocks(text: str) -> List[Block]:
+    """Split markdown into headings, paragraphs/lists, tables and fenced code blocks."""
+    lines = text.split("\n")
+    blocks: List[Block] = []
+    paragraph: List[str] = []
+
+    def flush():
+        if paragraph:
+            blocks.append(Block("text", "\n".join(paragraph)))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE_RE.match(line)
+        if fence:
+            flush()
+            marker = fence.group(1)
+            end = i + 1
+            while end < len(lines) and not lines[end].strip().startswith(marker):
+                end += 1
+            blocks.append(Block("code", "\n".join(lines[i:end + 1])))
+            i = end + 1
+            continue
+        heading = _HEADING_RE.match(line)
+        if heading:
+            flush()
+            blocks.append(Block("heading", line.strip(), len(heading.group(1)), heading_title(heading.group(2))))
+        elif "|" in line and i + 1 < len(lines) and _TABLE_DELIMITER_RE.match(lines[i + 1]):
+            flush()
+            end = i + 2
+            while end < len(lines) and "|" in lines[end] and lines[end].strip():
+                end += 1
+            blocks.append(Block("table", "\n".join(lines[i:end])))
+            i = end
+            continue
+        elif not line.strip():
+            flush()
+        else:
+            paragraph.append(line)
+        i += 1
+    flush()
+    return blocks
+
+
+def parse_sections(text: str) -> List[Tuple[List[str], List[Block]]]:
+    """Group blocks under their heading; each section is (heading path, blocks starting with its heading)."""
+    sections: List[Tuple[List[str], List[Block]]] = []
+    stack: List[Tuple[int, str]] = []
+    current: List[Block] = []
+    path: List[str] = []
+    for block in parse_blocks(text):
+        if block.kind == "heading":
+            if current:
+                sections.append((path, current))
+            while stack and stack[-1][0] >= block.level:
+                stack.pop()
+            stack.append((block.level, block.title))
+            path = [title for _, title in stack]
+            current = [block]
+        else:
+            current.append(block)
+    if current:
+        sections.append((path, current))
+    return sections
+
+
+class MarkdownChunker:
+    """Splits markdown along its heading hierarchy into chunks of at most chunk_size tokens.
+
+    Sections small enough are merged with their following siblings and subsections;
+    larger ones are split between paragraphs, lists, tables and code blocks. Tables are
+    split between rows with the header repeated, code blocks between lines with the
+    fence reopened, so no fragment loses its structure. Chunks that continue a section
+    start with its heading path, and consecutive chunks of one section share up to
+    chunk_overlap tokens of prose.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @property
+    def signature(self) -> str:
+        """Identifies the chunking so an index built with other settings can be detected."""
+        return f"markdown:{self.chunk_size}:{self.chunk_overlap}"
+
+    def split(self, text: str) -> List[Tuple[str, List[str]]]:
+        """Return (chunk text, heading path) pairs in document order."""
+        chunks: List[Tuple[str, List[str]]] = []
+        merged: List[str] = []
+        merged_paths: List[List[str]] = []
+
+        def flush():
+            if merged:
+                chunks.append(("\n\n".join(merged), _common_prefix(merged_paths)))
+                merged.clear()
+                merged_paths.clear()
+
+        for path, blocks in parse_sections(text):
+            body = "\n\n".join(block.text for block in blocks)
+            if estimate_tokens(body) > self.chunk_size:
+                flush()
+                chunks.extend((piece, path) for piece in self._split_section(path, blocks))
+                continue
+            # Siblings and subsections of the first merged section share a chunk while they fit
+            parent = merged_paths[0][:-1] if merged else []
+            if merged and (estimate_tokens("\n\n".join(merged + [body])) > self.chunk_size
+                           or path[:len(parent)] != parent):
+                flush()
+            merged.append(body)
+            merged_paths.append(path)
+        flush()
+        return [(text, path) for text, path in chunks if text.strip()]
+
+    def _split_section(self, path: List[str], blocks: List[Block]) -> List[str]:
+        prefix = HEADING_SEPARATOR.join(path)
+        budget = self.chunk_size - estimate_tokens(prefix) - 1
+        pieces: List[Tuple[str, str]] = []
+        for block in blocks:
+            if estimate_tokens(block.text) <= budget:
+                pieces.append((block.kind, block.text))
+            elif block.kind == "table":
+                pieces.extend(("table", piece) for piece in self._split_table(block.text, budget))
+            elif block.kind == "code":
+                pieces.extend(("code", piece) for piece in self._split_code(block.text, budget))
+            else:
+                pieces.extend(("text", piece) for piece in self._split_text(block.text, budget))
+
+        chunks: List[str] = []
+        current: List[str] = []
+        last_kind = "text"
+        for kind, piece in pieces:
+            if current and estimate_tokens("\n\n".join(current + [piece])) > budget:
+                chunks.append("\n\n".join(current))
+                overlap = self._overlap(current[-1], last_kind)
+                current = [overlap] if overlap and estimate_tokens(overlap + piece) <= budget else []
+            current.append(piece)
+            last_kind = kind
+        if current:
+            chunks.append("\n\n".join(current))
+
+        # Every chunk after the first repeats where it sits in the document
+        return chunks[:1] + [f"{prefix}\n{chunk}" if prefix else chunk for chunk in chunks[1:]]
+
+    def _overlap(self, text: str, kind: str) -> Optional[str]:
+        """The tail of a prose piece carried into the next chunk, cut at a line or word boundary."""
+        if kind != "text" or not self.chunk_overlap:
+            return None
+        tail = text[-self.chunk_overlap * 4:]
+        if len(tail) < len(text):
+            tail = tail.split("\n" if "\n" in tail else " ", 1)[-1]
+        return tail.strip() or None
+
+    def _split_table(self, text: str, budget: int) -> List[str]:
+        lines = text.split("\n")
+        header, rows = lines[:2], lines[2:]
+        groups = _pack(rows, budget - estimate_tokens("\n".join(header)), "\n")
+        return ["\n".join(header + group) for group in groups]
+
+    def _split_code(self, text: str, budget: int) -> List[str]:
+        lines = text.split("\n")
+        opening = lines[0]
+        has_closing = len(lines) > 1 and _FENCE_RE.match(lines[-1]) is not None
+        closing = lines[-1] if has_closing else opening.strip()[:3]
+        body = lines[1:-1] if has_closing else lines[1:]
+        groups = _pack(body, budget - estimate_tokens(opening + closing) - 1, "\n")
+        return ["\n".join([opening] + group + [closing]) for group in groups]
+
+    def _split_text(self, text: str, budget: int) -> List[str]:
+        sentences: List[str] = []
+        for sentence in _SENTENCE_RE.split(text):
+            if estimate_tokens(sentence) <= budget:
+                sentences.append(sentence)
+            else:
+                sentences.extend(" ".join(words) for words in _pack(sentence.split(" "), budget, " "))
+        return [" ".join(group) for group in _pack(sentences, budget, " ")]
+
+
+def _pack(items: List[str], budget: int, joiner: str) -> List[List[str]]:
+    """Greedily group items so each group joined by joiner stays within budget tokens.
+
+    An item larger than the budget gets a group of its own rather than being cut.
+    """
+    max_chars = budget * 4  # estimate_tokens' characters per token
+    groups: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for item in items:
+        item_size = len(item) + (len(joiner) if current else 0)
+        if current and size + item_size > max_chars:
+            groups.append(current)
+            current, size, item_size = [], 0, len(item)
+        current.append(item)
+        size += item_size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix = paths[0]
+    for path in paths[1:]:
+        length = 0
+        while length < min(len(prefix), len(path)) and prefix[length] == path[length]:
+            length += 1
+        prefix = prefix[:length]
+    return prefix
+
+
+def heading_metadata(path: List[str]) -> Dict[str, str]:
+    """Chunk metadata for a heading path (Chroma metadata values must be scalars)."""
+    return {
+        "heading_path": HEADING_SEPARATOR.join(path),
+        "section": path[-1] if path else ""
+    }
@@ -0,0 +1,134 @@
+# backend/app/services/numpy_index.py
+
+import json
+import os
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorIndex:
+    """Exact nearest-neighbour search over a contiguous float32 matrix of unit-length embeddings.
+
+    Top-k is one matrix-vector product plus argpartition, which for a few thousand chunks
+    is far cheaper than a round trip through Chroma. The matrix is saved as a .npy file
+    next to the Chroma data and memory-mapped on load, so startup doesn't re-read or
+    re-embed anything. Writes build a new matrix and swap it in, so searches running on
+    other threads always see a consistent (ids, matrix) pair.
+    """
+
+    def __init__(self, path: str):
+        self.matrix_path = f"{path}.npy"
+        self.ids_path = f"{path}.ids.json"
+        # (ids, matrix) swapped as one tuple so readers never see a half-applied write
+        self._state: Tuple[List[str], np.ndarray] = ([], np.zeros((0, 0), dtype=np.float32))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._state[0])
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Add or replace vectors by ID."""
+        if not len(ids):
+            return
+        rows = self._normalize(vectors)
+        with self._lock:
+            current_ids, current = self._state
+            replaced = set(ids)
+            keep = [i for i, doc_id in enumerate(current_ids) if doc_id not in replaced]
+            if not keep or current.shape[1] != rows.shape[1]:
+                if keep:
+                    logger.warning("Embedding dimension changed; dropping existing vectors")
+                matrix, kept_ids = rows, []
+            else:
+                matrix = np.concatenate([current[keep], rows])
+                kept_ids = [current_ids[i] for i in keep]
+            self._state = (kept_ids + list(ids), np.ascontiguousarray(matrix))
+
+    def remove(self, ids: Sequence[str]) -> None:
+        removed = set(ids)
+        with self._lock:
+            current_ids, current = self._state
+            keep = [i for i, doc_id in enumerate(current_ids) if doc_id not in removed]
+            if len(keep) == len(current_ids):
+                return
+            self._state = ([current_ids[i] for i in keep], np.ascontiguousarray(current[keep]))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = ([], np.zeros((0, 0), dtype=np.float32))
+
+    def search(self, vector: Sequence[float], k: int = 4) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) pairs, best first."""
+        ids, matrix = self._state
+        if not ids:
+            return []
+        query = self._normalize(vector)[0]
+        if query.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Query has {query.shape[0]} dimensions, index has {matrix.shape[1]}")
+        scores = matrix @ query
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    def vectors(self, ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Stored (unit-length) vectors by ID; unknown IDs are left out."""
+        current_ids, matrix = self._state
+        position = {doc_id: i for i, doc_id in enumerate(current_ids)}
+        return {doc_id: matrix[position[doc_id]] for doc_id in ids if doc_id in position}
+
+    def save(self) -> None:
+        """Write the matrix and IDs atomically (readers holding the old memory map are unaffected)."""
+        ids, matrix = self._state
+        tmp_matrix = f"{self.matrix_path}.tmp.npy"
+        np.save(tmp_matrix, matrix)
+        tmp_ids = f"{self.ids_path}.tmp"
+        with open(tmp_ids, 'w', encoding='utf-8') as f:
+            json.dump(ids, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_ids, self.ids_path)
+
+    def load(self) -> bool:
+        """Memory-map a previously saved index; returns False if there is none or it is unreadable."""
+        try:
+            with open(self.ids_path, 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vector index: {e}")
+            return False
+        if matrix.shape[0] != len(ids) or matrix.dtype != np.float32:
+            logger.warning("Vector index files are inconsistent; rebuilding")
+            return False
+        with self._lock:
+            self._state = (ids, matrix)
+        return True
+
+    def stats(self) -> Dict:
+        ids, matrix = self._state
+        return {
+            "vectors": len(ids),
+            "dimensions": matrix.shape[1] if matrix.ndim == 2 else 0,
+            "memory_mapped": isinstance(matrix, np.memmap),
+            "bytes": int(matrix.nbytes)
+        }
@@ -0,0 +1,271 @@
+# backend/app/services/provider_routing.py
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from ..config import settings
+from ..metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+provider_requests = metrics.counter(
+    "llm_provider_requests_total",
+    "LLM provider attempts by provider and outcome (success, error, rate_limited, unavailable, timeout, skipped)"
+)
+
+provider_attempt_latency = metrics.histogram(
+    "llm_provider_attempt_seconds",
+    "Duration of each LLM provider attempt by provider and outcome (success, error, rate_limited = 429, "
+    "unavailable = 503, timeout)"
+)
+
+hedged_requests = metrics.counter(
+    "llm_hedged_requests_total",
+    "Hedged provider requests: fired, denied by the budget, and won (the hedge answered first)"
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Failures that open a circuit at once: retrying a rate-limited or loading model only adds latency
+TRIPPING_OUTCOMES = ("rate_limited", "unavailable")
+
+# Successful latencies kept per provider for percentile estimates
+LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 10
+
+
+class ProviderError(Exception):
+    """A provider attempt that failed, classified for the circuit breaker."""
+
+    def __init__(self, message: str, outcome: str = "error"):
+        super().__init__(message)
+        self.outcome = outcome
+
+
+class Deadline:
+    """Overall time budget for one answer, shared by every provider attempt."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next attempt: the per-attempt cap or whatever is left, whichever is smaller."""
+        return min(cap, self.remaining())
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker with live latency and error-rate statistics.
+
+    closed: requests flow; the breaker opens after `failure_threshold` consecutive
+        failures, when the error rate over the last `window` attempts reaches
+        `error_rate_threshold`, or immediately on a tripping failure (429 rate
+        limit, 503 model unavailable).
+    open: requests are skipped for `open_seconds`, doubling on every failed probe
+        up to `max_open_seconds`.
+    half_open: a single probe request is let through; success closes the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, error_rate_threshold: float = 0.5,
+                 window: int = 20, open_seconds: float = 30.0, max_open_seconds: float = 300.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self.state = CLOSED
+        self.open_seconds = open_seconds
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=window)
+        self.latency_ewma: Optional[float] = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit {self.name}: half-open, sending probe")
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.latencies.append(latency)
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            if self.state != CLOSED:
+                # Start the statistics afresh so the recovered provider can win its place back
+                logger.info(f"Circuit {self.name}: closed after successful probe")
+                self.outcomes.clear()
+                self.outcomes.append(True)
+                self.latency_ewma = latency
+            self.state = CLOSED
+            self.open_seconds = self.base_open_seconds
+            self._probe_in_flight = False
+
+    def record_failure(self, latency: float, trip: bool = False) -> None:
+        with self._lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            # Failures count toward latency too: a provider that times out is slow
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            if self.state == HALF_OPEN:
+                self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+                self._open()
+            elif self.state == CLOSED and (
+                trip
+                or self.consecutive_failures >= self.failure_threshold
+                or (len(self.outcomes) >= self.failure_threshold and self.error_rate >= self.error_rate_threshold)
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        logger.warning(f"Circuit {self.name}: open for {self.open_seconds:.0f}s")
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Latency of successful calls at quantile q, once enough have been seen."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def expected_seconds(self) -> Optional[float]:
+        """Expected time to a good answer: mean latency inflated by the chance of having to retry elsewhere."""
+        if self.latency_ewma is None:
+            return None
+        return self.latency_ewma / max(0.05, 1 - self.error_rate)
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "open_seconds": self.open_seconds if self.state != CLOSED else None
+        }
+
+
+class ProviderRouter:
+    """Orders LLM providers by live health instead of a fixed sequence.
+
+    Providers are listed in order of preference. Each gets a circuit breaker; open
+    circuits are skipped, and the rest are ranked by expected time to a good answer
+    plus `preference_seconds` per step down the preference list, so a faster but
+    lower-quality model only wins when the preferred one is clearly struggling.
+    A provider due for a half-open probe is ranked by preference alone, so it gets
+    probed even while a healthy fallback keeps answering.
+    """
+
+    def __init__(self, providers: List[str], preference_seconds: float = None):
+        self.providers = list(providers)
+        self.preference_seconds = (settings.PROVIDER_PREFERENCE_SECONDS
+                                   if preference_seconds is None else preference_seconds)
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                error_rate_threshold=settings.BREAKER_ERROR_RATE,
+                window=settings.BREAKER_WINDOW,
+                open_seconds=settings.BREAKER_OPEN_SECONDS,
+                max_open_seconds=settings.BREAKER_MAX_OPEN_SECONDS
+            )
+            for name in self.providers
+        }
+
+    def ranked(self) -> List[str]:
+        """Providers in the order they should be tried (does not reserve half-open probes)."""
+        def cost(item):
+            priority, name = item
+            breaker = self.breakers[name]
+            expected = (breaker.expected_seconds() or 0.0) if breaker.state == CLOSED else 0.0
+            return expected + priority * self.preference_seconds
+
+        return [name for _, name in sorted(enumerate(self.providers), key=cost)]
+
+    def acquire(self, name: str) -> bool:
+        """Whether to try this provider now; counts the skip if its circuit is open."""
+        allowed = self.breakers[name].allow_request()
+        if not allowed:
+            provider_requests.inc(provider=name, outcome="skipped")
+        return allowed
+
+    def record_success(self, name: str, latency: float) -> None:
+        self.breakers[name].record_success(latency)
+        provider_requests.inc(provider=name, outcome="success")
+        provider_attempt_latency.observe(latency, provider=name, outcome="success")
+
+    def record_failure(self, name: str, latency: float, outcome: str = "error") -> None:
+        self.breakers[name].record_failure(latency, trip=outcome in TRIPPING_OUTCOMES)
+        provider_requests.inc(provider=name, outcome=outcome)
+        provider_attempt_latency.observe(latency, provider=name, outcome=outcome)
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait on a provider before hedging with the next one: its HEDGE_PERCENTILE latency."""
+        delay = self.breakers[name].latency_percentile(settings.HEDGE_PERCENTILE)
+        if delay is None:
+            delay = settings.HEDGE_DELAY_SECONDS
+        return max(settings.HEDGE_MIN_DELAY_SECONDS, delay)
+
+    def snapshot(self) -> Dict:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+
+class HedgeBudget:
+    """Caps hedged requests at a fraction of answers, so hedging cannot multiply API spend.
+
+    Token bucket: every request deposits `ratio` tokens (up to `burst`) and
+    every hedge spends one, so over any stretch hedges <= burst + ratio * requests.
+    """
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def refund(self) -> None:
+        """Return a token spent on a hedge that could not be started."""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
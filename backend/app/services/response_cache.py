@@ -0,0 +1,164 @@
+# backend/app/services/response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from ..metrics import metrics
+from .text_utils import normalize_query
+
+cache_lookups = metrics.counter(
+    "response_cache_lookups_total",
+    "Answer cache lookups by result (exact_hit, semantic_hit, miss)"
+)
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated answers, looked up by normalized text or query-embedding similarity.
+
+    Entries hold the answer and the retrieved context it was generated from, so a hit
+    skips retrieval as well as generation. With a generation callable (the index
+    generation, see IndexGeneration), each entry records the generation it was stored
+    under and is dropped once the index has moved on, even when another process
+    re-indexed it.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None, similarity_threshold: float = None,
+                 generation: Optional[Callable[[], Optional[str]]] = None):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.RESPONSE_CACHE_TTL_SECONDS
+        self.similarity_threshold = similarity_threshold or settings.RESPONSE_CACHE_SIMILARITY
+        self._generation = generation or (lambda: None)
+        self._last_generation: Optional[str] = None
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stacked unit-length embeddings for semantic lookup, rebuilt lazily after writes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, query: str, embedding: Optional[List[float]] = None) -> Optional[Dict]:
+        """Return a cached entry for the query, or None.
+
+        Without an embedding only the exact normalized text is checked, so callers can
+        try the free lookup before paying for a query embedding.
+        """
+        key = normalize_query(query)
+        generation = self._generation()
+        with self._lock:
+            self._expire()
+            if generation != self._last_generation:
+                self._drop_stale(generation)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                cache_lookups.inc(result="exact_hit")
+                return entry
+
+            if embedding is not None:
+                match = self._nearest(embedding)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    cache_lookups.inc(result="semantic_hit")
+                    return self._entries[match]
+
+                # Only count a miss once both lookups failed
+                self.misses += 1
+                cache_lookups.inc(result="miss")
+        return None
+
+    def put(self, query: str, embedding: Optional[List[float]], response: str, context: List[Dict]) -> None:
+        """Store an answer and the context it was generated from."""
+        key = normalize_query(query)
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else None
+
+        generation = self._generation()
+        with self._lock:
+            if generation != self._last_generation:
+                self._drop_stale(generation)
+            self._entries[key] = {
+                "response": response,
+                "context": context,
+                "embedding": vector,
+                "created_at": time.time(),
+                "generation": generation
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after the markdown corpus was re-indexed."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations
+        }
+
+    def _expire(self) -> None:
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry["created_at"] < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _drop_stale(self, generation: Optional[str]) -> None:
+        """Drop the entries stored under another index generation."""
+        stale = [key for key, entry in self._entries.items() if entry["generation"] != generation]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+            self.invalidations += 1
+        self._last_generation = generation
+
+    def _nearest(self, embedding: List[float]) -> Optional[str]:
+        """Key of the most similar cached query above the threshold (cosine similarity)."""
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry["embedding"] is not None]
+            if self._matrix_keys:
+                self._matrix = np.stack([self._entries[key]["embedding"] for key in self._matrix_keys])
+        if self._matrix is None:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm or query.shape[0] != self._matrix.shape[1]:
+            return None
+        scores = self._matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.similarity_threshold:
+            return self._matrix_keys[best]
+        return None
@@ -0,0 +1,85 @@
+# backend/app/services/retrieval.py
+
+from typing import Callable, Iterable, List, Optional, Sequence, Set, TypeVar
+
+import numpy as np
+from .text_utils import tokenize
+
+T = TypeVar("T")
+
+
+def cosine_scores(query: Sequence[float], vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Cosine similarity of each vector to the query."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if not len(matrix):
+        return np.zeros(0, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    norms[norms == 0] = 1.0
+    return (matrix @ query) / norms
+
+
+def relevant_mask(scores: Sequence[Optional[float]], min_score: float, ratio: float) -> List[bool]:
+    """Which candidates score at least min_score and at least ratio × the best score.
+
+    A None score is exempt (strong keyword matches are kept whatever their embedding
+    says). The ratio is what makes k adaptive: a question with one clearly matching
+    chunk gets one chunk, a broad question whose top chunks score alike gets them all.
+    """
+    known = [score for score in scores if score is not None]
+    if not known:
+        return [True] * len(scores)
+    floor = max(min_score, max(known) * ratio)
+    return [score is None or score >= floor for score in scores]
+
+
+def remove_near_duplicates(items: Iterable[T], threshold: float,
+                           content: Callable[[T], str] = lambda item: item["content"],
+                           limit: Optional[int] = None) -> List[T]:
+    """Drop items whose words are mostly contained in a better-ranked one.
+
+    Containment (shared words / words of the smaller chunk) catches exact copies,
+    chunks that overlap a neighbour and a short chunk repeated inside a longer one.
+    With a limit, stops once that many items are kept.
+    """
+    kept: List[T] = []
+    kept_words: List[Set[str]] = []
+    for item in items:
+        if limit is not None and len(kept) >= limit:
+            break
+        words = set(tokenize(content(item)))
+        duplicate = any(
+            words and other and len(words & other) / min(len(words), len(other)) >= threshold
+            for other in kept_words
+        )
+        if not duplicate:
+            kept.append(item)
+            kept_words.append(words)
+    return kept
+
+
+def maximal_marginal_relevance(query: Sequence[float], vectors: Sequence[Sequence[float]], k: int,
+                               lambda_mult: float, relevance: Optional[Sequence[float]] = None) -> List[int]:
+    """Indexes of k vectors picked greedily for relevance to the query minus similarity to those already picked.
+
+    lambda_mult=1 is plain relevance order, lower values favour diversity.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if not len(matrix):
+        return []
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    relevance = np.asarray(relevance if relevance is not None else cosine_scores(query, matrix), dtype=np.float32)
+    similarity = matrix @ matrix.T
+
+    selected = [int(np.argmax(relevance))]
+    remaining = set(range(len(matrix))) - set(selected)
+    while remaining and len(selected) < k:
+        candidates = list(remaining)
+        redundancy = similarity[np.ix_(candidates, selected)].max(axis=1)
+        scores = lambda_mult * relevance[candidates] - (1 - lambda_mult) * redundancy
+        best = candidates[int(np.argmax(scores))]
+        selected.append(best)
+        remaining.remove(best)
+    return selected
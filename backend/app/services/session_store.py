@@ -0,0 +1,308 @@
+# backend/app/services/session_store.py
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from ..config import settings
+from ..concurrency import run_blocking
+from ..metrics import metrics
+from ..models import ChatMessage
+from .conversation import fold_into_summary
+import logging
+
+logger = logging.getLogger(__name__)
+
+session_count = metrics.gauge(
+    "session_store_sessions",
+    "Chat sessions held by the session store, by backend (refreshed on each /metrics scrape)"
+)
+
+session_bytes = metrics.gauge(
+    "session_store_bytes",
+    "Bytes of chat history held by the in-memory session store (refreshed on each /metrics scrape)"
+)
+
+
+def _message_size(message: ChatMessage) -> int:
+    return len(message.role) + len(message.content.encode("utf-8"))
+
+
+def _cap_message(message: ChatMessage, max_bytes: int) -> ChatMessage:
+    """Truncate a single message that would not fit in a session on its own."""
+    content = message.content.encode("utf-8")
+    limit = max(0, max_bytes - len(message.role))
+    if len(content) <= limit:
+        return message
+    return ChatMessage(role=message.role, content=content[:limit].decode("utf-8", errors="ignore"))
+
+
+def _drop_count(sizes: List[int], max_history: int, max_bytes: int) -> int:
+    """How many of the oldest messages to drop so the rest fit in max_history and max_bytes."""
+    drop = max(0, len(sizes) - max_history)
+    total = sum(sizes[drop:])
+    while drop < len(sizes) and total > max_bytes:
+        total -= sizes[drop]
+        drop += 1
+    return drop
+
+
+class SessionStore(ABC):
+    """Chat history per session, bounded in length, bytes and lifetime.
+
+    Every session keeps at most max_history messages and max_bytes of message text;
+    older messages are dropped first. Dropped messages are folded into a running
+    summary of at most summary_tokens, so earlier turns stay available to the prompt
+    without being resent verbatim. Sessions idle for longer than ttl_seconds expire.
+    """
+
+    def __init__(self, max_history: int, ttl_seconds: int, max_bytes: int, summary_tokens: int = 200):
+        self.max_history = max_history
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.summary_tokens = summary_tokens
+
+    @abstractmethod
+    def get_conversation(self, session_id: str) -> Tuple[str, List[ChatMessage]]:
+        """(summary of dropped messages, retained messages) for a session."""
+
+    def get_history(self, session_id: str) -> List[ChatMessage]:
+        return self.get_conversation(session_id)[1]
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        """Add messages to a session, dropping and summarizing the oldest beyond the limits."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget a session."""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Backend name and session counts for /health and /metrics."""
+
+    async def aget_conversation(self, session_id: str) -> Tuple[str, List[ChatMessage]]:
+        return await run_blocking(self.get_conversation, session_id)
+
+    async def aappend(self, session_id: str, messages: List[ChatMessage]) -> None:
+        await run_blocking(self.append, session_id, messages)
+
+    async def adelete(self, session_id: str) -> None:
+        await run_blocking(self.delete, session_id)
+
+
+class InMemorySessionStore(SessionStore):
+    """LRU + TTL session store for a single worker.
+
+    When max_sessions is reached the least recently used session is evicted.
+    """
+
+    def __init__(self, max_sessions: int, max_history: int, ttl_seconds: int, max_bytes: int,
+                 summary_tokens: int = 200):
+        super().__init__(max_history, ttl_seconds, max_bytes, summary_tokens)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self) -> None:
+        # Least recently used sessions sit at the front, so stop at the first live one
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["last_seen"] >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def get_conversation(self, session_id: str) -> Tuple[str, List[ChatMessage]]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return "", []
+            session["last_seen"] = time.time()
+            self._sessions.move_to_end(session_id)
+            return session["summary"], list(session["messages"])
+
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = {"messages": [], "bytes": 0, "summary": ""}
+                self._sessions[session_id] = session
+            session["last_seen"] = time.time()
+            self._sessions.move_to_end(session_id)
+
+            for message in messages:
+                message = _cap_message(message, self.max_bytes)
+                session["messages"].append(message)
+                session["bytes"] += _message_size(message)
+            drop = _drop_count([_message_size(message) for message in session["messages"]],
+                               self.max_history, self.max_bytes)
+            dropped = session["messages"][:drop]
+            if dropped:
+                del session["messages"][:drop]
+                session["bytes"] -= sum(_message_size(message) for message in dropped)
+                session["summary"] = fold_into_summary(session["summary"], dropped, self.summary_tokens)
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire()
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": sum(session["bytes"] for session in self._sessions.values()),
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    # Pure in-process work, no need to hop to the thread pool
+    async def aget_conversation(self, session_id: str) -> Tuple[str, List[ChatMessage]]:
+        return self.get_conversation(session_id)
+
+    async def aappend(self, session_id: str, messages: List[ChatMessage]) -> None:
+        self.append(session_id, messages)
+
+    async def adelete(self, session_id: str) -> None:
+        self.delete(session_id)
+
+
+class RedisSessionStore(SessionStore):
+    """Session store shared by every worker through Redis.
+
+    Each session is a list of JSON messages under `<prefix>:<id>` with a sliding TTL,
+    and its summary a string under `<prefix>:<id>:summary`.
+    A sorted set of session IDs by last use enforces max_sessions across workers.
+    Appends run as a WATCH/MULTI transaction, retried if another worker touches the
+    same session in between, so concurrent turns never over-trim or lose summary lines.
+    Works with any redis-py compatible client, including fakeredis.
+    """
+
+    def __init__(self, client, max_sessions: int, max_history: int, ttl_seconds: int, max_bytes: int,
+                 summary_tokens: int = 200, prefix: str = "chat:session"):
+        super().__init__(max_history, ttl_seconds, max_bytes, summary_tokens)
+        self.client = client
+        self.max_sessions = max_sessions
+        self.prefix = prefix
+        self.index_key = f"{prefix}:index"
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}"
+
+    def get_conversation(self, session_id: str) -> Tuple[str, List[ChatMessage]]:
+        key = self._key(session_id)
+        pipe = self.client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.get(f"{key}:summary")
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(f"{key}:summary", self.ttl_seconds)
+        pipe.zadd(self.index_key, {session_id: time.time()}, xx=True)
+        raw, summary = pipe.execute()[:2]
+        return self._decode(summary or ""), [ChatMessage(**json.loads(item)) for item in raw]
+
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        from redis.exceptions import WatchError
+
+        key = self._key(session_id)
+        summary_key = f"{key}:summary"
+        capped = [_cap_message(message, self.max_bytes) for message in messages]
+        encoded = [json.dumps(message.model_dump(mode="json")) for message in capped]
+
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key, summary_key)
+                    stored = [ChatMessage(**json.loads(item)) for item in pipe.lrange(key, 0, -1)] + capped
+                    # Drop the oldest messages beyond max_history, then until the session fits in max_bytes
+                    drop = _drop_count([_message_size(message) for message in stored],
+                                       self.max_history, self.max_bytes)
+                    summary = None
+                    if drop:
+                        summary = fold_into_summary(self._decode(pipe.get(summary_key) or ""), stored[:drop],
+                                                    self.summary_tokens)
+                    now = time.time()
+                    pipe.multi()
+                    pipe.rpush(key, *encoded)
+                    if drop:
+                        pipe.ltrim(key, drop, -1)
+                        pipe.set(summary_key, summary, ex=self.ttl_seconds)
+                    pipe.expire(key, self.ttl_seconds)
+                    pipe.zadd(self.index_key, {session_id: now})
+                    pipe.zremrangebyscore(self.index_key, 0, now - self.ttl_seconds)
+                    pipe.zcard(self.index_key)
+                    session_count = pipe.execute()[-1]
+                    break
+                except WatchError:
+                    continue
+
+        if session_count > self.max_sessions:
+            evicted = self.client.zpopmin(self.index_key, session_count - self.max_sessions)
+            if evicted:
+                keys = [self._key(self._decode(member)) for member, _ in evicted]
+                self.client.delete(*keys, *[f"{key}:summary" for key in keys])
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def delete(self, session_id: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(session_id), f"{self._key(session_id)}:summary")
+        pipe.zrem(self.index_key, session_id)
+        pipe.execute()
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "redis",
+            "sessions": self.client.zcard(self.index_key),
+            "max_sessions": self.max_sessions
+        }
+
+
+def create_session_store(redis_client=None) -> SessionStore:
+    """Build the session store from settings: Redis when REDIS_URL is set, in-memory otherwise."""
+    limits = dict(
+        max_sessions=settings.MAX_SESSIONS,
+        max_history=settings.MAX_HISTORY_LENGTH,
+        ttl_seconds=settings.SESSION_TIMEOUT_MINUTES * 60,
+        max_bytes=settings.SESSION_MAX_BYTES,
+        summary_tokens=settings.HISTORY_SUMMARY_TOKENS
+    )
+    if redis_client is None and settings.REDIS_URL:
+        try:
+            import redis
+            redis_client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=5)
+            redis_client.ping()
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed; using in-memory sessions")
+            redis_client = None
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}); using in-memory sessions")
+            redis_client = None
+
+    if redis_client is not None:
+        print("🗄️  Using Redis session store")
+        return RedisSessionStore(redis_client, **limits)
+    return InMemorySessionStore(**limits)
+
+
+def record_session_metrics(store: SessionStore) -> None:
+    """Refresh the session store gauges from store.stats() (a Redis round trip for the Redis store)."""
+    stats = store.stats()
+    session_count.set(stats["sessions"], backend=stats["backend"])
+    if "bytes" in stats:
+        session_bytes.set(stats["bytes"], backend=stats["backend"])
@@ -0,0 +1,114 @@
+# backend/app/services/single_flight.py
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+from ..metrics import metrics
+
+T = TypeVar("T")
+
+coalesced_requests = metrics.counter(
+    "single_flight_requests_total",
+    "Calls through single-flight by kind and role (leader ran the work, follower shared it)"
+)
+
+fan_in = metrics.histogram(
+    "single_flight_fan_in",
+    "Callers served by one execution, by kind",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200)
+)
+
+
+class _Flight:
+    def __init__(self):
+        self.callers = 1
+        self.task: Optional[asyncio.Task] = None
+        # Streams only: chunks produced so far, replayed to callers that join late
+        self.chunks: List[str] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one execution.
+
+    Keys are tuples whose first element names the kind of work ("search", "answer",
+    "stream"), used as the metrics label. While a call for a key is in flight, other
+    callers with the same key wait for its result instead of starting their own. The
+    work runs in its own task, so a caller that disconnects does not cancel it for
+    the others. Nothing is kept once it finishes: repeats after that are the answer
+    cache's job.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.callers = 0
+
+    def _join(self, key: Tuple) -> Tuple[_Flight, bool]:
+        flight = self._flights.get(key)
+        self.callers += 1
+        if flight is not None:
+            flight.callers += 1
+            coalesced_requests.inc(kind=key[0], role="follower")
+            return flight, False
+        flight = _Flight()
+        self._flights[key] = flight
+        self.executions += 1
+        coalesced_requests.inc(kind=key[0], role="leader")
+        return flight, True
+
+    def _finish(self, key: Tuple, flight: _Flight, task: Optional[asyncio.Task] = None) -> None:
+        if task is not None and not task.cancelled():
+            task.exception()  # callers that disconnected never await it; don't log it as unretrieved
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        fan_in.observe(flight.callers, kind=key[0])
+
+    async def do(self, key: Tuple, func: Callable[[], Awaitable[T]]) -> T:
+        """Run func() once for all concurrent callers with this key and return its result."""
+        flight, leader = self._join(key)
+        if leader:
+            flight.task = asyncio.ensure_future(func())
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        return await asyncio.shield(flight.task)
+
+    async def stream(self, key: Tuple, func: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Iterate func() once for all concurrent callers with this key; every caller gets every chunk."""
+        flight, leader = self._join(key)
+        if leader:
+            flight.task = asyncio.ensure_future(self._pump(key, flight, func))
+
+        index = 0
+        while True:
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: len(flight.chunks) > index or flight.finished)
+            while index < len(flight.chunks):
+                yield flight.chunks[index]
+                index += 1
+            if flight.finished and index >= len(flight.chunks):
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    async def _pump(self, key: Tuple, flight: _Flight, func: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for chunk in func():
+                flight.chunks.append(chunk)
+                async with flight.changed:
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            self._finish(key, flight)
+            flight.finished = True
+            async with flight.changed:
+                flight.changed.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "callers": self.callers,
+            "fan_in_ratio": round(self.callers / self.executions, 3) if self.executions else None
+        }
@@ -0,0 +1,24 @@
+# backend/app/services/text_utils.py
+
+import re
+from typing import List
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+
+# Words that carry no signal for keyword retrieval
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how i in is it me of on or
+so that the their there these this to was what when where which who why will
+with you your about tell
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords; keeps identifiers like "cs50p", "xv6", "c++" and "node.js" intact."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
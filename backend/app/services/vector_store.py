@@ -1,31 +1,51 @@
 # backend/app/services/vector_store.py
 
+from __future__ import annotations
+
 import os
-from typing import List, Dict, Optional
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader
-from langchain.schema import Document
-import chromadb
+from typing import TYPE_CHECKING, List, Dict, Optional, Callable
 from ..config import settings
+from ..concurrency import run_blocking
+from ..metrics import metrics
+from .ingestion import BATCH_SIZE_DEFAULTS, DEFAULT_BATCH_SIZE, ingest_documents
+from .embedding_cache import CachedEmbeddings, EmbeddingCache, QueryEmbeddingLRU
+from .keyword_index import BM25Index, reciprocal_rank_fusion
+from .numpy_index import NumpyVectorIndex
+from .retrieval import cosine_scores, maximal_marginal_relevance, relevant_mask, remove_near_duplicates
 import logging
 
+if TYPE_CHECKING:
+    from langchain.schema import Document  # langchain is imported lazily, on first use
+
 logger = logging.getLogger(__name__)
 
+search_latency = metrics.histogram(
+    "vector_search_seconds",
+    "Retrieval time per query by mode (keyword, dense, hybrid), excluding the query embedding"
+)
+
+RETRIEVAL_MODES = ("dense", "keyword", "hybrid")
+
 class VectorStore:
-    def __init__(self):
+    def __init__(self, embeddings=None, embedding_cache: Optional[EmbeddingCache] = None):
         self.chroma_dir = settings.CHROMA_DIR
         os.makedirs(self.chroma_dir, exist_ok=True)
         
         # Initialize embeddings
-        if settings.GEMINI_API_KEY:
+        if embeddings is not None:
+            # Injected embeddings (benchmarks, offline runs)
+            self.embeddings = embeddings
+            self.embedding_model_name = getattr(embeddings, "model_name", None) or type(embeddings).__name__
+            self.embedding_backend = "custom"
+        elif settings.GEMINI_API_KEY:
             try:
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
                 self.embeddings = GoogleGenerativeAIEmbeddings(
                     model="models/embedding-001",
                     google_api_key=settings.GEMINI_API_KEY
                 )
+                self.embedding_model_name = "models/embedding-001"
+                self.embedding_backend = "gemini"
                 print("✓ Using Gemini embeddings")
             except Exception as e:
                 print(f"Failed to initialize Gemini embeddings: {e}")
@@ -33,18 +53,69 @@ class VectorStore:
         else:
             self._use_fallback_embeddings()
         
+        # Persistent embedding cache under the provider, shared across rebuilds and workers.
+        # Injected embeddings are only cached when a cache is passed explicitly.
+        if embedding_cache is None and embeddings is None and settings.EMBEDDING_CACHE_ENABLED:
+            try:
+                embedding_cache = EmbeddingCache(
+                    settings.EMBEDDING_CACHE_PATH,
+                    max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+                )
+            except Exception as e:
+                print(f"Embedding cache unavailable: {e}")
+        self.embedding_cache = embedding_cache
+        if embedding_cache is not None:
+            self.embeddings = CachedEmbeddings(self.embeddings, embedding_cache, self.embedding_model_name)
+        
+        # In-memory LRU for query embeddings on the search hot path
+        self.query_cache = QueryEmbeddingLRU(self.embeddings.embed_query, settings.QUERY_EMBEDDING_CACHE_SIZE)
+        
         # Don't initialize vector store here - wait for create_or_load_vectorstore
         self.vectorstore = None
+        
+        # BM25 index over the same chunks, kept in sync with every write to Chroma
+        self.keyword_index = BM25Index()
+        self.retrieval_mode = settings.RETRIEVAL_MODE
+        # Set while most chunks are keyword-indexed but not yet embedded (cold background build)
+        self.keyword_only = False
+        
+        # Optional in-memory dense index that serves searches instead of Chroma.
+        # Chroma stays the store of record; the matrix mirrors it like the BM25 index.
+        self.dense_index = None
+        if settings.VECTOR_BACKEND == "numpy":
+            self.dense_index = NumpyVectorIndex(os.path.join(self.chroma_dir, "dense_index"))
+        elif settings.VECTOR_BACKEND != "chroma":
+            raise ValueError(f"Unknown VECTOR_BACKEND: {settings.VECTOR_BACKEND}")
+        
+        # Callbacks run whenever the indexed corpus changes (e.g. answer cache invalidation)
+        self._reindex_listeners: List[Callable[[], None]] = []
+    
+    def add_reindex_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run after documents are added or the store is cleared"""
+        self._reindex_listeners.append(callback)
+    
+    def _notify_reindex(self) -> None:
+        for callback in self._reindex_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Reindex listener failed: {e}")
     
     def _use_fallback_embeddings(self):
         """Use HuggingFace embeddings as fallback"""
+        # Imported here so processes that never embed locally don't load sentence-transformers
+        from langchain_community.embeddings import HuggingFaceEmbeddings
         self.embeddings = HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2"
         )
+        self.embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        self.embedding_backend = "huggingface"
         print("✓ Using HuggingFace embeddings (fallback)")
     
     def create_or_load_vectorstore(self, documents: List[Document]) -> None:
         """Create or load vector store with documents"""
+        # Chroma (and its chromadb client) is only loaded once a store is opened
+        from langchain_community.vectorstores import Chroma
         try:
             # Check if vector store already exists
             if os.path.exists(os.path.join(self.chroma_dir, "chroma.sqlite3")):
@@ -54,6 +125,8 @@ class VectorStore:
                     embedding_function=self.embeddings
                 )
                 
+                self.load_search_indexes()
+                
                 # Check document count
                 try:
                     existing_count = self.vectorstore._collection.count()
@@ -87,55 +160,255 @@ class VectorStore:
             )
             logger.info("Created minimal in-memory vector store")
     
-    def _add_documents_batch(self, documents: List[Document]) -> None:
+    def load_search_indexes(self) -> None:
+        """Build the in-memory indexes from the stored chunks (used when opening an existing store)
+        
+        The BM25 index is rebuilt from the chunk texts and swapped in whole, so searches running
+        meanwhile use the previous one. The NumPy matrix is memory-mapped from its last save and
+        only rebuilt from Chroma's embeddings if it no longer matches.
+        """
+        if self.vectorstore is None:
+            self.keyword_index = BM25Index()
+            return
+        try:
+            stored = self.vectorstore.get(include=["documents", "metadatas"])
+            keyword_index = BM25Index()
+            keyword_index.add(stored["ids"], stored["documents"], stored["metadatas"])
+            self.keyword_index = keyword_index
+            logger.info(f"Built keyword index over {len(self.keyword_index)} chunks")
+        except Exception as e:
+            logger.error(f"Error building keyword index: {e}")
+            return
+        
+        if self.dense_index is None:
+            return
+        if self.dense_index.load() and set(self.dense_index.ids) == set(stored["ids"]):
+            logger.info(f"Memory-mapped vector index with {len(self.dense_index)} chunks")
+            return
+        try:
+            stored = self.vectorstore.get(include=["embeddings"])
+            self.dense_index.clear()
+            self.dense_index.add(stored["ids"], stored["embeddings"])
+            self.dense_index.save()
+            logger.info(f"Rebuilt vector index from Chroma ({len(self.dense_index)} chunks)")
+        except Exception as e:
+            logger.error(f"Error building vector index: {e}")
+    
+    def _save_dense_index(self) -> None:
+        if self.dense_index is None:
+            return
+        try:
+            self.dense_index.save()
+        except Exception as e:
+            logger.error(f"Error saving vector index: {e}")
+    
+    def _add_documents_batch(self, documents: List[Document], ids: Optional[List[str]] = None) -> None:
         """Add documents in batches"""
         try:
-            logger.info(f"Adding {len(documents)} documents to vector store...")
-            
-            # Add documents in batches to avoid memory issues
-            batch_size = 10
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                self.vectorstore.add_documents(batch)
-                logger.info(f"Added batch {i//batch_size + 1}/{(len(documents) + batch_size - 1)//batch_size}")
-            
-            # Persist the vector store
-            self.vectorstore.persist()
-            logger.info(f"✅ Added {len(documents)} documents to vector store")
-            
+            self.ingest(documents, ids)
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
     
-    def similarity_search(self, query: str, k: int = 4) -> List[Dict]:
-        """Search for similar documents"""
+    @property
+    def embedding_batch_size(self) -> int:
+        """Texts per embedding request: EMBEDDING_BATCH_SIZE, or the backend's default"""
+        return settings.EMBEDDING_BATCH_SIZE or BATCH_SIZE_DEFAULTS.get(self.embedding_backend, DEFAULT_BATCH_SIZE)
+    
+    def ingest(self, documents: List[Document], ids: Optional[List[str]] = None,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Embed documents with parallel batched requests and write them to Chroma as batches finish.
+        
+        Raises on failure so callers (e.g. the incremental indexer) don't record chunks that never landed.
+        progress is called with (chunks written, total) after each batch.
+        """
+        logger.info(f"Adding {len(documents)} documents to vector store...")
+        stats = ingest_documents(
+            embed=self.embeddings.embed_documents,
+            write=self._write_embedded_batch,
+            documents=documents,
+            ids=ids,
+            batch_size=self.embedding_batch_size,
+            workers=settings.EMBEDDING_WORKERS,
+            max_retries=settings.EMBEDDING_MAX_RETRIES,
+            progress=progress
+        )
+        
+        # Persist the vector store
+        self.vectorstore.persist()
+        self._save_dense_index()
+        logger.info(f"✅ Added {stats['chunks']} documents to vector store "
+                    f"({stats['chunks_per_second']} chunks/sec, batch size {stats['batch_size']}, {stats['workers']} workers)")
+        self._notify_reindex()
+        return stats
+    
+    def _write_embedded_batch(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Write pre-embedded chunks straight to the Chroma collection"""
+        self.vectorstore._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata or {"source": "Unknown"} for doc in documents]
+        )
+        self.keyword_index.add(
+            ids,
+            [doc.page_content for doc in documents],
+            [doc.metadata or {"source": "Unknown"} for doc in documents]
+        )
+        if self.dense_index is not None:
+            self.dense_index.add(ids, embeddings)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query so it can be reused for cache lookups and search (served from the query LRU when repeated)"""
+        return self.query_cache.get(query)
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        return await run_blocking(self.embed_query, query)
+    
+    def similarity_search(self, query: str, k: Optional[int] = None, embedding: Optional[List[float]] = None,
+                          mode: Optional[str] = None) -> List[Dict]:
+        """Search for similar documents (pass a precomputed query embedding to skip re-embedding)
+        
+        Candidates below the relevance cutoffs (MIN_RELEVANCE_SCORE, RELEVANCE_RATIO) and
+        near-duplicates of better-ranked chunks are dropped, so fewer than k chunks come
+        back when fewer are worth sending to the model. With SEARCH_MMR the remaining
+        candidates are diversified by maximal marginal relevance.
+        
+        Args:
+            query: User question
+            k: Most chunks to return (default SEARCH_K)
+            embedding: Precomputed query embedding, if the caller already has one
+            mode: "dense", "keyword" or "hybrid"; defaults to RETRIEVAL_MODE
+        
+        Returns:
+            Dicts with 'content', 'metadata' and 'score' (cosine similarity to the
+            query; None in keyword mode)
+        """
         try:
-            if not self.vectorstore:
+            if self.vectorstore is None:
                 logger.error("Vector store not initialized")
                 return []
-                
-            results = self.vectorstore.similarity_search(query, k=k)
             
-            # Convert results to dict format
-            formatted_results = []
-            for doc in results:
-                formatted_results.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata
-                })
-            
-            return formatted_results
+            k = k or settings.SEARCH_K
+            mode = mode or ("keyword" if self.keyword_only else self.retrieval_mode)
+            if mode not in RETRIEVAL_MODES:
+                raise ValueError(f"Unknown retrieval mode: {mode}")
+            # Embedding time is measured on its own (query_embedding_seconds)
+            if mode != "keyword" and embedding is None:
+                embedding = self.embed_query(query)
+            with search_latency.time(mode=mode):
+                candidate_count = max(k, settings.HYBRID_CANDIDATES)
+                keyword_hits = []
+                if mode != "dense":
+                    keyword_hits = self.keyword_index.search(query, k=candidate_count)
+                if mode == "keyword":
+                    # No embeddings to score against: BM25 order, minus duplicates
+                    results = (dict(self._stored_result(doc_id), score=None) for doc_id, _ in keyword_hits)
+                    return remove_near_duplicates(results, settings.DEDUP_THRESHOLD, limit=k)
+                
+                # Drop the keyword tail that only matched common words, so it can't outvote strong exact matches
+                if keyword_hits:
+                    floor = keyword_hits[0][1] * settings.KEYWORD_SCORE_RATIO
+                    keyword_hits = [hit for hit in keyword_hits if hit[1] >= floor]
+                
+                dense_hits = self._dense_search(embedding, candidate_count)
+                dense_results = dict(dense_hits)
+                # Without keyword hits (empty index, only stopwords) hybrid is plain dense search
+                ranked_ids = [doc_id for doc_id, _ in dense_hits]
+                if keyword_hits:
+                    ranked_ids = reciprocal_rank_fusion(
+                        [ranked_ids, [doc_id for doc_id, _ in keyword_hits]],
+                        k=settings.RRF_K
+                    )
+                return self._select(ranked_ids, dense_results, {doc_id for doc_id, _ in keyword_hits}, embedding, k)
         except Exception as e:
             logger.error(f"Error in similarity search: {e}")
             return []
     
+    def _select(self, ranked_ids: List[str], dense_results: Dict[str, Dict], keyword_ids: set,
+                embedding: List[float], k: int) -> List[Dict]:
+        """Apply the relevance cutoffs, de-duplication and optional MMR to ranked candidates."""
+        results = [dense_results.get(doc_id) or dict(self._stored_result(doc_id), score=None) for doc_id in ranked_ids]
+        
+        # Keyword-only hits get a similarity too, so the cutoffs and MMR can compare them
+        unscored = [doc_id for doc_id, result in zip(ranked_ids, results) if result["score"] is None]
+        if unscored:
+            vectors = self._stored_vectors(unscored)
+            scores = dict(zip(vectors, cosine_scores(embedding, list(vectors.values())).tolist()))
+            for doc_id, result in zip(ranked_ids, results):
+                if doc_id in scores:
+                    result["score"] = scores[doc_id]
+        
+        # Strong exact matches are exempt from the similarity cutoffs
+        mask = relevant_mask(
+            [None if doc_id in keyword_ids else result["score"] for doc_id, result in zip(ranked_ids, results)],
+            settings.MIN_RELEVANCE_SCORE, settings.RELEVANCE_RATIO
+        )
+        kept = [(doc_id, result) for doc_id, result, keep in zip(ranked_ids, results, mask) if keep]
+        kept = remove_near_duplicates(kept, settings.DEDUP_THRESHOLD, content=lambda item: item[1]["content"],
+                                      limit=None if settings.SEARCH_MMR else k)
+        
+        if settings.SEARCH_MMR and len(kept) > k:
+            vectors = self._stored_vectors([doc_id for doc_id, _ in kept])
+            # MMR needs every candidate's vector; if some are missing, keep relevance order
+            if all(doc_id in vectors for doc_id, _ in kept):
+                # Exact keyword matches count as the most relevant, as in the cutoffs
+                best = max(result["score"] for _, result in kept)
+                relevance = [best if doc_id in keyword_ids else result["score"] for doc_id, result in kept]
+                order = maximal_marginal_relevance(embedding, [vectors[doc_id] for doc_id, _ in kept], k,
+                                                   settings.MMR_LAMBDA, relevance)
+                return [kept[i][1] for i in order]
+            logger.warning(f"MMR skipped: {len(kept) - len(vectors)} candidates have no stored vector")
+        return [result for _, result in kept[:k]]
+    
+    def _dense_search(self, embedding: List[float], k: int) -> List[tuple]:
+        """Nearest chunks by embedding as (id, result dict with 'score') pairs"""
+        if self.dense_index is not None:
+            return [
+                (doc_id, dict(self._stored_result(doc_id), score=score))
+                for doc_id, score in self.dense_index.search(embedding, k)
+            ]
+        
+        count = self.vectorstore._collection.count()
+        if not count:
+            return []
+        results = self.vectorstore._collection.query(
+            query_embeddings=[embedding],
+            n_results=min(k, count),
+            include=["documents", "metadatas", "embeddings"]
+        )
+        scores = cosine_scores(embedding, results["embeddings"][0]).tolist()
+        return [
+            (doc_id, {'content': content, 'metadata': metadata or {}, 'score': score})
+            for doc_id, content, metadata, score
+            in zip(results["ids"][0], results["documents"][0], results["metadatas"][0], scores)
+        ]
+    
+    def _stored_vectors(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Embeddings of indexed chunks by ID, without re-embedding them"""
+        if self.dense_index is not None:
+            return self.dense_index.vectors(ids)
+        stored = self.vectorstore._collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(stored["ids"], stored["embeddings"]))
+    
+    def _stored_result(self, doc_id: str) -> Dict:
+        """Chunk text and metadata from the in-memory copy kept by the keyword index"""
+        content, metadata = self.keyword_index.get(doc_id)
+        return {'content': content, 'metadata': metadata}
+    
+    async def asimilarity_search(self, query: str, k: Optional[int] = None, embedding: Optional[List[float]] = None,
+                                 mode: Optional[str] = None) -> List[Dict]:
+        """Search without blocking the event loop (query embedding and Chroma run on the worker pool)"""
+        return await run_blocking(self.similarity_search, query, k, embedding, mode)
+    
     def add_documents(self, documents: List[Dict]) -> bool:
         """Add documents to the vector store"""
         try:
-            if not self.vectorstore:
+            if self.vectorstore is None:
                 logger.error("Vector store not initialized")
                 return False
                 
             # Convert dicts to Document objects if needed
+            from langchain.schema import Document
             docs = []
             for doc in documents:
                 if isinstance(doc, dict):
@@ -146,13 +419,58 @@ class VectorStore:
                 else:
                     docs.append(doc)
             
-            self.vectorstore.add_documents(docs)
+            ids = self.vectorstore.add_documents(docs)
             self.vectorstore.persist()
+            self.keyword_index.add(ids, [doc.page_content for doc in docs], [doc.metadata for doc in docs])
+            if self.dense_index is not None:
+                self.dense_index.add(ids, self.vectorstore.get(ids=ids, include=["embeddings"])["embeddings"])
+                self._save_dense_index()
+            self._notify_reindex()
             return True
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             return False
     
+    def add_documents_with_ids(self, documents: List[Document], ids: List[str],
+                               progress: Optional[Callable[[int, int], None]] = None) -> Optional[Dict]:
+        """Add chunks under caller-chosen IDs (content hashes from the incremental indexer)"""
+        if self.vectorstore is None:
+            logger.error("Vector store not initialized")
+            return None
+        return self.ingest(documents, ids, progress)
+    
+    def delete_documents(self, ids: List[str]) -> bool:
+        """Delete chunks by ID; False if the delete failed and the chunks may still be stored"""
+        if not ids:
+            return True
+        if self.vectorstore is None:
+            logger.error("Vector store not initialized")
+            return False
+        try:
+            self.vectorstore.delete(ids=ids)
+            self.vectorstore.persist()
+            self.keyword_index.remove(ids)
+            if self.dense_index is not None:
+                self.dense_index.remove(ids)
+                self._save_dense_index()
+            logger.info(f"Deleted {len(ids)} chunks from vector store")
+            self._notify_reindex()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents: {e}")
+            return False
+    
+    def delete_all(self) -> bool:
+        """Delete every chunk but keep the collection (unlike clear_vectorstore, no directory wipe)"""
+        if self.vectorstore is None:
+            return True
+        try:
+            existing_ids = self.vectorstore.get(include=[])["ids"]
+        except Exception as e:
+            logger.error(f"Error listing documents: {e}")
+            return False
+        return self.delete_documents(existing_ids)
+    
     def clear_vectorstore(self) -> bool:
         """Clear all documents from the vector store"""
         try:
@@ -164,7 +482,11 @@ class VectorStore:
             
             # Reinitialize
             self.vectorstore = None
+            self.keyword_index.clear()
+            if self.dense_index is not None:
+                self.dense_index.clear()
             logger.info("✅ Vector store cleared")
+            self._notify_reindex()
             return True
         except Exception as e:
             logger.error(f"Error clearing vector store: {e}")
@@ -173,7 +495,7 @@ class VectorStore:
     def get_document_count(self) -> int:
         """Get the number of documents in the vector store"""
         try:
-            if self.vectorstore:
+            if self.vectorstore is not None:
                 return self.vectorstore._collection.count()
             return 0
         except:
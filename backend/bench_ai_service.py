@@ -0,0 +1,65 @@
+# backend/bench_ai_service.py
+#
+# Compares per-request AIService construction (old behaviour) with a single
+# warmed-up service shared across requests. Gemini is replaced with a stub
+# that sleeps for a fixed latency, so no network or API key is needed.
+#
+#   python bench_ai_service.py --requests 20 --latency 0.2
+
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.ai_service import AIService
+from bench_stubs import StubGeminiModel, install_stub_gemini
+
+
+def run(label, make_service, n_requests):
+    context = [{"content": "OSSU is a free CS curriculum.", "metadata": {"source": "README.md"}}]
+    timings = []
+    StubGeminiModel.calls = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            service = make_service()
+            service.generate_response("What is OSSU?", context, [])
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<28} mean {statistics.mean(timings):8.1f} ms   "
+          f"p50 {statistics.median(timings):8.1f} ms   model calls {StubGeminiModel.calls}")
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIService per-request latency benchmark")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    args = parser.parse_args()
+
+    install_stub_gemini(args.latency)
+
+    print(f"⏱️  {args.requests} requests, stub Gemini latency {args.latency * 1000:.0f} ms\n")
+
+    def per_request():
+        service = AIService()
+        service.warm_up()
+        return service
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        shared = AIService()
+        shared.warm_up()
+
+    before = run("new AIService per request", per_request, args.requests)
+    after = run("shared warmed-up AIService", lambda: shared, args.requests)
+
+    print(f"\n✅ Per-request latency reduced by {before - after:.1f} ms ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
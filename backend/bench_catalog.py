@@ -0,0 +1,183 @@
+# backend/bench_catalog.py
+#
+# Course catalog answers against the retrieval + LLM path. Starts the app
+# in-process on a copy of the corpus (stub embeddings, stub Gemini with a fixed
+# latency), so the catalog is built by the same startup index sync as in
+# production. Reports how many generated "how long / how many hours / what
+# prerequisites" questions the catalog answers correctly and how fast, checks
+# that open-ended questions still reach Gemini, compares POST /api/chat/
+# latency with the catalog on and off, then edits and deletes corpus files and
+# re-syncs to check the catalog follows incremental re-indexing.
+#
+#   python bench_catalog.py --llm-latency 0.2 --requests 50
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, StubGeminiModel, install_stub_gemini
+
+OPEN_ENDED = [
+    "How do I show my progress?",
+    "How do I get help if I'm stuck?",
+    "Tell me about Systematic Program Design",
+    "Why should I do a final project?",
+    "Is it okay to skip the math courses?",
+]
+
+
+def catalog_questions(catalog):
+    """(question, text the answer must contain) for every course fact in the catalog."""
+    from app.services.course_catalog import normalize_name
+
+    names = {}
+    for course in catalog._index.courses:
+        names.setdefault(normalize_name(course["name"]), []).append(course)
+    questions = []
+    for course in catalog._index.courses:
+        # The same name twice in one table (a course and its lab) can't be told apart by name
+        if len(names[normalize_name(course["name"])]) > 1:
+            continue
+        if course["duration"]:
+            questions.append((f"How long does {course['name']} take?", course["duration"]))
+        if course["effort"]:
+            questions.append((f"How many hours per week is {course['name']}?", course["effort"]))
+        if course["prerequisites"]:
+            questions.append((f"What are the prerequisites for {course['name']}?", course["prerequisites"]))
+    return questions
+
+
+def micros(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def timed_chat(client, message, i):
+    start = time.perf_counter()
+    response = client.post("/api/chat/", json={"message": message, "session_id": f"bench-{i}"})
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+def sync(app, label):
+    from app.services.indexer import IncrementalIndexer
+
+    embeddings = app.state.vector_store.embeddings
+    before = embeddings.texts_embedded
+    start = time.perf_counter()
+    stats = IncrementalIndexer(app.state.vector_store, app.state.processor, app.state.course_catalog).sync()
+    print(f"   {label:<28} {(time.perf_counter() - start) * 1000:7.1f} ms   files changed {stats['files_changed']}   "
+          f"chunks embedded {embeddings.texts_embedded - before:4d}   catalog courses {stats['catalog_courses']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Course catalog vs retrieval + LLM")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--requests", type=int, default=50, help="chat requests per setting")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+    shutil.copytree(settings.MARKDOWN_DIR, corpus_dir, dirs_exist_ok=True)
+    settings.MARKDOWN_DIR = corpus_dir
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    settings.EMBEDDING_CACHE_ENABLED = False
+    settings.BACKGROUND_INDEXING = False
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.SINGLE_FLIGHT_ENABLED = False
+    install_stub_gemini(latency=args.llm_latency)
+
+    from app import main as app_main
+    from app.services.vector_store import VectorStore
+
+    app_main.VectorStore = lambda: VectorStore(embeddings=StubEmbeddings())
+    app = app_main.app
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        catalog = app.state.course_catalog
+        questions = catalog_questions(catalog)
+        answers = [(catalog.answer(question), expected) for question, expected in questions]
+        correct = sum(answer is not None and expected in answer["response"] for answer, expected in answers)
+        wrongly_answered = [question for question in OPEN_ENDED if catalog.answer(question) is not None]
+        answer_us = micros(lambda: [catalog.answer(question) for question, _ in questions], 20) / len(questions)
+        miss_us = micros(lambda: [catalog.answer(question) for question in OPEN_ENDED], 200) / len(OPEN_ENDED)
+
+        timings = {}
+        gemini_calls = {}
+        for label, enabled in (("catalog off", False), ("catalog on", True)):
+            app.state.course_catalog = catalog if enabled else None
+            calls_before = StubGeminiModel.calls
+            timings[label] = [timed_chat(client, questions[i % len(questions)][0], i)[0] for i in range(args.requests)]
+            gemini_calls[label] = StubGeminiModel.calls - calls_before
+        calls_before = StubGeminiModel.calls
+        for i, question in enumerate(OPEN_ENDED):
+            timed_chat(client, question, i)
+        open_ended_calls = StubGeminiModel.calls - calls_before
+        metrics_text = client.get("/metrics").text
+        health = client.get("/health").json()
+
+    stats = catalog.stats()
+    print(f"📚 Catalog: {stats['courses']} courses in {stats['sections']} sections from {stats['files']} files "
+          f"({os.path.getsize(catalog.path) / 1024:.0f} KB on disk)\n")
+    print(f"❓ {len(questions)} generated course questions: {correct / len(questions):.1%} answered correctly from the catalog")
+    print(f"   catalog answer {answer_us:6.1f} µs, open-ended miss {miss_us:5.1f} µs "
+          f"({len(OPEN_ENDED) - len(wrongly_answered)}/{len(OPEN_ENDED)} open-ended questions left to the LLM)\n")
+    print(f"💬 POST /api/chat/, {args.requests} course questions, stub Gemini {args.llm_latency * 1000:.0f} ms")
+    for label, values in timings.items():
+        print(f"   {label:<12} median {statistics.median(values) * 1000:7.1f} ms   Gemini calls {gemini_calls[label]}")
+    print(f"   open-ended questions with the catalog on: {open_ended_calls}/{len(OPEN_ENDED)} reached Gemini\n")
+
+    print("🔁 Incremental re-indexing")
+    readme = os.path.join(corpus_dir, "README.md")
+    with open(readme, encoding="utf-8") as f:
+        text = f.read()
+    text, edits = re.subn(r"(\[Systematic Program Design\]\([^)]*\) \| )13 weeks", r"\g<1>12 weeks", text)
+    with open(readme, "w", encoding="utf-8") as f:
+        f.write(text)
+    edit_stats = sync(app, "edit a README duration")
+    edited = catalog.answer("How long does Systematic Program Design take?")
+
+    extras = catalog.answer("How long does Introduction to Computer Science - CS50 take?")
+    os.remove(os.path.join(corpus_dir, "extras", "courses.md"))
+    remove_stats = sync(app, "delete extras/courses.md")
+    removed = catalog.answer("How long does Introduction to Computer Science - CS50 take?")
+
+    os.remove(catalog.path)
+    rebuild_stats = sync(app, "catalog file lost")
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    shutil.rmtree(settings.CHROMA_DIR, ignore_errors=True)
+
+    assert correct / len(questions) >= 0.95, f"only {correct}/{len(questions)} catalog answers correct"
+    assert not wrongly_answered, f"open-ended questions answered from the catalog: {wrongly_answered}"
+    assert gemini_calls["catalog on"] == 0 and open_ended_calls == len(OPEN_ENDED)
+    assert 'outcome="catalog"' in metrics_text and "course_catalog_answers_total" in metrics_text
+    assert health["services"]["course_catalog"]["courses"] == stats["courses"]
+    assert edits == 1 and "12 weeks" in edited["response"] and edit_stats["files_changed"] == 1
+    assert extras is not None and removed is None and remove_stats["catalog_courses"] < stats["courses"]
+    assert rebuild_stats["chunks_added"] == 0 and rebuild_stats["catalog_courses"] == remove_stats["catalog_courses"]
+    speedup = statistics.median(timings["catalog off"]) / statistics.median(timings["catalog on"])
+    print(f"\n✅ Course questions answered from the catalog in {answer_us:.0f} µs, "
+          f"{speedup:.0f}x faster end to end with no Gemini call; the catalog follows edits and deletions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# backend/bench_chunking.py
+#
+# Compares the markdown-aware chunker with the RecursiveCharacterTextSplitter
+# (1000 characters, 200 overlap) it replaced, on the markdown corpus:
+#   - chunks and tokens to embed (embedding cost)
+#   - structure: table rows found whole under their table header in some chunk,
+#     and chunks that cut a fenced code block in half
+#   - retrieval: keyword (BM25) recall@k for "how long does <course> take?"
+#     questions (hit when a top-k chunk holds that course's whole table row)
+#     and for rare-term questions, as in bench_retrieval.py. Dense and hybrid
+#     recall are only reported with --huggingface: the stub's hashed
+#     embeddings say nothing about semantic retrieval.
+#
+#   python bench_chunking.py --k 4
+#   python bench_chunking.py --chunk-size 256 --overlap 0
+#   python bench_chunking.py --huggingface     # real MiniLM embeddings if installed
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, make_vector_store
+
+
+def read_corpus():
+    from app.services.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor(settings.MARKDOWN_DIR)
+    corpus = {}
+    for file_path, rel_path in processor.iter_markdown_files():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            corpus[rel_path] = f.read()
+    return corpus
+
+
+def split_recursive(corpus):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, separators=["\n\n", "\n", " ", ""])
+    documents = []
+    for rel_path, content in corpus.items():
+        documents.extend(splitter.create_documents(
+            texts=[content], metadatas=[{"source": rel_path, "file": os.path.basename(rel_path)}]
+        ))
+    return documents
+
+
+def split_markdown(corpus, chunk_size, chunk_overlap):
+    from app.services.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor(settings.MARKDOWN_DIR, chunk_size, chunk_overlap)
+    return [chunk for rel_path, content in corpus.items() for chunk in processor.split_text(content, rel_path)]
+
+
+def table_rows(text):
+    """{row line: header line} for every row of every markdown table in text."""
+    from app.services.markdown_chunker import parse_blocks
+
+    rows = {}
+    for block in parse_blocks(text):
+        if block.kind == "table":
+            lines = block.text.split("\n")
+            rows.update((row, lines[0]) for row in lines[2:] if row.strip())
+    return rows
+
+
+def structure(documents, corpus):
+    """Table rows found whole, under their header, in some chunk; chunks with an unclosed code fence."""
+    rows = {}
+    for content in corpus.values():
+        rows.update(table_rows(content))
+    intact = set()
+    for doc in documents:
+        intact.update(row for row, header in table_rows(doc.page_content).items() if rows.get(row) == header)
+    broken_code = sum(1 for doc in documents
+                      if sum(line.lstrip().startswith("```") for line in doc.page_content.split("\n")) % 2)
+    return rows, len(intact), broken_code
+
+
+def recall(store, questions, k, mode):
+    hits = 0
+    for query, is_hit in questions:
+        results = store.similarity_search(query, k=k, mode=mode)
+        hits += any(is_hit(result["content"]) for result in results)
+    return hits / len(questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown-aware chunking vs the recursive character splitter")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--terms", type=int, default=100, help="number of rare-term questions")
+    parser.add_argument("--chunk-size", type=int, default=settings.CHUNK_SIZE, help="tokens")
+    parser.add_argument("--overlap", type=int, default=settings.CHUNK_OVERLAP, help="tokens")
+    parser.add_argument("--huggingface", action="store_true", help="use the MiniLM embeddings instead of the stub")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from langchain.schema import Document
+    from app.services.conversation import estimate_tokens
+    from app.services.text_utils import tokenize
+    from bench_retrieval import rare_terms
+
+    settings.EMBEDDING_CACHE_ENABLED = False
+    modes = ("keyword", "dense", "hybrid") if args.huggingface else ("keyword",)
+    embeddings = StubEmbeddings()
+    if args.huggingface:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    corpus = read_corpus()
+    whole_files = [Document(page_content=content) for content in corpus.values()]
+    terms = rare_terms(whole_files, args.terms)
+
+    def row_question(row):
+        name = re.sub(r"\]\(.*", "", row.split("|")[0]).strip(" [")
+        return f"How long does {name} take?", lambda content: row in content.split("\n")
+
+    def term_question(term):
+        return f"Which course covers {term}?", lambda content: term in tokenize(content)
+
+    splitters = {
+        "recursive 1000/200 chars": split_recursive,
+        f"markdown {args.chunk_size}/{args.overlap} tokens": lambda corpus: split_markdown(corpus, args.chunk_size, args.overlap),
+    }
+    print(f"📚 {len(corpus)} markdown files, {sum(map(estimate_tokens, corpus.values()))} tokens\n")
+    results = {}
+    for label, split in splitters.items():
+        documents = split(corpus)
+        rows, recovered, broken_code = structure(documents, corpus)
+        with contextlib.redirect_stdout(io.StringIO()):
+            store = make_vector_store(embeddings, documents)
+        row_questions = [row_question(row) for row in sorted(rows)]
+        term_questions = [term_question(term) for term in terms]
+        results[label] = {
+            "chunks": len(documents),
+            "tokens": sum(estimate_tokens(doc.page_content) for doc in documents),
+            "recovered": recovered,
+            "rows": len(rows),
+            "broken_code": broken_code,
+            "rows_recall": {mode: recall(store, row_questions, args.k, mode) for mode in modes},
+            "terms_recall": {mode: recall(store, term_questions, args.k, mode) for mode in modes},
+        }
+
+    for label, r in results.items():
+        print(f"{label}")
+        print(f"   chunks {r['chunks']:5d}   tokens to embed {r['tokens']:7d}")
+        print(f"   table rows whole under their header {r['recovered']}/{r['rows']}   chunks cutting a code block {r['broken_code']}")
+        for mode in modes:
+            print(f"   {mode:<8} recall@{args.k}   table rows {r['rows_recall'][mode]:6.1%}   "
+                  f"rare terms {r['terms_recall'][mode]:6.1%}")
+        print()
+
+    before, after = results.values()
+    assert after["tokens"] < before["tokens"]
+    assert after["recovered"] == after["rows"] and after["broken_code"] == 0
+    assert after["terms_recall"]["keyword"] >= before["terms_recall"]["keyword"]
+    print(f"✅ {1 - after['chunks'] / before['chunks']:.0%} fewer chunks and {1 - after['tokens'] / before['tokens']:.1%} "
+          f"fewer tokens to embed, every table row kept whole, rare-term recall "
+          f"{before['terms_recall']['keyword']:.0%} -> {after['terms_recall']['keyword']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
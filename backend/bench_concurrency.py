@@ -0,0 +1,127 @@
+# backend/bench_concurrency.py
+#
+# Drives POST /api/chat/ in-process with N simultaneous sessions against a
+# stubbed Gemini model and stub embeddings. Reports chat latency at
+# concurrency 1 and N, plus /health latency measured while the load is
+# running: if anything blocked the event loop, /health would queue behind it.
+#
+#   python bench_concurrency.py --sessions 200 --latency 0.2
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, install_stub_gemini, make_vector_store
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def timed_post(client, session_id):
+    start = time.perf_counter()
+    response = await client.post("/api/chat/", json={
+        "message": "Which programming languages are taught?",
+        "session_id": session_id
+    })
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def probe_health(client, stop, timings):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        timings.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run_load(app, sessions):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        health_timings = []
+        prober = asyncio.create_task(probe_health(client, stop, health_timings))
+        chat_timings = await asyncio.gather(*(timed_post(client, f"bench-{i}") for i in range(sessions)))
+        stop.set()
+        await prober
+    return chat_timings, health_timings
+
+
+def report(label, timings):
+    print(f"{label:<28} p50 {percentile(timings, 50):8.1f} ms   "
+          f"p99 {percentile(timings, 99):8.1f} ms   max {max(timings):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /api/chat latency benchmark")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="stub query embedding latency in seconds")
+    parser.add_argument("--search-latency", type=float, default=None,
+                        help="replace Chroma search with a fixed-latency stub (isolates pipeline overhead from search CPU)")
+    parser.add_argument("--pool-size", type=int, default=None, help="override BLOCKING_POOL_SIZE")
+    args = parser.parse_args()
+
+    if args.pool_size:
+        settings.BLOCKING_POOL_SIZE = args.pool_size
+    else:
+        settings.BLOCKING_POOL_SIZE = max(settings.BLOCKING_POOL_SIZE, args.sessions)
+
+    # Every session asks the same question; measure the full pipeline per request, not one shared generation
+    settings.SINGLE_FLIGHT_ENABLED = False
+    # ...and not a course catalog answer
+    settings.COURSE_CATALOG_ENABLED = False
+    # Let startup finish indexing before the stubs replace app.state
+    settings.BACKGROUND_INDEXING = False
+    install_stub_gemini(args.latency)
+
+    from app.main import app
+    from app.services.ai_service import AIService
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.state.vector_store = make_vector_store(StubEmbeddings(latency=args.embed_latency))
+        if args.search_latency is not None:
+            stub_results = app.state.vector_store.similarity_search("programming languages", k=4)
+
+            def stub_search(query, k=4, embedding=None, mode=None):
+                time.sleep(args.search_latency)
+                return stub_results[:k]
+
+            app.state.vector_store.similarity_search = stub_search
+        app.state.ai_service = AIService()
+        app.state.ai_service.warm_up()
+        app.state.processor = None
+        app.state.is_ready = True
+
+    print(f"⏱️  stub Gemini {args.latency * 1000:.0f} ms, stub embedding {args.embed_latency * 1000:.0f} ms, "
+          f"pool size {settings.BLOCKING_POOL_SIZE}\n")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single, _ = asyncio.run(run_load(app, 1))
+        loaded, health = asyncio.run(run_load(app, args.sessions))
+
+    report("chat, 1 session", single)
+    report(f"chat, {args.sessions} sessions", loaded)
+    report("/health during load", health)
+
+    flat = percentile(loaded, 99) / percentile(single, 99)
+    print(f"\n✅ p99 under load is {flat:.2f}x the single-session p99")
+    print("   /health staying in single-digit ms shows the event loop is never blocked; any remaining")
+    print("   chat p99 growth is CPU-bound Chroma search contending for the GIL (see --search-latency).")
+
+
+if __name__ == "__main__":
+    main()
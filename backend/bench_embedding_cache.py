@@ -0,0 +1,92 @@
+# backend/bench_embedding_cache.py
+#
+# Shows the persistent embedding cache surviving a full rebuild: the corpus is
+# indexed twice with --full semantics (Chroma directory wiped in between) and
+# the second pass should embed nothing. Then several processes read the cache
+# at once to check that concurrent workers are not blocked by each other.
+#
+#   python bench_embedding_cache.py --latency 0.05 --readers 4
+
+import argparse
+import contextlib
+import io
+import logging
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings
+
+
+def rebuild(label, cache, embeddings):
+    from app.services.document_processor import DocumentProcessor
+    from app.services.indexer import IncrementalIndexer
+    from app.services.vector_store import VectorStore
+
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    embeddings.calls = embeddings.texts_embedded = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = VectorStore(embeddings=embeddings, embedding_cache=cache)
+        store.create_or_load_vectorstore([])
+    start = time.perf_counter()
+    stats = IncrementalIndexer(store, DocumentProcessor(settings.MARKDOWN_DIR)).sync(full=True)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed * 1000:9.1f} ms   chunks {stats['total_chunks']:4d}   "
+          f"texts sent to provider {embeddings.texts_embedded:4d}")
+    shutil.rmtree(settings.CHROMA_DIR, ignore_errors=True)
+    return elapsed
+
+
+def read_all(path, model, hashes, rounds):
+    from app.services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path, max_bytes=1 << 30)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        cache.get_many(model, hashes)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent embedding cache benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per embedding request (s)")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader processes")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from app.services.embedding_cache import EmbeddingCache, text_hash
+    from app.services.document_processor import DocumentProcessor
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_embcache_")
+    cache_path = str(Path(cache_dir) / "embeddings.sqlite3")
+    cache = EmbeddingCache(cache_path, max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+    embeddings = StubEmbeddings(latency=args.latency)
+
+    print(f"⏱️  stub embedding latency {args.latency * 1000:.0f} ms per request\n")
+    cold = rebuild("full rebuild, cold cache", cache, embeddings)
+    warm = rebuild("full rebuild, warm cache", cache, embeddings)
+    print(f"\n📊 {cache.stats()}")
+
+    documents = DocumentProcessor(settings.MARKDOWN_DIR).process_documents()
+    hashes = [text_hash(doc.page_content) for doc in documents]
+    model = f"{type(embeddings).__name__}:document"
+    single = read_all(cache_path, model, hashes, args.rounds)
+    with multiprocessing.Pool(args.readers) as pool:
+        parallel = pool.starmap(read_all, [(cache_path, model, hashes, args.rounds)] * args.readers)
+    print(f"\n📖 {len(hashes)} lookups x {args.rounds}: 1 reader {single * 1000:.0f} ms, "
+          f"{args.readers} concurrent readers {max(parallel) * 1000:.0f} ms each (slowest)")
+
+    print(f"\n✅ Rebuild with a warm cache is {cold / warm:.1f}x faster")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/bench_hedging.py
+#
+# Tail latency of HF fallback answers with and without hedged requests. The
+# local Inference API stub answers Mistral and Llama-2 in `--latency` seconds,
+# except for a `--tail-rate` fraction of requests that take `--slow` seconds.
+# With hedging, a request still running past the model's p95 latency starts
+# the next model alongside it, within the hedge budget.
+#
+#   python bench_hedging.py --requests 400 --concurrency 8
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubHFServer
+
+MISTRAL = "mistralai/Mistral-7B-Instruct-v0.2"
+LLAMA = "meta-llama/Llama-2-7b-chat-hf"
+FLAN = "google/flan-t5-large"
+CONTEXT = [{"content": "OSSU Core CS teaches Python, Racket and Java.", "metadata": {"source": "curriculum.md"}}]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def new_service():
+    from app.services.ai_service import AIService
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return AIService()
+
+
+def drive(label, ai, server, requests_count, concurrency, settle):
+    from app.services.provider_routing import hedged_requests
+
+    before_calls = sum(server.requests.values())
+    before_hedges = {outcome: hedged_requests.value(outcome=outcome) for outcome in ("fired", "denied", "won")}
+
+    def ask(_):
+        start = time.perf_counter()
+        answer = ai.generate_response("Which languages are taught?", CONTEXT, [])
+        assert answer == server.answer, answer
+        return time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(ask, range(requests_count)))
+    time.sleep(settle)  # let calls that lost a hedge race finish before counting
+
+    calls = sum(server.requests.values()) - before_calls
+    hedges = {outcome: int(hedged_requests.value(outcome=outcome) - count) for outcome, count in before_hedges.items()}
+    print(f"{label:<16} p50 {percentile(latencies, 0.5) * 1000:6.0f} ms   p95 {percentile(latencies, 0.95) * 1000:6.0f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.0f} ms   max {max(latencies) * 1000:6.0f} ms   "
+          f"HF calls/answer {calls / requests_count:.3f}   hedges {hedges}")
+    return latencies, calls, hedges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedged HF requests vs sequential fallback")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow", type=float, default=2.0)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    args = parser.parse_args()
+
+    server = StubHFServer({MISTRAL: "tail", LLAMA: "tail", FLAN: "ok"}, slow_seconds=args.slow,
+                          latency=args.latency, tail_rate=args.tail_rate).start()
+    settings.HF_API_URL = server.url
+    settings.GEMINI_API_KEY = ""
+    os.environ["HF_TOKEN"] = "bench-token"
+
+    print(f"🪃 {args.requests} answers, {args.concurrency} concurrent; HF models take {args.latency * 1000:.0f} ms, "
+          f"{args.tail_rate:.0%} take {args.slow:.1f}s\n")
+    settings.HEDGE_ENABLED = False
+    sequential, sequential_calls, _ = drive("sequential", new_service(), server, args.requests, args.concurrency, args.slow)
+    settings.HEDGE_ENABLED = True
+    ai = new_service()
+    hedged, hedged_calls, hedges = drive("hedged", ai, server, args.requests, args.concurrency, args.slow)
+    assert percentile(hedged, 0.99) < percentile(sequential, 0.99) / 2
+    assert hedges["fired"] <= settings.HEDGE_BUDGET_BURST + settings.HEDGE_BUDGET_RATIO * args.requests
+
+    # Mistral suddenly degrades: its p95 still reflects fast answers, so every request would hedge
+    # and double the calls; the budget holds the extra calls to HEDGE_BUDGET_RATIO
+    print(f"\nMistral fast, then slow; budget {settings.HEDGE_BUDGET_RATIO:.0%} + burst {settings.HEDGE_BUDGET_BURST}:")
+    ai.close()
+    ai = new_service()
+    server.modes[MISTRAL] = "ok"
+    drive("fast", ai, server, args.requests // 4, args.concurrency, 0)
+    server.modes[MISTRAL] = "slow"
+    _, _, capped = drive("slow", ai, server, args.requests // 4, args.concurrency, args.slow)
+    assert capped["fired"] <= settings.HEDGE_BUDGET_BURST + settings.HEDGE_BUDGET_RATIO * (args.requests // 4)
+    assert capped["denied"] > 0
+
+    ai.close()
+    server.stop()
+    print(f"\n✅ p99 {percentile(sequential, 0.99) * 1000:.0f} ms -> {percentile(hedged, 0.99) * 1000:.0f} ms "
+          f"for {(hedged_calls - sequential_calls) / args.requests:.1%} extra HF calls")
+
+
+if __name__ == "__main__":
+    main()
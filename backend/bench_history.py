@@ -0,0 +1,103 @@
+# backend/bench_history.py
+#
+# Runs one long conversation through POST /api/chat/ against the stub Gemini
+# model and records the prompt that reaches it on every turn. With history
+# compaction the prompt size levels off once the history budget is full,
+# instead of growing with every turn as resending the whole transcript would.
+#
+#   python bench_history.py --turns 40
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import httpx
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, StubGeminiModel, install_stub_gemini, make_vector_store
+
+QUESTIONS = [
+    "Which programming languages are taught?",
+    "What about the second one?",
+    "Tell me about the Core CS courses",
+    "And the math prerequisites?",
+    "How long does the curriculum take to complete?",
+    "Which course covers operating systems?",
+    "Why that one?",
+    "What projects will I build in Nand2Tetris?",
+]
+
+
+async def converse(app, turns):
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        session_id = None
+        for turn in range(turns):
+            # Number the questions so the answer cache never short-circuits a turn
+            message = f"{QUESTIONS[turn % len(QUESTIONS)]} (turn {turn + 1})"
+            response = await client.post("/api/chat/", json={"message": message, "session_id": session_id})
+            response.raise_for_status()
+            body = response.json()
+            session_id = body["session_id"]
+            results.append((message, body["response"], body["usage"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size over a long conversation")
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+
+    install_stub_gemini(latency=0.0)
+    # Every turn should build a prompt, not come from the course catalog
+    settings.COURSE_CATALOG_ENABLED = False
+    # Long answers, like the ones that made resending history expensive
+    StubGeminiModel.answer = ("OSSU covers this in several courses. " * 40).strip()
+    prompts = []
+    original = StubGeminiModel.generate_content
+
+    def recording(self, prompt, *args, **kwargs):
+        prompts.append(prompt)
+        return original(self, prompt, *args, **kwargs)
+
+    StubGeminiModel.generate_content = recording
+
+    from app.main import app
+    from app.services.ai_service import AIService
+    from app.services.conversation import estimate_tokens
+    from app.services.session_store import create_session_store
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.state.vector_store = make_vector_store(StubEmbeddings())
+        app.state.ai_service = AIService()
+        app.state.ai_service.warm_up()
+        app.state.session_store = create_session_store()
+        app.state.processor = None
+        app.state.is_ready = True
+        prompts.clear()  # drop the warm-up probe
+        results = asyncio.run(converse(app, args.turns))
+
+    print(f"💬 {args.turns} turns, history budget {settings.HISTORY_TOKEN_BUDGET} + "
+          f"summary {settings.HISTORY_SUMMARY_TOKENS} tokens\n")
+    print(f"{'turn':>4}  {'prompt':>7}  {'history':>7}  {'summary':>7}  {'full transcript':>15}")
+    transcript = 0
+    for turn, ((message, response, usage), prompt) in enumerate(zip(results, prompts), start=1):
+        if turn in (1, 2, 3, 5, 10) or turn % 10 == 0:
+            print(f"{turn:4d}  {usage['prompt']:7d}  {usage['history_recent']:7d}  "
+                  f"{usage['history_summary']:7d}  {transcript:15d}")
+        assert usage["prompt"] == estimate_tokens(prompt)
+        transcript += estimate_tokens(message) + estimate_tokens(response)
+
+    largest = max(usage["prompt"] for _, _, usage in results)
+    print(f"\n✅ Largest prompt {largest} tokens; resending the transcript would have reached {transcript}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# backend/bench_http_pool.py
+#
+# Sends HuggingFace requests to a local stub of the Inference API, once with a
+# new connection per call (module-level requests.post, as before) and once
+# through AIService's pooled keep-alive client. The stub counts the TCP
+# connections it accepts, so reuse is checked from the server side as well as
+# from the client's http_client_connections_opened_total metric.
+#
+#   python bench_http_pool.py --requests 200 --concurrency 8
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubHFServer
+
+MODEL = "google/flan-t5-large"
+PAYLOAD = {"inputs": "Which languages are taught?", "parameters": {"max_new_tokens": 300}}
+
+
+def drive(label, call, server, requests_count, concurrency):
+    connections = server.connections
+    latencies = []
+
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    opened = server.connections - connections
+    print(f"{label:<26} {requests_count / elapsed:7.0f} req/s   p50 {statistics.median(latencies) * 1000:6.2f} ms   "
+          f"connections opened {opened:4d}")
+    return opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HF client connection reuse")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = StubHFServer({MODEL: "ok"}).start()
+    settings.HF_API_URL = server.url
+    os.environ["HF_TOKEN"] = "bench-token"
+
+    from app.services.ai_service import AIService
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = AIService()
+    url = ai._get_hf_url(MODEL)
+
+    def per_call():
+        headers = {"Authorization": f"Bearer {ai.hf_token}"}
+        response = requests.post(url, headers=headers, json=PAYLOAD, timeout=30)
+        assert response.status_code == 200
+
+    def pooled():
+        assert ai._call_huggingface(MODEL, PAYLOAD, timeout=30)
+
+    print(f"🔌 {args.requests} HF requests, {args.concurrency} concurrent, pool size {settings.HF_POOL_SIZE}\n")
+    fresh = drive("new connection per call", per_call, server, args.requests, args.concurrency)
+    reused = drive(f"pooled ({ai.hf_client.protocol})", pooled, server, args.requests, args.concurrency)
+
+    stats = ai.hf_client.stats()
+    print(f"\nclient metrics: {stats}")
+    assert fresh == args.requests
+    assert reused <= max(args.concurrency, settings.HF_POOL_SIZE)
+    assert stats["connections_opened"] == reused
+
+    # Streaming responses hand their connection back to the pool too
+    before = server.connections
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(5):
+            assert "".join(ai.stream_response("Which languages are taught?", [], []))
+    assert server.connections == before
+
+    ai.close()
+    server.stop()
+    print(f"\n✅ {args.requests} requests over {reused} connections instead of {fresh}")
+
+
+if __name__ == "__main__":
+    main()
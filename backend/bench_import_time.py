@@ -0,0 +1,80 @@
+# backend/bench_import_time.py
+#
+# Import-time profile of the backend, from `python -X importtime`. Imports
+# `app.main` in a fresh interpreter (best of `--runs`), prints the modules
+# with the largest cumulative import time, and fails if the import takes
+# longer than `--budget` seconds or loads one of the heavy providers
+# (Chroma, the Gemini SDK, langchain, sentence-transformers/torch). Those are
+# loaded when a store is opened or a provider is configured, not on import.
+#
+#   python bench_import_time.py --budget 1.5
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+
+HEAVY_MODULES = (
+    "chromadb",
+    "google.generativeai",
+    "langchain",
+    "langchain_community",
+    "langchain_core",
+    "langchain_google_genai",
+    "sentence_transformers",
+    "torch",
+)
+
+
+def profile(module):
+    """Import `module` in a fresh interpreter; return {module: (self_us, cumulative_us)} in import order."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of app.main with a startup budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget", type=float, default=1.5, help="max seconds to import the module")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    timings = min(runs, key=lambda run: run[args.module][1])
+    total = timings[args.module][1] / 1e6
+
+    print(f"⏱️  import {args.module}: {total:.3f}s (best of {args.runs}), {len(timings)} modules\n")
+    print(f"{'cumulative':>10} {'self':>8}  module")
+    top = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in top:
+        print(f"{cumulative_us / 1000:8.1f}ms {self_us / 1000:6.1f}ms  {name}")
+
+    loaded = [name for name in HEAVY_MODULES if name in timings]
+    app_modules = sorted((name for name in timings if name == "app" or name.startswith("app.")),
+                         key=lambda name: timings[name][0], reverse=True)[:5]
+    print("\nslowest app modules (self): " +
+          ", ".join(f"{name} {timings[name][0] / 1000:.1f}ms" for name in app_modules))
+
+    assert not loaded, f"heavy modules imported eagerly: {loaded}"
+    assert total <= args.budget, f"import took {total:.3f}s, budget {args.budget:.3f}s"
+    print(f"\n✅ {total:.3f}s within the {args.budget:.1f}s budget, no heavy providers loaded on import")
+
+
+if __name__ == "__main__":
+    main()
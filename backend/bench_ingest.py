@@ -0,0 +1,71 @@
+# backend/bench_ingest.py
+#
+# Measures ingestion throughput (chunks/sec) of the markdown corpus into a
+# throwaway Chroma directory, comparing the old serial 10-chunk batches with
+# backend-sized batches on a worker pool. Stub embeddings model a network
+# backend: fixed latency per request plus a small cost per text, with an
+# optional share of requests failing with 429s.
+#
+#   python bench_ingest.py --latency 0.1 --rate-limit 0.05
+
+import argparse
+import contextlib
+import io
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings
+
+
+def run(label, documents, batch_size, workers, args):
+    from app.services.vector_store import VectorStore
+
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    settings.EMBEDDING_BATCH_SIZE = batch_size
+    settings.EMBEDDING_WORKERS = workers
+    embeddings = StubEmbeddings(latency=args.latency, per_text_latency=args.per_text_latency,
+                                rate_limit_rate=args.rate_limit)
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = VectorStore(embeddings=embeddings)
+        store.create_or_load_vectorstore([])
+    stats = store.ingest(documents)
+    print(f"{label:<34} {stats['seconds'] * 1000:9.1f} ms   {stats['chunks_per_second']:8.1f} chunks/sec   "
+          f"requests {embeddings.calls:4d}   429s retried {embeddings.rate_limited:3d}   stored {store.get_document_count()}")
+    shutil.rmtree(settings.CHROMA_DIR, ignore_errors=True)
+    return stats["chunks_per_second"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding ingestion throughput benchmark")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub latency per embedding request (s)")
+    parser.add_argument("--per-text-latency", type=float, default=0.001, help="stub latency per embedded text (s)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of requests failing with 429")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from app.services.document_processor import DocumentProcessor
+    from app.services.ingestion import BATCH_SIZE_DEFAULTS
+    documents = DocumentProcessor(settings.MARKDOWN_DIR).process_documents()
+
+    print(f"⏱️  {len(documents)} chunks, stub request latency {args.latency * 1000:.0f} ms, "
+          f"429 rate {args.rate_limit:.0%}\n")
+
+    baseline = run("serial, batch 10 (previous)", documents, 10, 1, args)
+    batch = BATCH_SIZE_DEFAULTS["gemini"]
+    run(f"serial, batch {batch}", documents, batch, 1, args)
+    run(f"{args.workers} workers, batch 32", documents, 32, args.workers, args)
+    best = run(f"{args.workers} workers, batch {batch}", documents, batch, args.workers, args)
+
+    print(f"\n✅ Throughput {best / baseline:.1f}x the previous serial ingestion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# backend/bench_intents.py
+#
+# Per-query cost of the intent matcher. Times classify() (run once per request:
+# a dict lookup decides canned answers, the keyword scan waits until a fallback
+# needs it) against the keyword chains it replaced, which lower-cased and
+# substring-scanned the query again in each stage, checks classify() is not
+# slower, and checks both agree on which topic every question gets. Then starts the app in-process
+# (stub embeddings, stub Gemini with a fixed latency) and compares POST
+# /api/chat/ latency for canned questions with canned answers on and off,
+# checking canned answers skip retrieval and Gemini on REST, SSE and /ws.
+#
+#   python bench_intents.py --llm-latency 0.2 --requests 30
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.chat_service import SUGGESTED_QUESTIONS
+from app.services.intents import classify, first_topic
+from bench_stubs import StubEmbeddings, StubGeminiModel, install_stub_gemini
+
+CANNED = {
+    "What is OSSU?": "about_ossu",
+    "what's ossu": "about_ossu",
+    "Tell me about the Open Source Society University": "about_ossu",
+    "Hi": "greeting",
+    "hello there!": "greeting",
+    "help": "help",
+    "What can you do?": "help",
+}
+
+QUESTIONS = SUGGESTED_QUESTIONS + list(CANNED) + [
+    "What programming languages are taught in OSSU?",
+    "How long does the core curriculum take?",
+    "What is the duration of Core CS?",
+    "Tell me about Systematic Program Design",
+    "How many hours per week is Mathematics for Computer Science?",
+    "Which courses should I take after CS50 if I want to learn about operating systems and networking?",
+    "What about the final project?",
+]
+
+# The old chains only knew the acronym; the matcher also knows the spelled-out name
+LEGACY_MISSES = {"Tell me about the Open Source Society University"}
+
+
+def legacy_topics(query):
+    """The pre-matcher keyword chains: the AIService and ChatService fallbacks each re-scan the query."""
+    query_lower = query.lower()
+    if 'ossu' in query_lower and ('what' in query_lower or 'about' in query_lower):
+        ai_topic = "about_ossu"
+    elif 'core cs' in query_lower or 'core curriculum' in query_lower:
+        ai_topic = "core_cs"
+    elif 'programming language' in query_lower:
+        ai_topic = "languages"
+    else:
+        ai_topic = None
+    message_lower = query.lower()
+    if 'programming language' in message_lower:
+        chat_topic = "languages"
+    elif 'ossu' in message_lower and ('what' in message_lower or 'about' in message_lower):
+        chat_topic = "about_ossu"
+    elif 'how long' in message_lower or 'duration' in message_lower:
+        chat_topic = "duration"
+    else:
+        chat_topic = None
+    return ai_topic, chat_topic
+
+
+def matcher_topics(query):
+    """The same lookups from one classify() pass, in each stage's topic order."""
+    intent = classify(query)
+    return (first_topic(intent, ("about_ossu", "core_cs", "languages")),
+            first_topic(intent, ("languages", "about_ossu", "duration")))
+
+
+def micros(func, calls, repeats=5):
+    """Best of repeats, so a busy machine does not decide the comparison."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def timed_chat(client, message, i):
+    start = time.perf_counter()
+    response = client.post("/api/chat/", json={"message": message, "session_id": f"bench-{i}"})
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+def check_streams(client):
+    with client.stream("POST", "/api/chat/stream", json={"message": "hello"}) as sse:
+        events = [json.loads(line[len("data:"):]) for line in sse.iter_lines() if line.startswith("data:")]
+    assert events[-1]["response"].startswith("Hi!"), events
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(json.dumps({"message": "What is OSSU?"}))
+        reply = websocket.receive_json()
+    assert "Open Source Society University" in reply["response"], reply
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent matcher cost and canned answers")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--requests", type=int, default=30, help="chat requests per setting")
+    args = parser.parse_args()
+
+    mismatches = [query for query in QUESTIONS
+                  if query not in LEGACY_MISSES and legacy_topics(query) != matcher_topics(query)]
+    wrong_canned = [query for query in QUESTIONS if classify(query)[1] != CANNED.get(query)]
+    classify_us = micros(lambda: [classify(query) for query in QUESTIONS], 500) / len(QUESTIONS)
+    legacy_us = micros(lambda: [legacy_topics(query) for query in QUESTIONS], 500) / len(QUESTIONS)
+    matcher_us = micros(lambda: [matcher_topics(query) for query in QUESTIONS], 500) / len(QUESTIONS)
+    longest = max(QUESTIONS, key=len)
+    long_us = micros(lambda: classify(longest), 5000)
+
+    print(f"🔎 {len(QUESTIONS)} questions, average {statistics.mean(map(len, QUESTIONS)):.0f} characters")
+    print(f"   classify, every request           {classify_us:6.2f} µs/query   ({len(longest)}-char query {long_us:.2f} µs)")
+    print(f"   classify + both fallback lookups  {matcher_us:6.2f} µs/query   (provider failures only)")
+    print(f"   legacy keyword chains             {legacy_us:6.2f} µs/query")
+    print(f"   topic mismatches vs legacy chains: {len(mismatches)}, wrong canned intents: {len(wrong_canned)}\n")
+
+    logging.disable(logging.WARNING)
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    settings.EMBEDDING_CACHE_ENABLED = False
+    settings.BACKGROUND_INDEXING = False
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.SINGLE_FLIGHT_ENABLED = False
+    install_stub_gemini(latency=args.llm_latency)
+
+    from app import main as app_main
+    from app.services.vector_store import VectorStore
+
+    app_main.VectorStore = lambda: VectorStore(embeddings=StubEmbeddings())
+    app = app_main.app
+
+    canned = list(CANNED)
+    timings = {}
+    gemini_calls = {}
+    embed_calls = {}
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        embeddings = app.state.vector_store.embeddings
+        for label, enabled in (("canned off", False), ("canned on", True)):
+            settings.CANNED_ANSWERS_ENABLED = enabled
+            calls_before, embeds_before = StubGeminiModel.calls, embeddings.calls
+            timings[label] = [timed_chat(client, canned[i % len(canned)], f"{label}-{i}")[0] for i in range(args.requests)]
+            gemini_calls[label] = StubGeminiModel.calls - calls_before
+            embed_calls[label] = embeddings.calls - embeds_before
+        calls_before = StubGeminiModel.calls
+        timed_chat(client, "Tell me about Systematic Program Design", "open-ended")
+        open_ended_calls = StubGeminiModel.calls - calls_before
+        calls_before, embeds_before = StubGeminiModel.calls, embeddings.calls
+        check_streams(client)
+        stream_calls = StubGeminiModel.calls - calls_before + embeddings.calls - embeds_before
+        metrics_text = client.get("/metrics").text
+    shutil.rmtree(settings.CHROMA_DIR, ignore_errors=True)
+
+    print(f"💬 POST /api/chat/, {args.requests} canned questions, stub Gemini {args.llm_latency * 1000:.0f} ms")
+    for label, values in timings.items():
+        print(f"   {label:<11} median {statistics.median(values) * 1000:7.1f} ms   "
+              f"Gemini calls {gemini_calls[label]:3d}   embedding calls {embed_calls[label]}")
+    print(f"   open-ended question with canned answers on: {open_ended_calls} Gemini call\n")
+
+    assert not mismatches, f"matcher and legacy chains disagree on: {mismatches}"
+    assert classify_us <= legacy_us, f"classify {classify_us:.2f} µs slower than the legacy chains {legacy_us:.2f} µs"
+    assert not wrong_canned, f"wrong canned intent for: {wrong_canned}"
+    assert gemini_calls["canned on"] == 0 and embed_calls["canned on"] == 0 and stream_calls == 0
+    assert gemini_calls["canned off"] == args.requests and open_ended_calls == 1
+    assert 'outcome="canned"' in metrics_text and 'canned_answers_total{intent="about_ossu"}' in metrics_text
+    speedup = statistics.median(timings["canned off"]) / statistics.median(timings["canned on"])
+    print(f"✅ {classify_us:.2f} µs per query to classify (legacy chains {legacy_us:.2f} µs); canned questions answered {speedup:.0f}x faster "
+          f"with no retrieval or Gemini call")
+
+
+if __name__ == "__main__":
+    main()
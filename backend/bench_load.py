@@ -0,0 +1,357 @@
+# backend/bench_load.py
+#
+# Offline load test of the real app. Starts uvicorn serving app.main in a
+# child process, with the stub Gemini model and stub embeddings from
+# bench_stubs.py (seeded, so runs repeat). The stubs have configurable
+# latency, log-normal jitter and injected errors (429s, 503s, timeouts). The
+# corpus is indexed through the normal startup path into a throwaway
+# directory. The answer cache, the course catalog and the canned answers are
+# off unless --response-cache / --course-catalog / --canned-answers are given,
+# so every request runs retrieval and generation. Closed-loop clients then drive
+# POST /api/chat/ and /ws at each concurrency level: every worker keeps one
+# session (and on /ws one connection) and sends its next question as soon as
+# the last one is answered. Per scenario it reports:
+#   - throughput and p50/p95/p99 latency
+#   - failed requests
+#   - the server's RSS after the scenario and its peak RSS (Linux)
+#   - LLM outcomes, read from /metrics
+# Results can be saved as a baseline, and later runs compared against it:
+# any scenario whose p95/p99 or peak memory grew, or whose throughput fell,
+# by more than --tolerance fails the run. No network access is needed; the
+# server listens on 127.0.0.1 only.
+#
+#   python bench_load.py                                        # REST and /ws at concurrency 1, 8, 32
+#   python bench_load.py --transport ws --stream --concurrency 64 --requests 1000
+#   python bench_load.py --llm-jitter 0.5 --llm-errors rate_limited=0.05 timeout=0.01
+#   python bench_load.py --save-baseline data/load_baseline.json
+#   python bench_load.py --baseline data/load_baseline.json --tolerance 0.15
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+
+# Scenario fields compared against a baseline: (field, higher is better)
+COMPARED = (("throughput", True), ("p95_ms", False), ("p99_ms", False), ("peak_rss_mb", False))
+
+_METRIC_LINE = re.compile(r'^(\w+)\{([^}]*)\} (\S+)$')
+
+
+def parse_errors(specs):
+    """["rate_limited=0.05", "timeout=0.01"] -> {"rate_limited": 0.05, "timeout": 0.01}"""
+    rates = {}
+    for spec in specs or []:
+        outcome, _, rate = spec.partition("=")
+        rates[outcome] = float(rate)
+    return rates
+
+
+def serve(args):
+    """Child process: the real app on 127.0.0.1:<port> with stub providers."""
+    import uvicorn
+    from bench_stubs import StubEmbeddings, install_stub_gemini
+
+    install_stub_gemini(args.llm_latency, args.llm_jitter, parse_errors(args.llm_errors), args.seed)
+    settings.BACKGROUND_INDEXING = False
+    settings.RESPONSE_CACHE_ENABLED = args.response_cache
+    settings.COURSE_CATALOG_ENABLED = args.course_catalog
+    settings.CANNED_ANSWERS_ENABLED = args.canned_answers
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_load_")
+    settings.EMBEDDING_CACHE_PATH = os.path.join(settings.CHROMA_DIR, "embedding_cache.sqlite3")
+
+    from app import main
+    from app.services.vector_store import VectorStore
+
+    main.VectorStore = lambda: VectorStore(embeddings=StubEmbeddings(
+        latency=args.embed_latency, jitter=args.embed_jitter, seed=args.seed
+    ))
+    uvicorn.run(main.app, host="127.0.0.1", port=args.serve, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    port = free_port()
+    command = [sys.executable, __file__, "--serve", str(port),
+               "--llm-latency", str(args.llm_latency), "--llm-jitter", str(args.llm_jitter),
+               "--embed-latency", str(args.embed_latency), "--embed-jitter", str(args.embed_jitter),
+               "--seed", str(args.seed)]
+    if args.response_cache:
+        command.append("--response-cache")
+    if args.course_catalog:
+        command.append("--course-catalog")
+    if args.canned_answers:
+        command.append("--canned-answers")
+    if args.llm_errors:
+        command += ["--llm-errors", *args.llm_errors]
+    # Only the stubs may answer: no HF fallback, no Redis
+    env = dict(os.environ, HF_TOKEN="", REDIS_URL="", PYTHONUNBUFFERED="1")
+    log = tempfile.NamedTemporaryFile(prefix="bench_load_server_", suffix=".log", delete=False)
+    process = subprocess.Popen(command, cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=log)
+    return process, f"http://127.0.0.1:{port}", log.name
+
+
+def wait_until_ready(process, base_url, log_path, timeout=300):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}, see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2).json().get("vector_store_ready"):
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout}s, see {log_path}")
+
+
+def server_memory(pid):
+    """(current RSS, peak RSS) of the server in MB, from /proc (None elsewhere)."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+    to_mb = lambda name: int(fields[name].split()[0]) / 1024 if name in fields else None
+    return to_mb("VmRSS"), to_mb("VmHWM")
+
+
+def scrape(base_url):
+    """{(metric, labels): value} for the LLM outcome series in /metrics."""
+    import httpx
+
+    values = {}
+    for line in httpx.get(f"{base_url}/metrics", timeout=10).text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match and match.group(1) in ("llm_provider_requests_total", "llm_fallback_depth_count"):
+            values[(match.group(1), match.group(2))] = float(match.group(3))
+    return values
+
+
+def llm_outcomes(before, after):
+    """Provider attempts by outcome, and answers that fell back to context, during one scenario."""
+    outcomes = {}
+    for (name, labels), value in after.items():
+        delta = value - before.get((name, labels), 0.0)
+        if not delta:
+            continue
+        if name == "llm_provider_requests_total":
+            outcome = re.search(r'outcome="([^"]*)"', labels).group(1)
+            outcomes[outcome] = outcomes.get(outcome, 0) + int(delta)
+        elif 'answered_by="context"' in labels:
+            outcomes["answered_from_context"] = int(delta)
+    return outcomes
+
+
+def build_questions(distinct, seed):
+    """A fixed mix of the suggested questions and per-course questions from the markdown tables."""
+    from app.services.chat_service import SUGGESTED_QUESTIONS
+    from app.services.markdown_chunker import parse_blocks
+
+    courses = set()
+    for path in sorted(Path(settings.MARKDOWN_DIR).rglob("*.md")):
+        for block in parse_blocks(path.read_text(encoding="utf-8")):
+            if block.kind == "table":
+                for row in block.text.split("\n")[2:]:
+                    name = re.sub(r"\]\(.*", "", row.split("|")[0]).strip(" [")
+                    if name:
+                        courses.add(name)
+    questions = list(SUGGESTED_QUESTIONS)
+    for course in sorted(courses):
+        questions += [f"How long does {course} take?", f"What are the prerequisites for {course}?"]
+    rng = random.Random(seed)
+    rng.shuffle(questions)
+    return questions[:distinct]
+
+
+async def rest_worker(client, worker, jobs, questions, timings, failures):
+    for i in jobs:
+        start = time.perf_counter()
+        try:
+            response = await client.post("/api/chat/", json={
+                "message": questions[i % len(questions)], "session_id": f"load-{worker}"
+            })
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        timings.append(time.perf_counter() - start)
+        failures[0] += not ok
+
+
+async def ws_worker(base_url, jobs, questions, stream, timings, failures):
+    import websockets
+
+    async with websockets.connect(base_url.replace("http", "ws", 1) + "/ws", max_size=None) as websocket:
+        for i in jobs:
+            start = time.perf_counter()
+            try:
+                await websocket.send(json.dumps({"message": questions[i % len(questions)], "stream": stream}))
+                while True:
+                    frame = json.loads(await websocket.recv())
+                    if not stream or frame.get("type") == "done":
+                        break
+                ok = "response" in frame and not frame["response"].startswith("Sorry, I encountered an error")
+            except Exception:
+                ok = False
+            timings.append(time.perf_counter() - start)
+            failures[0] += not ok
+
+
+async def run_scenario(base_url, transport, concurrency, requests, questions, stream):
+    import httpx
+
+    timings, failures = [], [0]
+    jobs = iter(range(requests))  # shared: each worker takes the next request number when it is free
+    start = time.perf_counter()
+    if transport == "rest":
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            await asyncio.gather(*(rest_worker(client, w, jobs, questions, timings, failures)
+                                   for w in range(concurrency)))
+    else:
+        await asyncio.gather(*(ws_worker(base_url, jobs, questions, stream, timings, failures)
+                               for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    pick = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))] * 1000
+    return {
+        "requests": len(timings),
+        "failed": failures[0],
+        "throughput": len(timings) / elapsed,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print each scenario against the baseline; return the regressions beyond the tolerance."""
+    regressions = []
+    print(f"\n📊 against baseline ({baseline['created']}), tolerance {tolerance:.0%}")
+    if baseline["config"] != results["config"]:
+        changed = sorted(k for k in results["config"] if results["config"][k] != baseline["config"].get(k))
+        print(f"   ⚠️  stub settings differ from the baseline's: {', '.join(changed)}")
+    for key, scenario in results["scenarios"].items():
+        base = baseline["scenarios"].get(key)
+        if base is None:
+            print(f"   {key:<10} not in baseline")
+            continue
+        cells = []
+        for field, higher_is_better in COMPARED:
+            if scenario.get(field) is None or not base.get(field):
+                continue
+            change = scenario[field] / base[field] - 1
+            worse = -change if higher_is_better else change
+            flag = " ❌" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{key} {field} {change:+.1%}")
+            cells.append(f"{field} {change:+6.1%}{flag}")
+        print(f"   {key:<10} " + "   ".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test over REST and /ws with stub providers")
+    parser.add_argument("--transport", nargs="+", default=["rest", "ws"], choices=("rest", "ws"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--stream", action="store_true", help="use the streaming /ws protocol (latency = until 'done')")
+    parser.add_argument("--distinct", type=int, default=60, help="distinct questions in the mix")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub Gemini median latency, seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="log-normal sigma of the Gemini latency")
+    parser.add_argument("--llm-errors", nargs="*", default=[],
+                        help="injected Gemini failures, e.g. rate_limited=0.05 unavailable=0.02 timeout=0.01")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="stub query embedding latency, seconds")
+    parser.add_argument("--embed-jitter", type=float, default=0.3)
+    parser.add_argument("--response-cache", action="store_true", help="keep the answer cache on")
+    parser.add_argument("--course-catalog", action="store_true",
+                        help="answer course questions from the catalog instead of the LLM")
+    parser.add_argument("--canned-answers", action="store_true",
+                        help="answer greetings and \"What is OSSU?\" with fixed answers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    questions = build_questions(args.distinct, args.seed)
+    process, base_url, log_path = start_server(args)
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {name: getattr(args, name) for name in (
+            "requests", "stream", "distinct", "response_cache", "course_catalog", "canned_answers", "llm_latency",
+            "llm_jitter", "llm_errors", "embed_latency", "embed_jitter", "seed")},
+        "scenarios": {},
+    }
+    try:
+        start = time.perf_counter()
+        wait_until_ready(process, base_url, log_path)
+        rss, _ = server_memory(process.pid)
+        print(f"🚀 server ready in {time.perf_counter() - start:.1f}s"
+              + (f", RSS {rss:.0f} MB" if rss else "")
+              + f"; stub Gemini {args.llm_latency * 1000:.0f} ms (jitter {args.llm_jitter}), "
+              f"errors {parse_errors(args.llm_errors) or 'none'}, {len(questions)} distinct questions\n")
+        asyncio.run(run_scenario(base_url, "rest", 1, 10, questions, False))  # warm up
+
+        print(f"{'scenario':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7} "
+              f"{'RSS MB':>7} {'peak MB':>8}  LLM outcomes")
+        for transport, concurrency in itertools.product(args.transport, args.concurrency):
+            key = f"{transport}@{concurrency}"
+            before = scrape(base_url)
+            scenario = asyncio.run(run_scenario(base_url, transport, concurrency, args.requests, questions,
+                                                args.stream))
+            scenario["rss_mb"], scenario["peak_rss_mb"] = server_memory(process.pid)
+            scenario["llm"] = llm_outcomes(before, scrape(base_url))
+            results["scenarios"][key] = scenario
+            memory = (f"{scenario['rss_mb']:7.0f} {scenario['peak_rss_mb']:8.0f}" if scenario["rss_mb"]
+                      else f"{'-':>7} {'-':>8}")
+            print(f"{key:<10} {scenario['throughput']:8.1f} {scenario['p50_ms']:8.1f} {scenario['p95_ms']:8.1f} "
+                  f"{scenario['p99_ms']:8.1f} {scenario['failed']:7d} {memory}  "
+                  + ", ".join(f"{name} {count}" for name, count in sorted(scenario["llm"].items())))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\n💾 results written to {path}")
+
+    failed = sum(scenario["failed"] for scenario in results["scenarios"].values())
+    assert not failed, f"{failed} requests failed, see {log_path}"
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        assert not regressions, f"regressions beyond {args.tolerance:.0%}: {'; '.join(regressions)}"
+        print(f"\n✅ No scenario regressed by more than {args.tolerance:.0%}")
+    else:
+        print(f"\n✅ {len(results['scenarios'])} scenarios, no failed requests")
+
+
+if __name__ == "__main__":
+    main()
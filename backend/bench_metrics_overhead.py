@@ -0,0 +1,160 @@
+# backend/bench_metrics_overhead.py
+#
+# Cost of the latency instrumentation. Times the metric primitives on their
+# own (counter increment, histogram observation, a timed block, starting a
+# request ID, rendering /metrics), then serves POST /api/chat/ in-process
+# with a zero-latency stub Gemini and stub embeddings, alternating request by
+# request between live instruments and instruments turned into no-ops (so
+# machine noise hits both alike), and reports the median difference. Also
+# checks that /metrics exposes every stage and that request IDs come back on
+# REST, SSE and /ws.
+#
+#   python bench_metrics_overhead.py --requests 1000
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, install_stub_gemini, make_vector_store
+
+STAGE_METRICS = (
+    "query_embedding_seconds",
+    "vector_search_seconds",
+    "llm_prompt_build_seconds",
+    "llm_provider_attempt_seconds",
+    "llm_fallback_depth",
+    "chat_request_seconds",
+    "session_store_sessions",
+)
+
+
+def per_call_ns(func, calls=200_000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+ORIGINALS = {}
+
+
+def set_instruments(enabled):
+    """Make every counter, gauge and histogram update live, or a no-op."""
+    from app.metrics import Counter, Gauge, Histogram
+
+    for cls, name in ((Counter, "inc"), (Gauge, "set"), (Histogram, "observe")):
+        original = ORIGINALS.setdefault((cls, name), getattr(cls, name))
+        setattr(cls, name, original if enabled else (lambda self, *args, **kwargs: None))
+
+
+def timed_chat(client, i):
+    start = time.perf_counter()
+    response = client.post("/api/chat/", json={
+        "message": f"Which programming languages are taught? ({i})",
+        "session_id": f"bench-{i}"
+    })
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+def check_request_ids(client):
+    rest = client.post("/api/chat/", json={"message": "What is OSSU?"}, headers={"X-Request-ID": "bench-rest-1"})
+    assert rest.headers["X-Request-ID"] == "bench-rest-1", rest.headers
+    with client.stream("POST", "/api/chat/stream", json={"message": "What is OSSU?"},
+                       headers={"X-Request-ID": "bench-sse-1"}) as sse:
+        assert sse.headers["X-Request-ID"] == "bench-sse-1"
+        first_event = next(line for line in sse.iter_lines() if line.startswith("data:"))
+        assert json.loads(first_event[len("data:"):])["request_id"] == "bench-sse-1"
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(json.dumps({"message": "What is OSSU?", "request_id": "bench-ws-1"}))
+        assert websocket.receive_json()["request_id"] == "bench-ws-1"
+        websocket.send_text(json.dumps({"message": "What is OSSU?"}))
+        assert websocket.receive_json()["request_id"], "no request ID generated for /ws"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead per chat request")
+    parser.add_argument("--requests", type=int, default=1000, help="chat requests per setting")
+    args = parser.parse_args()
+
+    from app.metrics import metrics
+    from app.request_context import start_request
+
+    counter = metrics.counter("bench_overhead_total", "Benchmark counter")
+    histogram = metrics.histogram("bench_overhead_seconds", "Benchmark histogram")
+
+    def timed_block():
+        with histogram.time(stage="bench"):
+            pass
+
+    print("⏱️  metric primitives")
+    print(f"   counter inc          {per_call_ns(lambda: counter.inc(provider='bench', outcome='success')):7.0f} ns")
+    print(f"   histogram observe    {per_call_ns(lambda: histogram.observe(0.01, stage='bench')):7.0f} ns")
+    print(f"   timed block          {per_call_ns(timed_block):7.0f} ns")
+    print(f"   start_request        {per_call_ns(start_request):7.0f} ns\n")
+
+    install_stub_gemini(latency=0.0)
+    settings.BACKGROUND_INDEXING = False
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.COURSE_CATALOG_ENABLED = False
+    settings.SINGLE_FLIGHT_ENABLED = False
+    settings.EMBEDDING_CACHE_ENABLED = False
+
+    from app.main import app
+    from app.services.ai_service import AIService
+    from app.services.session_store import create_session_store
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()), TestClient(app) as client:
+        app.state.vector_store = make_vector_store(StubEmbeddings())
+        app.state.ai_service = AIService()
+        app.state.ai_service.warm_up()
+        app.state.session_store = create_session_store()
+        app.state.response_cache = None
+        app.state.processor = None
+        app.state.is_ready = True
+
+        check_request_ids(client)
+        for i in range(20):  # warm up
+            timed_chat(client, i)
+        timings = {"on": [], "off": []}
+        for i in range(2 * args.requests):
+            enabled = i % 2 == 0
+            set_instruments(enabled)
+            timings["on" if enabled else "off"].append(timed_chat(client, i))
+        set_instruments(True)
+
+        start = time.perf_counter()
+        exposition = client.get("/metrics")
+        scrape_ms = (time.perf_counter() - start) * 1000
+        render_ms = per_call_ns(metrics.render_prometheus, calls=200) / 1e6
+
+    assert exposition.headers["content-type"].startswith("text/plain")
+    missing = [name for name in STAGE_METRICS if f"# TYPE {name} " not in exposition.text]
+    on, off = statistics.median(timings["on"]), statistics.median(timings["off"])
+    overhead = on - off
+    print(f"💬 POST /api/chat/, {args.requests} requests per setting, zero-latency stub Gemini")
+    print(f"   instruments off      median {off * 1000:7.3f} ms")
+    print(f"   instruments on       median {on * 1000:7.3f} ms   ({overhead * 1e6:+.0f} µs, {overhead / off:+.2%})")
+    print(f"   /metrics scrape      {scrape_ms:.2f} ms ({len(exposition.text.splitlines())} lines, "
+          f"render alone {render_ms:.2f} ms)\n")
+
+    assert not missing, f"/metrics lacks {missing}"
+    assert overhead / off < 0.03, f"instrumentation adds {overhead / off:.1%} per request"
+    print("✅ Every stage exported, request IDs echoed on REST, SSE and /ws, "
+          f"instrumentation overhead {max(overhead, 0) * 1e6:.0f} µs per request (< 3%)")
+
+
+if __name__ == "__main__":
+    main()
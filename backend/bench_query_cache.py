@@ -0,0 +1,84 @@
+# backend/bench_query_cache.py
+#
+# Measures similarity_search with and without the in-memory query embedding LRU.
+# The workload replays the suggested questions (with case/whitespace variants,
+# the way users retype them) mixed with a share of one-off questions.
+#
+#   python bench_query_cache.py --latency 0.05 --queries 200 --unique 0.2
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, make_vector_store
+
+
+def workload(questions, count, unique_share, seed=0):
+    rng = random.Random(seed)
+    variants = [str.lower, str.upper, lambda q: f"  {q} ", lambda q: q.rstrip("?"), lambda q: q]
+    queries = []
+    for i in range(count):
+        if rng.random() < unique_share:
+            queries.append(f"Tell me something about topic number {i}")
+        else:
+            queries.append(rng.choice(variants)(rng.choice(questions)))
+    return queries
+
+
+def run(label, store, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        store.similarity_search(query, k=4)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    print(f"{label:<22} p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   total {sum(timings):6.2f} s")
+    return sum(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query embedding LRU benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per query embedding (s)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--unique", type=float, default=0.2, help="share of one-off questions")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from app.services.chat_service import SUGGESTED_QUESTIONS
+
+    settings.EMBEDDING_CACHE_ENABLED = False
+    queries = workload(SUGGESTED_QUESTIONS, args.queries, args.unique)
+    print(f"⏱️  stub query embedding latency {args.latency * 1000:.0f} ms, {len(queries)} queries\n")
+
+    settings.QUERY_EMBEDDING_CACHE_SIZE = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        uncached = make_vector_store(StubEmbeddings())
+    uncached.query_cache.max_entries = 0
+    uncached.embeddings.latency = args.latency
+    baseline = run("no query cache", uncached, queries)
+
+    settings.QUERY_EMBEDDING_CACHE_SIZE = 2048
+    with contextlib.redirect_stdout(io.StringIO()):
+        cached = make_vector_store(StubEmbeddings())
+    cached.embeddings.latency = args.latency
+    cached.query_cache.precompute(SUGGESTED_QUESTIONS)
+    with_cache = run("LRU + precomputed", cached, queries)
+
+    print(f"\n📊 {cached.query_cache.stats()}")
+    print(f"\n✅ {baseline / with_cache:.1f}x less time in similarity_search")
+
+
+if __name__ == "__main__":
+    main()
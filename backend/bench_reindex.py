@@ -0,0 +1,79 @@
+# backend/bench_reindex.py
+#
+# Compares the embedding cost of a full rebuild with incremental re-indexing
+# after editing or deleting a single markdown file. Works on a copy of the
+# corpus with stub embeddings (fixed latency per embedding call), so nothing
+# in data/ is touched and no API key is needed.
+#
+#   python bench_reindex.py --embed-latency 0.05
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs incremental re-index benchmark")
+    parser.add_argument("--embed-latency", type=float, default=0.05,
+                        help="stub latency per embedding request in seconds")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+    shutil.copytree(settings.MARKDOWN_DIR, corpus_dir, dirs_exist_ok=True)
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+
+    from app.services.document_processor import DocumentProcessor
+    from app.services.indexer import IncrementalIndexer
+    from app.services.vector_store import VectorStore
+
+    embeddings = StubEmbeddings(latency=args.embed_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        vector_store = VectorStore(embeddings=embeddings)
+        vector_store.create_or_load_vectorstore([])
+    indexer = IncrementalIndexer(vector_store, DocumentProcessor(corpus_dir))
+
+    def step(label, **kwargs):
+        embeddings.calls = embeddings.texts_embedded = 0
+        start = time.perf_counter()
+        stats = indexer.sync(**kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} {elapsed * 1000:9.1f} ms   chunks embedded {embeddings.texts_embedded:5d}   "
+              f"embedding requests {embeddings.calls:4d}   deleted {stats['chunks_deleted']:4d}   "
+              f"total {stats['total_chunks']}")
+        return elapsed
+
+    print(f"⏱️  stub embedding latency {args.embed_latency * 1000:.0f} ms per request\n")
+
+    full = step("full rebuild", full=True)
+    step("no-op sync")
+
+    edited = os.path.join(corpus_dir, "FAQ.md")
+    with open(edited, "a", encoding="utf-8") as f:
+        f.write("\n\n## Can I study part time?\n\nYes, most learners follow OSSU part time.\n")
+    one_file = step("edit FAQ.md")
+
+    os.remove(os.path.join(corpus_dir, "HELP.md"))
+    step("delete HELP.md")
+
+    print(f"\n✅ Re-indexing one edited file is {full / one_file:.0f}x faster than a full rebuild")
+
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    shutil.rmtree(settings.CHROMA_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# backend/bench_retrieval.py
+#
+# Compares dense, keyword (BM25) and hybrid retrieval on the markdown corpus.
+# Recall is measured on exact-term questions: for a sample of rare terms, a query
+# counts as a hit when one of the top-k chunks contains the term. Latency excludes
+# the query embedding (it is precomputed), so it shows the cost of retrieval itself.
+#
+#   python bench_retrieval.py --queries 100 --k 4
+#   python bench_retrieval.py --huggingface     # real MiniLM embeddings if installed
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, make_vector_store
+
+
+def rare_terms(documents, count, seed=0):
+    """Terms found in 1-3 chunks, the kind of exact names dense search tends to miss."""
+    from app.services.text_utils import tokenize
+
+    df = Counter()
+    for doc in documents:
+        df.update(set(tokenize(doc.page_content)))
+    candidates = sorted(term for term, n in df.items() if n <= 3 and len(term) >= 4 and not term.isdigit())
+    for name in ("nand2tetris", "cs50"):
+        if name in df and name not in candidates:
+            candidates.append(name)
+    rng = random.Random(seed)
+    return rng.sample(candidates, min(count, len(candidates)))
+
+
+def evaluate(store, terms, embeddings, mode, k):
+    from app.services.text_utils import tokenize
+
+    hits = 0
+    timings = []
+    for term in terms:
+        query = f"Which course covers {term}?"
+        start = time.perf_counter()
+        results = store.similarity_search(query, k=k, embedding=embeddings[query], mode=mode)
+        timings.append(time.perf_counter() - start)
+        if any(term in tokenize(result["content"]) for result in results):
+            hits += 1
+    timings.sort()
+    return {
+        "recall": hits / len(terms),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[max(0, int(len(timings) * 0.99) - 1)] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid retrieval benchmark")
+    parser.add_argument("--queries", type=int, default=100, help="number of rare-term questions")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--huggingface", action="store_true", help="use the MiniLM embeddings instead of the stub")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from app.services.document_processor import DocumentProcessor
+    from app.services.keyword_index import BM25Index
+
+    settings.EMBEDDING_CACHE_ENABLED = False
+    documents = DocumentProcessor(settings.MARKDOWN_DIR).process_documents()
+
+    start = time.perf_counter()
+    index = BM25Index()
+    index.add([str(i) for i in range(len(documents))],
+              [doc.page_content for doc in documents],
+              [doc.metadata for doc in documents])
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.remove([str(i) for i in range(10)])
+    index.add([str(i) for i in range(10)], [doc.page_content for doc in documents[:10]])
+    update_ms = (time.perf_counter() - start) * 1000
+    print(f"🗂️  BM25 index: {len(documents)} chunks built in {build_ms:.1f} ms, "
+          f"10-chunk update in {update_ms:.2f} ms\n")
+
+    embeddings = None
+    if args.huggingface:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = make_vector_store(embeddings or StubEmbeddings(), documents)
+
+    terms = rare_terms(documents, args.queries)
+    query_embeddings = {f"Which course covers {term}?": store.embed_query(f"Which course covers {term}?") for term in terms}
+    print(f"🔍 {len(terms)} exact-term questions, k={args.k}, "
+          f"{'MiniLM' if args.huggingface else 'stub'} embeddings\n")
+
+    for mode in ("dense", "keyword", "hybrid"):
+        result = evaluate(store, terms, query_embeddings, mode, args.k)
+        print(f"{mode:<8} recall@{args.k} {result['recall']:6.1%}   "
+              f"p50 {result['p50_ms']:6.2f} ms   p99 {result['p99_ms']:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
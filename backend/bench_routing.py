@@ -0,0 +1,133 @@
+# backend/bench_routing.py
+#
+# Drives AIService against failing providers: the stub Gemini model answers
+# with 429 quota errors and a local HTTP server stands in for the HuggingFace
+# Inference API with one model returning 503, one too slow to answer within
+# PROVIDER_TIMEOUT_SECONDS and one healthy. Compares per-request latency with a
+# fresh router per request (the old fixed fallback order) against the shared
+# circuit breakers, then checks half-open recovery and the overall deadline.
+#
+#   python bench_routing.py --requests 20
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubGeminiModel, StubHFServer, install_stub_gemini
+
+MISTRAL = "mistralai/Mistral-7B-Instruct-v0.2"
+LLAMA = "meta-llama/Llama-2-7b-chat-hf"
+FLAN = "google/flan-t5-large"
+CONTEXT = [{"content": "OSSU Core CS teaches Python, Racket and Java.", "metadata": {"source": "curriculum.md"}}]
+
+
+def ask(ai, stream=False):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        if stream:
+            answer = "".join(ai.stream_response("Which languages are taught?", CONTEXT, []))
+        else:
+            answer = ai.generate_response("Which languages are taught?", CONTEXT, [])
+    return time.perf_counter() - start, answer
+
+
+def run(ai, requests, fresh_router):
+    from app.services.provider_routing import ProviderRouter
+
+    latencies = []
+    for _ in range(requests):
+        if fresh_router:
+            ai.router = ProviderRouter(ai._provider_names())
+        elapsed, answer = ask(ai)
+        assert answer == StubGeminiModel.answer, answer
+        latencies.append(elapsed)
+    return latencies
+
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<28} mean {statistics.mean(latencies) * 1000:7.0f} ms   p50 {statistics.median(latencies) * 1000:7.0f} ms   "
+          f"p95 {p95 * 1000:7.0f} ms   first {latencies[0] * 1000:6.0f} ms   last {latencies[-1] * 1000:6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provider routing under failures")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--slow", type=float, default=5.0, help="seconds the slow HF model takes")
+    parser.add_argument("--timeout", type=float, default=2.0, help="PROVIDER_TIMEOUT_SECONDS")
+    args = parser.parse_args()
+
+    server = StubHFServer({MISTRAL: "503", LLAMA: "slow", FLAN: "ok"}, slow_seconds=args.slow).start()
+    settings.HF_API_URL = server.url
+    os.environ["HF_TOKEN"] = "bench-token"
+    settings.PROVIDER_TIMEOUT_SECONDS = args.timeout
+    settings.BREAKER_OPEN_SECONDS = 1.0
+    settings.BREAKER_MAX_OPEN_SECONDS = 2.0
+    install_stub_gemini(latency=0.3)
+    StubGeminiModel.failure = "429 Resource has been exhausted (e.g. check quota)."
+    # The flan stub answers like Gemini so every request can be checked
+    server.answer = StubGeminiModel.answer
+
+    from app.services.ai_service import AIService
+
+    print(f"🔀 Gemini 429 (300 ms), {MISTRAL.split('/')[1]} 503, {LLAMA.split('/')[1]} slow ({args.slow:.0f}s, "
+          f"timeout {args.timeout:.0f}s), "
+          f"{FLAN.split('/')[1]} ok; {args.requests} requests\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = AIService()
+    fixed = run(ai, args.requests, fresh_router=True)
+    report("fixed order (no breakers)", fixed)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = AIService()
+    routed = run(ai, args.requests, fresh_router=False)
+    report("circuit breakers + ranking", routed)
+    states = {name.split("/")[-1]: breaker["state"] for name, breaker in ai.router.snapshot().items()}
+    print(f"{'':<28} breakers: {states}")
+    assert statistics.median(routed) < statistics.median(fixed) / 2
+
+    # Gemini recovers: once its circuit's open period ends the next request probes it and it is preferred again
+    StubGeminiModel.failure = None
+    time.sleep(settings.BREAKER_MAX_OPEN_SECONDS + 0.1)
+    calls = StubGeminiModel.calls
+    elapsed, answer = ask(ai)
+    assert StubGeminiModel.calls == calls + 1 and ai.router.breakers["gemini"].state == "closed"
+    assert ai.router.ranked()[0] == "gemini"
+    print(f"\n✓ Gemini recovered through a half-open probe ({elapsed * 1000:.0f} ms); ranking {ai.router.ranked()[0]} first")
+
+    # Streaming follows the same routing: a model that times out before its first token is abandoned
+    StubGeminiModel.failure = "429 quota"
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ai = AIService()
+        ai.router.breakers["gemini"].record_failure(0.3, trip=True)
+    elapsed, answer = ask(ai, stream=True)
+    assert answer == StubGeminiModel.answer, answer
+    print(f"✓ Streaming fell through to HF in {elapsed * 1000:.0f} ms")
+
+    # Every provider slow: the overall deadline caps the wait and the local fallback answers
+    server.modes = {MISTRAL: "slow", LLAMA: "slow", FLAN: "slow"}
+    settings.LLM_DEADLINE_SECONDS = args.timeout * 1.5
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ai = AIService()
+        ai.router.breakers["gemini"].record_failure(0.3, trip=True)
+    elapsed, answer = ask(ai)
+    assert elapsed < settings.LLM_DEADLINE_SECONDS + 0.5 and answer != StubGeminiModel.answer
+    print(f"✓ All providers slow: answered from context after {elapsed * 1000:.0f} ms "
+          f"(deadline {settings.LLM_DEADLINE_SECONDS * 1000:.0f} ms)")
+
+    server.stop()
+    print(f"\n✅ Median latency {statistics.median(fixed) * 1000:.0f} ms -> {statistics.median(routed) * 1000:.0f} ms with breakers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# backend/bench_scored_retrieval.py
+#
+# Fixed top-k retrieval (every query gets k chunks) against scored retrieval
+# (relevance cutoffs, near-duplicate removal and optionally MMR, see
+# VectorStore.similarity_search) on the markdown corpus, over rare-term and
+# "how long does <course> take?" questions as in bench_chunking.py. Reports
+# chunks and context tokens sent per question, recall, and how many
+# near-duplicate chunks fixed top-k sent. The stub's hashed embeddings make
+# the cosine cutoffs only indicative; --huggingface uses MiniLM if installed.
+#
+#   python bench_scored_retrieval.py --k 4 --mode hybrid
+#   python bench_scored_retrieval.py --mmr
+#   python bench_scored_retrieval.py --huggingface
+
+import argparse
+import contextlib
+import io
+import logging
+import re
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, make_vector_store
+
+
+def course_name(row):
+    """The first cell of a course table row, without its link."""
+    return re.sub(r"\]\(.*", "", row.split("|")[0]).strip(" [")
+
+
+def near_duplicates(results, threshold):
+    """Results that remove_near_duplicates would have dropped."""
+    from app.services.retrieval import remove_near_duplicates
+
+    return len(results) - len(remove_near_duplicates(results, threshold))
+
+
+def evaluate(store, questions, embeddings, k, mode):
+    from app.services.conversation import estimate_tokens
+
+    chunks = tokens = hits = duplicates = 0
+    for query, is_hit in questions:
+        results = store.similarity_search(query, k=k, embedding=embeddings[query], mode=mode)
+        chunks += len(results)
+        tokens += sum(estimate_tokens(result["content"]) for result in results)
+        hits += any(is_hit(result["content"]) for result in results)
+        duplicates += near_duplicates(results, 0.8)
+    return {
+        "chunks": chunks / len(questions),
+        "tokens": tokens / len(questions),
+        "recall": hits / len(questions),
+        "duplicates": duplicates
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed top-k vs relevance-scored retrieval")
+    parser.add_argument("--k", type=int, default=settings.SEARCH_K)
+    parser.add_argument("--mode", default="hybrid", choices=("dense", "hybrid"))
+    parser.add_argument("--terms", type=int, default=100, help="number of rare-term questions")
+    parser.add_argument("--mmr", action="store_true", help="also diversify with maximal marginal relevance")
+    parser.add_argument("--huggingface", action="store_true", help="use the MiniLM embeddings instead of the stub")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from langchain.schema import Document
+    from app.services.text_utils import tokenize
+    from bench_chunking import read_corpus, split_markdown, table_rows
+    from bench_retrieval import rare_terms
+
+    settings.EMBEDDING_CACHE_ENABLED = False
+    embeddings = StubEmbeddings()
+    if args.huggingface:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    corpus = read_corpus()
+    documents = split_markdown(corpus, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = make_vector_store(embeddings, documents)
+
+    rows = {}
+    for content in corpus.values():
+        rows.update(table_rows(content))
+    questions = {
+        "rare terms": [
+            (f"Which course covers {term}?", lambda content, term=term: term in tokenize(content))
+            for term in rare_terms([Document(page_content=content) for content in corpus.values()], args.terms)
+        ],
+        "table rows": [
+            (f"How long does {course_name(row)} take?", lambda content, row=row: row in content.split("\n"))
+            for row in sorted(rows)
+        ],
+    }
+    query_embeddings = {query: store.embed_query(query)
+                        for group in questions.values() for query, _ in group}
+
+    configs = {
+        f"fixed top-{args.k}": dict(MIN_RELEVANCE_SCORE=-1.0, RELEVANCE_RATIO=0.0, DEDUP_THRESHOLD=1.01, SEARCH_MMR=False),
+        "scored": dict(MIN_RELEVANCE_SCORE=settings.MIN_RELEVANCE_SCORE, RELEVANCE_RATIO=settings.RELEVANCE_RATIO,
+                       DEDUP_THRESHOLD=settings.DEDUP_THRESHOLD, SEARCH_MMR=False),
+    }
+    if args.mmr:
+        configs["scored + MMR"] = dict(configs["scored"], SEARCH_MMR=True)
+
+    print(f"🔍 {len(documents)} chunks, {args.mode} retrieval, k={args.k}, "
+          f"{'MiniLM' if args.huggingface else 'stub'} embeddings, "
+          f"cutoffs: similarity >= {settings.MIN_RELEVANCE_SCORE} and >= {settings.RELEVANCE_RATIO} x best\n")
+    results = {}
+    for label, overrides in configs.items():
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        results[label] = {group: evaluate(store, qs, query_embeddings, args.k, args.mode)
+                          for group, qs in questions.items()}
+        print(label)
+        for group, r in results[label].items():
+            print(f"   {group:<10} ({len(questions[group]):3d})  chunks/question {r['chunks']:4.2f}   "
+                  f"context tokens/question {r['tokens']:6.0f}   recall {r['recall']:6.1%}   "
+                  f"near-duplicates sent {r['duplicates']}")
+        print()
+
+    before, after = results[f"fixed top-{args.k}"], results["scored"]
+    tokens_before = sum(r["tokens"] * len(questions[group]) for group, r in before.items())
+    tokens_after = sum(r["tokens"] * len(questions[group]) for group, r in after.items())
+    for group in questions:
+        assert after[group]["recall"] >= before[group]["recall"] - 0.02, f"{group} recall dropped"
+        assert after[group]["duplicates"] == 0
+    assert tokens_after < tokens_before
+    print(f"✅ {1 - tokens_after / tokens_before:.0%} fewer context tokens per question, "
+          f"no near-duplicates sent, recall within 2 points of fixed top-{args.k}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/bench_sessions.py
+#
+# Exercises the session stores with many concurrent chat sessions and checks
+# that MAX_SESSIONS, MAX_HISTORY_LENGTH and SESSION_MAX_BYTES hold. The Redis
+# store runs against fakeredis (pip install fakeredis), with two store instances
+# sharing one server to stand in for two uvicorn workers behind a load balancer.
+#
+#   python bench_sessions.py --sessions 500 --turns 12
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.models import ChatMessage
+
+
+def exchange(turn):
+    return [
+        ChatMessage(role="user", content=f"Question {turn}: which courses cover operating systems?"),
+        ChatMessage(role="assistant", content="OSTEP and Nand2Tetris. " * random.randint(5, 200))
+    ]
+
+
+def drive(label, workers, sessions, turns):
+    """Append `turns` exchanges to each session, alternating workers like a round-robin load balancer."""
+    store = workers[0]
+    tracemalloc.start()
+    start = time.perf_counter()
+    operations = 0
+    for turn in range(turns):
+        for i in range(sessions):
+            worker = workers[(turn + i) % len(workers)]
+            worker.get_history(f"session-{i}")
+            worker.append(f"session-{i}", exchange(turn))
+            operations += 2
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    live = [f"session-{i}" for i in range(sessions) if store.get_history(f"session-{i}")]
+    longest = max((len(store.get_history(session_id)) for session_id in live), default=0)
+    largest = max((sum(len(m.content.encode()) for m in store.get_history(session_id)) for session_id in live), default=0)
+
+    print(f"{label:<22} {operations / elapsed:9.0f} ops/s   live sessions {len(live):5d}/{store.max_sessions}   "
+          f"longest history {longest:3d}/{store.max_history}   largest {largest / 1024:5.1f}/{store.max_bytes / 1024:.0f} KB   "
+          f"peak traced {peak / 1e6:6.1f} MB")
+    assert len(live) <= store.max_sessions
+    assert longest <= store.max_history
+    assert largest <= store.max_bytes
+
+    # Overflow MAX_SESSIONS with one-message sessions; the oldest ones are evicted
+    for i in range(store.max_sessions + 100):
+        store.append(f"overflow-{i}", exchange(0)[:1])
+    sessions_after = store.stats()["sessions"]
+    print(f"{'':<22} after {store.max_sessions + 100} more sessions: {sessions_after} stored")
+    assert sessions_after <= store.max_sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session store bounds and throughput")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=12)
+    args = parser.parse_args()
+
+    from app.services.session_store import InMemorySessionStore, RedisSessionStore
+
+    limits = dict(
+        max_sessions=settings.MAX_SESSIONS,
+        max_history=settings.MAX_HISTORY_LENGTH,
+        ttl_seconds=settings.SESSION_TIMEOUT_MINUTES * 60,
+        max_bytes=settings.SESSION_MAX_BYTES
+    )
+    random.seed(0)
+    print(f"💬 {args.sessions} sessions x {args.turns} turns\n")
+    drive("in-memory", [InMemorySessionStore(**limits)], args.sessions, args.turns)
+
+    try:
+        import fakeredis
+    except ImportError:
+        print("fakeredis not installed, skipping the Redis store")
+        return
+    server = fakeredis.FakeServer()
+    workers = [RedisSessionStore(fakeredis.FakeRedis(server=server), **limits) for _ in range(2)]
+    random.seed(0)
+    drive("redis (2 workers)", workers, args.sessions, args.turns)
+
+    # A session written by one worker is visible to the other
+    workers[0].append("shared", exchange(0))
+    assert len(workers[1].get_history("shared")) == 2
+    workers[1].delete("shared")
+    assert workers[0].get_history("shared") == []
+    print("\n✅ Limits hold on both backends; Redis sessions are shared across workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/bench_single_flight.py
+#
+# A class asks the same question at once: N identical messages arrive
+# together over REST, SSE and /ws (plain and streaming). Counts how many
+# vector searches and LLM generations they cost with single-flight off and
+# on, and checks that every client still gets the full answer.
+#
+#   python bench_single_flight.py --clients 50 --latency 0.5
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from starlette.testclient import TestClient
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings, StubGeminiModel, install_stub_gemini, make_vector_store
+
+
+def ask_rest(client, message):
+    response = client.post("/api/chat/", json={"message": message})
+    response.raise_for_status()
+    return response.json()["response"]
+
+
+def ask_sse(client, message):
+    with client.stream("POST", "/api/chat/stream", json={"message": message}) as response:
+        events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+    return events[-1]["response"]
+
+
+def ask_ws(client, message, stream=False):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(json.dumps({"message": message, "stream": stream}))
+        while True:
+            frame = websocket.receive_json()
+            if not stream or frame.get("type") == "done":
+                return frame["response"]
+
+
+TRANSPORTS = {
+    "rest": ask_rest,
+    "sse": ask_sse,
+    "ws": ask_ws,
+    "ws stream": lambda client, message: ask_ws(client, message, stream=True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight coalescing of identical concurrent questions")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub Gemini latency in seconds")
+    args = parser.parse_args()
+
+    install_stub_gemini(latency=args.latency)
+    # The question is a catalog question; coalescing is about the generation path
+    settings.COURSE_CATALOG_ENABLED = False
+    # Let startup finish indexing before the stubs replace app.state
+    settings.BACKGROUND_INDEXING = False
+    from app.main import app
+    from app.services.ai_service import AIService
+    from app.services.session_store import create_session_store
+
+    searches = [0]
+
+    def count_searches(search):
+        def counting_search(*a, **kw):
+            searches[0] += 1
+            return search(*a, **kw)
+        return counting_search
+
+    print(f"👥 {args.clients} identical questions at once, LLM latency {args.latency * 1000:.0f} ms\n")
+    print(f"{'transport':<10} {'single-flight':<14} {'searches':>8} {'generations':>11} {'wall':>8}")
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()), TestClient(app) as client:
+        # Replace whatever startup built with the stubbed services
+        vector_store = make_vector_store(StubEmbeddings())
+        vector_store.similarity_search = count_searches(vector_store.similarity_search)
+        app.state.vector_store = vector_store
+        app.state.ai_service = AIService()
+        app.state.ai_service.warm_up()
+        app.state.session_store = create_session_store()
+        app.state.processor = None
+        app.state.is_ready = True
+        rows = []
+        for transport, ask in TRANSPORTS.items():
+            for enabled in (False, True):
+                settings.SINGLE_FLIGHT_ENABLED = enabled
+                # A fresh question per run, so the answer cache can't serve it
+                message = f"Which programming languages are taught? ({transport}, {enabled})"
+                searches[0], generations = 0, StubGeminiModel.calls
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                    answers = list(pool.map(lambda _: ask(client, message), range(args.clients)))
+                rows.append((transport, enabled, searches[0], StubGeminiModel.calls - generations,
+                             time.perf_counter() - start))
+                assert all(answer == StubGeminiModel.answer for answer in answers), set(answers)
+        stats = app.state.single_flight.stats()
+
+    for transport, enabled, search_count, generation_count, wall in rows:
+        print(f"{transport:<10} {'on' if enabled else 'off':<14} {search_count:8d} {generation_count:11d} {wall * 1000:6.0f} ms")
+        if enabled:
+            assert generation_count < args.clients / 5
+    print(f"\nsingle-flight: {stats}")
+    print(f"\n✅ Fan-in {stats['fan_in_ratio']}: identical questions share one search and one generation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# backend/bench_stubs.py
+#
+# Offline stand-ins for Gemini and the embedding models, shared by the
+# bench_*.py scripts so they run without network access or API keys.
+
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+
+
+# What the Gemini SDK raises for each injected error, as AIService sees it
+STUB_ERRORS = {
+    "rate_limited": "429 Resource has been exhausted (e.g. check quota).",
+    "unavailable": "503 The model is overloaded. Please try again later.",
+    "error": "500 An internal error has occurred.",
+}
+
+
+class StubGeminiModel:
+    """Stands in for genai.GenerativeModel with a configurable round-trip latency.
+
+    With stream=True the latency is spread evenly over the streamed chunks. Setting
+    `failure` to an error message makes every call fail with it after the latency.
+    `jitter` draws each latency from a log-normal distribution around `latency`
+    (sigma = jitter), and `error_rates` ({"rate_limited", "unavailable", "error" or
+    "timeout": probability}) injects failures; "timeout" calls hang past the
+    provider timeout. Draws come from a seeded generator, so runs are repeatable.
+    """
+
+    latency = 0.2
+    jitter = 0.0
+    error_rates = {}
+    calls = 0
+    failure = None
+    answer = "OSSU teaches Python, Racket, C, Java, SML and JavaScript across its core courses."
+    _random = random.Random(0)
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def _draw(cls):
+        """(latency, error message or None) for one call."""
+        with cls._lock:
+            cls.calls += 1
+            latency = cls.latency * math.exp(cls._random.gauss(0, cls.jitter)) if cls.jitter else cls.latency
+            roll = cls._random.random()
+        if cls.failure:
+            return latency, cls.failure
+        for outcome, rate in cls.error_rates.items():
+            if roll < rate:
+                if outcome == "timeout":
+                    return latency + 2 * settings.PROVIDER_TIMEOUT_SECONDS, None
+                return latency, STUB_ERRORS[outcome]
+            roll -= rate
+        return latency, None
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        latency, failure = StubGeminiModel._draw()
+        if stream:
+            return self._stream(latency, failure)
+        time.sleep(latency)
+        if failure:
+            raise RuntimeError(failure)
+        return type("Response", (), {"text": StubGeminiModel.answer})()
+
+    def _stream(self, latency, failure):
+        if failure:
+            time.sleep(latency)
+            raise RuntimeError(failure)
+        words = StubGeminiModel.answer.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(latency / len(words))
+            yield type("Chunk", (), {"text": word if i == 0 else " " + word})()
+
+
+def install_stub_gemini(latency: float = 0.2, jitter: float = 0.0, error_rates=None, seed: int = 0) -> None:
+    """Route every AIService Gemini call to StubGeminiModel."""
+    import google.generativeai as genai
+
+    StubGeminiModel.latency = latency
+    StubGeminiModel.jitter = jitter
+    StubGeminiModel.error_rates = dict(error_rates or {})
+    StubGeminiModel._random = random.Random(seed)
+    settings.GEMINI_API_KEY = "bench-key"
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = StubGeminiModel
+
+
+class StubHFServer:
+    """Local HTTP stand-in for the HuggingFace Inference API.
+
+    Each model answers according to `modes[model]`: "ok" (after `latency`), "429",
+    "503", "error" (HTTP 500), "slow" (ok after `slow_seconds`) or "tail" (slow for
+    a `tail_rate` fraction of requests, ok otherwise). Requests with "stream": true
+    get a text-generation-inference style event stream.
+
+        server = StubHFServer({"mistralai/Mistral-7B-Instruct-v0.2": "503"})
+        server.start()
+        settings.HF_API_URL = server.url
+    """
+
+    def __init__(self, modes=None, slow_seconds: float = 2.0, answer: str = StubGeminiModel.answer,
+                 latency: float = 0.0, tail_rate: float = 0.05, seed: int = 0):
+        self.modes = dict(modes or {})
+        self.slow_seconds = slow_seconds
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self._random = random.Random(seed)
+        self.answer = answer
+        self.requests = {}
+        self.connections = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/models"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; without this, keep-alive
+                # connections stall on delayed ACKs
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                stub.connections += 1
+
+            def do_POST(self):
+                model = self.path[len("/models/"):]
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests[model] = stub.requests.get(model, 0) + 1
+                mode = stub.modes.get(model, "ok")
+
+                if mode == "tail":
+                    mode = "slow" if stub._random.random() < stub.tail_rate else "ok"
+                time.sleep(stub.slow_seconds if mode == "slow" else stub.latency)
+                if mode in ("429", "503", "error"):
+                    status = 500 if mode == "error" else int(mode)
+                    return self._send(status, "application/json", json.dumps({"error": mode}).encode())
+                if payload.get("stream"):
+                    events = [{"token": {"text": word if i == 0 else " " + word, "special": False}}
+                              for i, word in enumerate(stub.answer.split(" "))]
+                    events.append({"token": {"text": "</s>", "special": True}})
+                    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode()
+                    return self._send(200, "text/event-stream", body)
+                self._send(200, "application/json", json.dumps([{"generated_text": stub.answer}]).encode())
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up waiting (provider timeout)
+
+        return Handler
+
+    def start(self) -> "StubHFServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class StubEmbeddings:
+    """Deterministic hashed bag-of-words embeddings with optional per-call latency.
+
+    per_text_latency adds cost proportional to the batch size; rate_limit_rate makes
+    that fraction of embed_documents calls fail with a 429-style error. jitter
+    spreads each call's latency log-normally (sigma = jitter) around its base value.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0, per_text_latency: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0, jitter: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts_embedded = 0
+        self.rate_limited = 0
+
+    def _embed(self, text: str):
+        vector = [0.0] * self.size
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.size] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _sleep(self, seconds):
+        if self.jitter:
+            with self._lock:
+                seconds *= math.exp(self._random.gauss(0, self.jitter))
+        time.sleep(seconds)
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency or self.per_text_latency:
+            self._sleep(self.latency + self.per_text_latency * len(texts))
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        self.texts_embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.texts_embedded += 1
+        if self.latency:
+            self._sleep(self.latency)
+        return self._embed(text)
+
+
+def make_vector_store(embeddings=None, documents=None):
+    """Build a VectorStore over the real markdown corpus in a throwaway Chroma directory."""
+    from app.services.document_processor import DocumentProcessor
+    from app.services.vector_store import VectorStore
+
+    settings.CHROMA_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    if documents is None:
+        documents = DocumentProcessor(settings.MARKDOWN_DIR).process_documents()
+    store = VectorStore(embeddings=embeddings or StubEmbeddings())
+    store.create_or_load_vectorstore(documents)
+    return store
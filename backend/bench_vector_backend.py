@@ -0,0 +1,112 @@
+# backend/bench_vector_backend.py
+#
+# Compares dense search through Chroma with the in-memory NumPy backend
+# (VECTOR_BACKEND=numpy). A Chroma store is built once from the markdown corpus
+# (optionally replicated to simulate a larger corpus); each backend then opens it
+# in a fresh process, so load time and RSS are measured independently. The NumPy
+# backend is opened twice: the first open builds the matrix from Chroma, the
+# second memory-maps the saved file.
+#
+#   python bench_vector_backend.py --scale 1 --queries 500
+#   python bench_vector_backend.py --scale 50 --dimensions 384
+
+import argparse
+import contextlib
+import io
+import logging
+import multiprocessing
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from bench_stubs import StubEmbeddings
+
+
+def build_store(chroma_dir, scale, dimensions):
+    from langchain.schema import Document
+    from app.services.document_processor import DocumentProcessor
+    from app.services.vector_store import VectorStore
+
+    documents = DocumentProcessor(settings.MARKDOWN_DIR).process_documents()
+    documents = [
+        Document(page_content=f"{doc.page_content}\n(copy {copy})" if copy else doc.page_content, metadata=doc.metadata)
+        for copy in range(scale) for doc in documents
+    ]
+    settings.CHROMA_DIR = chroma_dir
+    settings.VECTOR_BACKEND = "chroma"
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = VectorStore(embeddings=StubEmbeddings(size=dimensions))
+        store.create_or_load_vectorstore(documents)
+    return [doc.page_content[:80] for doc in random.Random(0).sample(documents, min(50, len(documents)))]
+
+
+def measure(backend, chroma_dir, dimensions, queries, rounds):
+    logging.disable(logging.WARNING)
+    from app.services.vector_store import VectorStore
+
+    settings.CHROMA_DIR = chroma_dir
+    settings.VECTOR_BACKEND = backend
+    embeddings = StubEmbeddings(size=dimensions)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = VectorStore(embeddings=embeddings)
+        store.create_or_load_vectorstore([])
+    load_seconds = time.perf_counter() - start
+
+    vectors = [embeddings.embed_query(query) for query in queries]
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        store.similarity_search(queries[i % len(queries)], k=4, embedding=vectors[i % len(vectors)], mode="dense")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "load_ms": load_seconds * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[max(0, int(len(timings) * 0.99) - 1)] * 1000,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "chunks": store.get_document_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy dense search benchmark")
+    parser.add_argument("--scale", type=int, default=1, help="replicate the corpus this many times")
+    parser.add_argument("--dimensions", type=int, default=384, help="embedding size (MiniLM is 384)")
+    parser.add_argument("--queries", type=int, default=500, help="searches per backend")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    chroma_dir = tempfile.mkdtemp(prefix="bench_chroma_")
+    queries = build_store(chroma_dir, args.scale, args.dimensions)
+
+    # Fresh processes so each backend's RSS is its own
+    context = multiprocessing.get_context("spawn")
+    runs = [("chroma", "chroma"), ("numpy", "numpy (build)"), ("numpy", "numpy (mmap)")]
+    results = []
+    for backend, label in runs:
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (backend, chroma_dir, args.dimensions, queries, args.queries))
+        results.append((label, result))
+
+    print(f"\n📚 {results[0][1]['chunks']} chunks, {args.dimensions} dimensions, {args.queries} searches\n")
+    for label, result in results:
+        print(f"{label:<15} load {result['load_ms']:8.1f} ms   p50 {result['p50_ms']:6.3f} ms   "
+              f"p99 {result['p99_ms']:6.3f} ms   max RSS {result['rss_mb']:6.1f} MB")
+
+    chroma, numpy_mmap = results[0][1], results[2][1]
+    print(f"\n✅ NumPy backend p50 is {chroma['p50_ms'] / numpy_mmap['p50_ms']:.1f}x lower than Chroma")
+    shutil.rmtree(chroma_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# backend/conftest.py
+
+# The older test_*.py files are scripts that talk to a running server or the real
+# providers at import time; run them by hand, pytest only collects the unit tests.
+collect_ignore = [
+    "test_ai_setup.py",
+    "test_chat_api.py",
+    "test_chat_endpoint.py",
+    "test_chat_flow.py",
+    "test_gemini_model.py",
+    "test_readme_content.py",
+    "test_server_status.py",
+    "test_vector_search.py",
+]
@@ -1,37 +1,61 @@
 # backend/rebuild_vector_store.py
-
+#
+# Re-index the markdown files into the vector store.
+#
+#   python rebuild_vector_store.py          # embed only new/changed chunks, drop deleted files
+#   python rebuild_vector_store.py --full   # wipe the Chroma directory and re-embed everything
+#   python rebuild_vector_store.py --workers 8   # read and chunk files in 8 processes
+
+import argparse
 import os
 import shutil
 from app.services.document_processor import DocumentProcessor
+from app.services.indexer import IncrementalIndexer
 from app.services.vector_store import VectorStore
 from app.config import settings
 
-print("🔄 Rebuilding Vector Store with ALL markdown files\n")
-
-# Clear existing vector store
-if os.path.exists(settings.CHROMA_DIR):
-    print("📁 Clearing existing vector store...")
-    shutil.rmtree(settings.CHROMA_DIR)
-    os.makedirs(settings.CHROMA_DIR)
-
-# Process all documents including subdirectories
-print("📄 Processing all markdown files...")
-processor = DocumentProcessor(settings.MARKDOWN_DIR)
-documents = processor.process_documents()
-
-print(f"\n✅ Found {len(documents)} document chunks")
-
-# Create new vector store
-print("\n🗄️ Creating new vector store...")
-vector_store = VectorStore()
-vector_store.create_or_load_vectorstore(documents)
-
-print("\n✅ Vector store rebuilt successfully!")
 
-# Test with a query
-print("\n🔍 Testing with sample query...")
-results = vector_store.similarity_search("Introduction to Programming with Python CS50", k=3)
-for i, result in enumerate(results):
-    print(f"\nResult {i+1}:")
-    print(f"Source: {result['metadata']['source']}")
-    print(f"Content: {result['content'][:100]}...")
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="Re-index markdown files into the vector store")
+    parser.add_argument("--full", action="store_true",
+                        help="delete the Chroma directory and re-embed every chunk")
+    parser.add_argument("--workers", type=int, default=settings.INDEX_WORKERS,
+                        help="processes reading and chunking markdown files (1 = in-process)")
+    parser.add_argument("--query", default="Introduction to Programming with Python CS50",
+                        help="sample query to run after indexing")
+    args = parser.parse_args()
+
+    print("🔄 Re-indexing markdown files\n")
+
+    if args.full and os.path.exists(settings.CHROMA_DIR):
+        print("📁 Clearing existing vector store...")
+        shutil.rmtree(settings.CHROMA_DIR)
+        os.makedirs(settings.CHROMA_DIR)
+
+    processor = DocumentProcessor(settings.MARKDOWN_DIR)
+    vector_store = VectorStore()
+    vector_store.create_or_load_vectorstore([])
+
+    print("📄 Syncing index with markdown files...")
+    stats = IncrementalIndexer(vector_store, processor).sync(full=args.full, workers=args.workers)
+
+    print(f"\n✅ Files scanned:  {stats['files_scanned']}")
+    print(f"   Files changed:  {stats['files_changed']}")
+    print(f"   Files removed:  {stats['files_removed']}")
+    print(f"   Chunks added:   {stats['chunks_added']}")
+    print(f"   Chunks deleted: {stats['chunks_deleted']}")
+    print(f"   Total chunks:   {stats['total_chunks']}")
+    print(f"   Read+chunked:   {stats['files_per_second']} files/s ({args.workers} worker{'s' if args.workers > 1 else ''})")
+    print(f"   Took {stats['seconds']}s")
+
+    if args.query:
+        print(f"\n🔍 Testing with sample query: {args.query}")
+        results = vector_store.similarity_search(args.query, k=3)
+        for i, result in enumerate(results):
+            print(f"\nResult {i+1}:")
+            print(f"Source: {result['metadata']['source']}")
+            print(f"Content: {result['content'][:100]}...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/test_ai_service.py
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.api import chat
+from app.config import settings
+from app.services.ai_service import AIService, ContextAnswer
+from app.services.provider_routing import ProviderError
+from app.services.response_cache import ResponseCache
+from bench_stubs import STUB_ERRORS, StubGeminiModel
+
+CONTEXT = [{"content": "Core CS covers programming, math, systems and theory.", "metadata": {"source": "README.md"}}]
+
+
+@pytest.fixture
+def ai(monkeypatch):
+    """An AIService whose only provider is the stub Gemini model, answering at once."""
+    import google.generativeai as genai
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: None)
+    monkeypatch.setattr(genai, "GenerativeModel", StubGeminiModel)
+    monkeypatch.setattr(StubGeminiModel, "latency", 0.0)
+    monkeypatch.setattr(StubGeminiModel, "failure", None)
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    service = AIService()
+    yield service
+    service.close()
+
+
+def fake_request(cache):
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(response_cache=cache)))
+
+
+def test_provider_answers_are_plain_text(ai):
+    answer = ai.generate_response("Which languages are taught?", CONTEXT, [])
+    assert answer == StubGeminiModel.answer and not isinstance(answer, ContextAnswer)
+    chunks = list(ai.stream_response("Which languages are taught?", CONTEXT, []))
+    assert "".join(chunks) == StubGeminiModel.answer
+    assert not any(isinstance(chunk, ContextAnswer) for chunk in chunks)
+
+
+def test_failed_providers_answer_from_context(ai):
+    StubGeminiModel.failure = STUB_ERRORS["rate_limited"]
+    answer = ai.generate_response("What should I study next?", CONTEXT, [])
+    assert isinstance(answer, ContextAnswer)
+    assert "Core CS covers programming" in answer
+    chunks = list(ai.stream_response("What should I study next?", CONTEXT, []))
+    assert len(chunks) == 1 and isinstance(chunks[0], ContextAnswer)
+
+
+def test_context_answers_are_not_cached():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    request = fake_request(cache)
+    chat.remember_answer(request, "Tell me about Core CS", None, ContextAnswer("Based on the documentation: ..."), CONTEXT)
+    assert cache.get("Tell me about Core CS") is None
+    chat.remember_answer(request, "Tell me about Core CS", None, "Core CS has four parts.", CONTEXT)
+    assert cache.get("Tell me about Core CS")["response"] == "Core CS has four parts."
+
+
+def test_streamed_text_keeps_the_context_mark():
+    assert isinstance(chat.streamed_text([ContextAnswer("Based on the documentation")]), ContextAnswer)
+    text = chat.streamed_text(["Core", " CS"])
+    assert text == "Core CS" and not isinstance(text, ContextAnswer)
+
+
+class StallingModel:
+    """Streams one chunk, then goes quiet for longer than the chunk timeout."""
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        def chunks():
+            yield SimpleNamespace(text="Core CS")
+            time.sleep(0.5)
+            yield SimpleNamespace(text=" is never finished")
+        return chunks()
+
+
+def test_interrupted_streams_raise_after_the_chunks_sent(ai, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_CHUNK_TIMEOUT_SECONDS", 0.05)
+    ai.gemini_model = StallingModel()
+    received = []
+    with pytest.raises(ProviderError):
+        for chunk in ai.stream_response("What should I study next?", CONTEXT, []):
+            received.append(chunk)
+    assert received == ["Core CS"]
@@ -0,0 +1,44 @@
+# backend/test_conversation.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models import ChatMessage
+from app.services.conversation import retrieval_query
+
+HISTORY = [
+    ChatMessage(role="user", content="Tell me about the Core CS courses"),
+    ChatMessage(role="assistant", content="Core CS covers programming, math, systems and theory."),
+]
+
+
+@pytest.mark.parametrize("message", [
+    "What is OSSU?",
+    "What is CS50P?",
+    "Prerequisites for CS50P?",
+    "hi",
+    "help",
+    "Which courses teach languages that are functional?",
+])
+def test_standalone_questions_are_not_rewritten(message):
+    assert retrieval_query(message, HISTORY) == message
+
+
+@pytest.mark.parametrize("message", [
+    "What about the second one?",
+    "And the math prerequisites?",
+    "Is it hard?",
+    "How long does that take?",
+    "Why is that?",
+])
+def test_follow_ups_carry_the_previous_question(message):
+    assert retrieval_query(message, HISTORY) == f"Tell me about the Core CS courses {message}"
+
+
+def test_no_history_leaves_the_message_alone():
+    assert retrieval_query("What about the second one?", []) == "What about the second one?"
@@ -0,0 +1,107 @@
+# backend/test_course_catalog.py
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.course_catalog import CourseCatalog, extract_file_catalog
+
+README = """# OSSU Computer Science
+
+## Core CS
+
+### Core programming
+
+Topics covered: functional programming, design for testing. The courses use Racket and Python.
+
+| Courses | Duration | Effort | Prerequisites |
+|:--|:--:|:--:|:--:|
+| [Systematic Program Design](coursepages/spd/README.md) | 13 weeks | 8-10 hours/week | none |
+| [Programming Languages, Part A](https://www.coursera.org/learn/programming-languages) | 5 weeks | 4-8 hours/week | Systematic Program Design |
+
+### Core math
+
+| Courses | Duration | Effort | Prerequisites |
+|:--|:--:|:--:|:--:|
+| [Calculus 1A: Differentiation](https://openlearninglibrary.mit.edu/courses/calc1a) | 13 weeks | 6-10 hours/week | high school math |
+"""
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = CourseCatalog(str(tmp_path / "course_catalog.json"))
+    catalog.update_file("README.md", "hash-1", extract_file_catalog(README))
+    catalog.rebuild()
+    return catalog
+
+
+def test_course_fields_come_from_the_table(catalog):
+    answer = catalog.answer("How long does Systematic Program Design take?")
+    assert answer["kind"] == "duration"
+    assert "13 weeks" in answer["response"]
+    assert answer["context"][0]["metadata"]["source"] == "README.md"
+
+    answer = catalog.answer("What are the prerequisites for Programming Languages, Part A?")
+    assert answer["kind"] == "prerequisites"
+    assert "Systematic Program Design" in answer["response"]
+
+
+def test_series_titles_are_aliases(catalog):
+    assert "6-10 hours/week" in catalog.answer("How many hours per week is Calculus 1A?")["response"]
+    # A one-word side is an ordinary word, not a course name
+    assert catalog.answer("How many hours per week is differentiation?") is None
+
+
+def test_section_listing(catalog):
+    answer = catalog.answer("Which courses are in Core programming?")
+    assert answer["kind"] == "section"
+    assert "has 2 courses" in answer["response"]
+    assert "Racket" in answer["response"] and "Python" in answer["response"]
+
+
+def test_language_questions(catalog):
+    assert catalog.answer("Which courses use Racket?")["kind"] == "language"
+    assert catalog.answer("What programming languages are used?")["kind"] == "languages"
+    assert catalog.answer("Which languages are taught in OSSU?")["kind"] == "languages"
+    assert catalog.answer("List the languages")["kind"] == "languages"
+
+
+@pytest.mark.parametrize("question", [
+    "What language should I learn first?",
+    "Which programming language is best for a beginner?",
+    "what languages would you recommend for a job?",
+    "Is Python or Racket better?",
+    "What languages do I need to know?",
+])
+def test_language_advice_is_left_to_the_llm(catalog, question):
+    assert catalog.answer(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Tell me about Systematic Program Design",
+    "Why should I learn functional programming?",
+    "What is OSSU?",
+])
+def test_open_ended_questions_are_left_to_retrieval(catalog, question):
+    assert catalog.answer(question) is None
+
+
+def test_saved_catalog_reloads(catalog):
+    catalog.save()
+    reloaded = CourseCatalog(catalog.path)
+    assert reloaded.load() and reloaded.file_hash("README.md") == "hash-1"
+    reloaded.rebuild()
+    assert len(reloaded) == 3
+
+
+def test_catalog_from_another_version_starts_empty(tmp_path):
+    path = tmp_path / "course_catalog.json"
+    path.write_text(json.dumps({"version": 0, "files": {"README.md": {}}}))
+    catalog = CourseCatalog(str(path))
+    assert not catalog.load() and catalog.files == {}
+    assert catalog.answer("How long is Systematic Program Design?") is None
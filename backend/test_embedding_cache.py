@@ -0,0 +1,121 @@
+# backend/test_embedding_cache.py
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache, QueryEmbeddingLRU, text_hash
+from bench_stubs import StubEmbeddings
+
+TEXTS = ["Systematic Program Design", "Calculus 1A: Differentiation", "Computer Systems: A Programmer's Perspective"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embedding_cache.sqlite3"), max_bytes=50_000_000)
+
+
+def test_vectors_round_trip_as_float32(cache):
+    cache.put_many("stub", {text_hash("a"): [0.5, 0.25, 1.0]})
+    found = cache.get_many("stub", [text_hash("a"), text_hash("b")])
+    assert found == {text_hash("a"): [0.5, 0.25, 1.0]}
+    assert cache.hits == 1 and cache.misses == 1
+    # Keyed by model as well as text
+    assert cache.get_many("other-model", [text_hash("a")]) == {}
+
+
+def test_only_uncached_texts_are_embedded(cache):
+    stub = StubEmbeddings(size=32)
+    embeddings = CachedEmbeddings(stub, cache, "stub")
+    first = embeddings.embed_documents(TEXTS[:2])
+    assert stub.texts_embedded == 2
+
+    second = embeddings.embed_documents(TEXTS)
+    for cached, fresh in zip(second, first):
+        assert cached == pytest.approx(fresh, abs=1e-6)
+    assert stub.texts_embedded == 3
+    assert len(second) == 3
+
+
+def test_cache_is_shared_across_processes_and_rebuilds(cache):
+    CachedEmbeddings(StubEmbeddings(size=32), cache, "stub").embed_documents(TEXTS)
+    # e.g. rebuild_vector_store.py opening the same file later
+    reopened = EmbeddingCache(cache.path, max_bytes=cache.max_bytes)
+    stub = StubEmbeddings(size=32)
+    CachedEmbeddings(stub, reopened, "stub").embed_documents(TEXTS)
+    assert stub.texts_embedded == 0
+
+
+def test_queries_and_documents_are_cached_separately(cache):
+    stub = StubEmbeddings(size=32)
+    embeddings = CachedEmbeddings(stub, cache, "stub")
+    embeddings.embed_documents([TEXTS[0]])
+    embeddings.embed_query(TEXTS[0])
+    embeddings.embed_query(TEXTS[0])
+    assert stub.texts_embedded == 2
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embedding_cache.sqlite3"), max_bytes=200_000)
+    for batch in range(10):
+        cache.put_many("stub", {text_hash(f"{batch}-{i}"): [0.1] * 256 for i in range(50)})
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert stats["size_bytes"] <= cache.max_bytes
+    # The newest rows survive
+    assert len(cache.get_many("stub", [text_hash(f"9-{i}") for i in range(50)])) == 50
+
+
+def test_unreadable_cache_falls_back_to_the_provider(cache, monkeypatch):
+    def broken(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "get_many", broken)
+    monkeypatch.setattr(cache, "put_many", broken)
+    stub = StubEmbeddings(size=32)
+    vectors = CachedEmbeddings(stub, cache, "stub").embed_documents(TEXTS)
+    assert len(vectors) == 3 and stub.texts_embedded == 3
+
+
+def test_query_lru_folds_case_and_punctuation():
+    stub = StubEmbeddings(size=32)
+    lru = QueryEmbeddingLRU(stub.embed_query, max_entries=2)
+    vector = lru.get("What is OSSU?")
+    assert lru.get("  what is ossu ") is vector
+    assert stub.texts_embedded == 1
+    assert lru.stats()["hits"] == 1 and lru.stats()["misses"] == 1
+
+
+def test_query_lru_evicts_the_least_recently_used():
+    stub = StubEmbeddings(size=32)
+    lru = QueryEmbeddingLRU(stub.embed_query, max_entries=2)
+    lru.get("q1")
+    lru.get("q2")
+    lru.get("q1")
+    lru.get("q3")
+    assert lru.stats()["entries"] == 2
+    lru.get("q1")
+    assert stub.texts_embedded == 3  # q1 was still cached
+    lru.get("q2")
+    assert stub.texts_embedded == 4
+
+
+def test_precompute_skips_known_queries_and_failures():
+    stub = StubEmbeddings(size=32)
+
+    def embed_query(text):
+        if text == "broken":
+            raise RuntimeError("429 quota exceeded")
+        return stub.embed_query(text)
+
+    lru = QueryEmbeddingLRU(embed_query, max_entries=10)
+    lru.get("What is OSSU?")
+    assert lru.precompute(["what is ossu", "broken", "How long is Core CS?"]) == 1
+    assert lru.stats()["entries"] == 2
+    lru.get("How long is Core CS")
+    assert stub.texts_embedded == 2
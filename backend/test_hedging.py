@@ -0,0 +1,98 @@
+# backend/test_hedging.py
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.services.provider_routing import HedgeBudget, hedged_requests
+from bench_stubs import StubHFServer
+
+MISTRAL = "mistralai/Mistral-7B-Instruct-v0.2"
+LLAMA = "meta-llama/Llama-2-7b-chat-hf"
+FLAN = "google/flan-t5-large"
+CONTEXT = [{"content": "OSSU Core CS teaches Python, Racket and Java.", "metadata": {"source": "curriculum.md"}}]
+
+
+def hedge_counts():
+    return {outcome: hedged_requests.value(outcome=outcome) for outcome in ("fired", "denied", "won")}
+
+
+@pytest.fixture
+def server():
+    server = StubHFServer({MISTRAL: "slow", LLAMA: "ok", FLAN: "ok"}, slow_seconds=0.6).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def ai(server, monkeypatch):
+    """An AIService with only the HF models, which hedges after 0.1 s."""
+    monkeypatch.setattr(settings, "HF_API_URL", server.url)
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_DELAY_SECONDS", 0.1)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_SECONDS", 0.1)
+    monkeypatch.setenv("HF_TOKEN", "test-token")
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AIService()
+    yield service
+    service.close()
+
+
+def test_budget_caps_hedges_at_burst_plus_ratio():
+    budget = HedgeBudget(ratio=0.5, burst=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.deposit()
+    assert not budget.try_spend()
+    budget.deposit()
+    assert budget.try_spend()
+    for _ in range(10):
+        budget.deposit()
+    budget.refund()
+    assert budget.tokens == 2
+
+
+def test_slow_model_is_hedged_and_the_hedge_wins(ai, server):
+    before = hedge_counts()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        answer = ai.generate_response("Which languages are taught?", CONTEXT, [])
+    assert answer == server.answer
+    assert time.perf_counter() - start < 0.5
+    after = hedge_counts()
+    assert after["fired"] - before["fired"] == 1 and after["won"] - before["won"] == 1
+    assert server.requests == {MISTRAL: 1, LLAMA: 1}
+
+
+def test_empty_budget_denies_the_hedge(ai, server):
+    ai.hedge_budget = HedgeBudget(ratio=0.0, burst=0)
+    before = hedge_counts()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert ai.generate_response("Which languages are taught?", CONTEXT, []) == server.answer
+    after = hedge_counts()
+    assert after["denied"] - before["denied"] == 1 and after["fired"] == before["fired"]
+    assert server.requests == {MISTRAL: 1}
+
+
+def test_no_hedge_is_counted_when_every_other_circuit_is_open(ai, server):
+    for model in (LLAMA, FLAN):
+        ai.router.record_failure(f"hf:{model}", 0.1, "rate_limited")
+    tokens = ai.hedge_budget.tokens
+    before = hedge_counts()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert ai.generate_response("Which languages are taught?", CONTEXT, []) == server.answer
+    after = hedge_counts()
+    # The slow primary answered; it is neither a fired nor a winning hedge, and no token was spent
+    assert after == before
+    assert ai.hedge_budget.tokens == min(ai.hedge_budget.burst, tokens + ai.hedge_budget.ratio)
+    assert server.requests == {MISTRAL: 1}
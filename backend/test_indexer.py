@@ -0,0 +1,132 @@
+# backend/test_indexer.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.document_processor import DocumentProcessor
+from app.services.indexer import IncrementalIndexer
+from app.services.vector_store import VectorStore
+from bench_stubs import StubEmbeddings
+
+CORE = """# Core CS
+
+## Core programming
+
+Systematic Program Design teaches how to design programs with Racket.
+
+## Core math
+
+Calculus and discrete mathematics are the math foundations of the curriculum.
+"""
+FAQ = """# FAQ
+
+## Can I study part time?
+
+Yes, most learners follow OSSU part time over several years.
+"""
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = tmp_path / "markdown"
+    corpus.mkdir()
+    (corpus / "CORE.md").write_text(CORE, encoding="utf-8")
+    (corpus / "FAQ.md").write_text(FAQ, encoding="utf-8")
+    return corpus
+
+
+@pytest.fixture
+def embeddings():
+    return StubEmbeddings(size=32)
+
+
+@pytest.fixture
+def indexer(tmp_path, corpus, embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_DIR", str(tmp_path / "chroma"))
+    vector_store = VectorStore(embeddings=embeddings)
+    vector_store.create_or_load_vectorstore([])
+    return IncrementalIndexer(vector_store, DocumentProcessor(str(corpus)))
+
+
+def test_only_changed_chunks_are_embedded(indexer, corpus, embeddings):
+    first = indexer.sync()
+    assert first["chunks_added"] == first["total_chunks"] > 0
+    generation = indexer.load_manifest()["generation"]
+
+    embeddings.texts_embedded = 0
+    assert indexer.sync()["chunks_added"] == 0
+    assert embeddings.texts_embedded == 0
+    assert indexer.load_manifest()["generation"] == generation  # nothing changed: cached answers stay valid
+
+    with open(corpus / "FAQ.md", "a", encoding="utf-8") as f:
+        f.write("\n## Is OSSU free?\n\nEvery course can be audited for free.\n")
+    stats = indexer.sync()
+    assert stats["files_changed"] == 1 and 0 < stats["chunks_added"] < first["total_chunks"]
+    assert indexer.load_manifest()["generation"] != generation
+
+
+def test_removed_files_are_deleted_from_the_store(indexer, corpus):
+    indexer.sync()
+    faq_chunks = len(indexer.load_manifest()["files"]["FAQ.md"]["chunks"])
+    (corpus / "FAQ.md").unlink()
+    stats = indexer.sync()
+    assert stats["files_removed"] == 1 and stats["chunks_deleted"] == faq_chunks
+    assert indexer.vector_store.get_document_count() == stats["total_chunks"]
+    assert "FAQ.md" not in indexer.load_manifest()["files"]
+
+
+def test_failed_deletes_are_kept_and_retried(indexer, corpus, monkeypatch):
+    indexer.sync()
+    faq_ids = indexer.load_manifest()["files"]["FAQ.md"]["chunks"]
+    stored = indexer.vector_store.get_document_count()
+
+    monkeypatch.setattr(indexer.vector_store, "delete_documents", lambda ids: not ids)
+    (corpus / "FAQ.md").unlink()
+    stats = indexer.sync()
+    manifest = indexer.load_manifest()
+    assert stats["chunks_deleted"] == 0
+    assert sorted(manifest["pending_deletes"]) == sorted(faq_ids)
+    assert indexer.vector_store.get_document_count() == stored
+    generation = manifest["generation"]
+
+    monkeypatch.undo()
+    stats = indexer.sync()
+    manifest = indexer.load_manifest()
+    assert stats["chunks_deleted"] == len(faq_ids)
+    assert manifest["pending_deletes"] == []
+    assert manifest["generation"] != generation
+    assert indexer.vector_store.get_document_count() == stored - len(faq_ids)
+
+
+def test_pending_deletes_of_restored_chunks_are_dropped(indexer, corpus, monkeypatch):
+    indexer.sync()
+    faq_ids = indexer.load_manifest()["files"]["FAQ.md"]["chunks"]
+    stored = indexer.vector_store.get_document_count()
+
+    monkeypatch.setattr(indexer.vector_store, "delete_documents", lambda ids: not ids)
+    (corpus / "FAQ.md").unlink()
+    indexer.sync()
+    monkeypatch.undo()
+
+    # The file came back unchanged before the retry: its chunks must stay
+    (corpus / "FAQ.md").write_text(FAQ, encoding="utf-8")
+    stats = indexer.sync()
+    assert stats["chunks_deleted"] == 0
+    assert indexer.load_manifest()["files"]["FAQ.md"]["chunks"] == faq_ids
+    assert indexer.vector_store.get_document_count() == stored
+
+
+def test_changed_embedding_model_rebuilds_from_scratch(indexer, embeddings):
+    first = indexer.sync()
+    indexer.vector_store.embedding_model_name = "another-model"
+    embeddings.texts_embedded = 0
+    stats = indexer.sync()
+    assert stats["chunks_added"] == first["total_chunks"]
+    assert embeddings.texts_embedded == first["total_chunks"]
+    assert indexer.load_manifest()["embedding_model"] == "another-model"
@@ -0,0 +1,89 @@
+# backend/test_ingestion.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from langchain.schema import Document
+
+from app.services import ingestion
+from app.services.ingestion import embed_with_retry, ingest_documents, is_rate_limit_error
+from bench_stubs import StubEmbeddings
+
+DOCUMENTS = [Document(page_content=f"Chunk {i} of the OSSU curriculum", metadata={"source": "README.md"})
+             for i in range(25)]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ingestion.time, "sleep", lambda seconds: None)
+
+
+def flaky(failures, error):
+    """An embed function that raises `error` on its first `failures` calls."""
+    stub = StubEmbeddings(size=16)
+    calls = [0]
+
+    def embed(texts):
+        calls[0] += 1
+        if calls[0] <= failures:
+            raise error
+        return stub.embed_documents(texts)
+
+    return embed, calls
+
+
+def test_rate_limit_errors_are_recognized():
+    assert is_rate_limit_error(RuntimeError("429 Resource has been exhausted (e.g. check quota)."))
+    assert is_rate_limit_error(RuntimeError("Rate limit reached for requests"))
+    assert not is_rate_limit_error(ValueError("invalid input"))
+
+
+def test_rate_limited_batches_are_retried():
+    embed, calls = flaky(2, RuntimeError("429 quota exceeded"))
+    vectors = embed_with_retry(embed, ["a", "b"], max_retries=5, backoff_seconds=0.01)
+    assert len(vectors) == 2 and calls[0] == 3
+
+
+def test_retries_give_up_after_max_retries():
+    embed, calls = flaky(10, RuntimeError("429 quota exceeded"))
+    with pytest.raises(RuntimeError):
+        embed_with_retry(embed, ["a"], max_retries=2, backoff_seconds=0.01)
+    assert calls[0] == 3
+
+
+def test_other_errors_are_not_retried():
+    embed, calls = flaky(1, ValueError("invalid input"))
+    with pytest.raises(ValueError):
+        embed_with_retry(embed, ["a"], max_retries=5, backoff_seconds=0.01)
+    assert calls[0] == 1
+
+
+def test_every_batch_is_written_once_despite_rate_limits():
+    stub = StubEmbeddings(size=16, rate_limit_rate=0.3, seed=1)
+    written = {}
+    progress = []
+
+    def write(ids, vectors, docs):
+        assert len(ids) == len(vectors) == len(docs)
+        for chunk_id, doc in zip(ids, docs):
+            assert chunk_id not in written
+            written[chunk_id] = doc.page_content
+
+    ids = [f"id-{i}" for i in range(len(DOCUMENTS))]
+    stats = ingest_documents(stub.embed_documents, write, DOCUMENTS, ids, batch_size=4, workers=3,
+                             max_retries=20, backoff_seconds=0.01, progress=lambda done, total: progress.append(done))
+    assert stub.rate_limited > 0
+    assert stats["chunks"] == len(DOCUMENTS) and stats["batches"] == 7
+    assert written == {chunk_id: doc.page_content for chunk_id, doc in zip(ids, DOCUMENTS)}
+    assert progress[-1] == len(DOCUMENTS) and progress == sorted(progress)
+
+
+def test_a_failed_batch_stops_ingestion():
+    embed, _ = flaky(1, ValueError("invalid input"))
+    with pytest.raises(ValueError):
+        ingest_documents(embed, lambda ids, vectors, docs: None, DOCUMENTS, batch_size=4, workers=1)
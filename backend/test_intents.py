@@ -0,0 +1,51 @@
+# backend/test_intents.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.intents import ANSWERS, canned_answer, classify, first_topic, query_terms, topic_answer
+
+TOPICS = ["about_ossu", "core_cs", "languages", "duration"]
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("What is OSSU?", "about_ossu"),
+    ("  tell me about the Open Source Society University ", "about_ossu"),
+    ("Hello there!", "greeting"),
+    ("What can I ask you?", "help"),
+])
+def test_whole_questions_get_canned_answers(query, intent):
+    assert classify(query)[1] == intent
+    assert canned_answer(classify(query)) == ANSWERS[intent]
+
+
+@pytest.mark.parametrize("query", [
+    "What is OSSU's math track like?",
+    "hello, which course comes after Nand2Tetris?",
+    "help me pick a database course",
+])
+def test_longer_questions_are_not_canned(query):
+    assert canned_answer(classify(query)) is None
+
+
+def test_terms_match_whole_words_only():
+    assert query_terms(classify("How long is the Core CS part of OSSU?")) == {"duration", "core_cs", "ossu"}
+    assert query_terms(classify("Is choosing a course a tossup?")) == frozenset()
+
+
+def test_first_topic_follows_the_given_order():
+    intent = classify("How long does Core CS take?")
+    assert first_topic(intent, TOPICS) == "core_cs"
+    assert first_topic(intent, ["duration", "core_cs"]) == "duration"
+    assert topic_answer(intent, ["duration"]) == ANSWERS["duration"]
+
+
+def test_about_ossu_needs_a_question_about_it():
+    assert first_topic(classify("Tell me about OSSU's community"), TOPICS) == "about_ossu"
+    assert first_topic(classify("Is OSSU accredited?"), TOPICS) is None
+    assert topic_answer(classify("Which course covers compilers?"), TOPICS) is None
@@ -0,0 +1,52 @@
+# backend/test_keyword_index.py
+
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.keyword_index import BM25Index, reciprocal_rank_fusion
+
+DOCS = {
+    "haskell": "Functional programming in Haskell and OCaml.",
+    "python": "Introduction to programming in Python. Python is used throughout the first courses.",
+    "nand2tetris": "Build a modern computer from first principles: Nand2Tetris.",
+    "math": "Mathematics for computer science covers proofs and discrete math.",
+}
+
+
+def make_index():
+    index = BM25Index()
+    index.add(list(DOCS), list(DOCS.values()), [{"source": f"{doc_id}.md"} for doc_id in DOCS])
+    return index
+
+
+def test_bm25_ranks_the_best_term_match_first():
+    results = make_index().search("python programming", k=4)
+    assert [doc_id for doc_id, _ in results][:2] == ["python", "haskell"]
+    assert results[0][1] > results[1][1]
+
+
+def test_bm25_rare_identifiers_match_exactly():
+    assert [doc_id for doc_id, _ in make_index().search("nand2tetris", k=4)] == ["nand2tetris"]
+
+
+def test_bm25_removal_and_replacement():
+    index = make_index()
+    index.remove(["python"])
+    assert "python" not in [doc_id for doc_id, _ in index.search("python", k=4)]
+    index.add(["math"], ["Python for data science"])
+    assert index.search("python", k=1)[0][0] == "math"
+    assert index.get("math") == ("Python for data science", {})
+
+
+def test_rrf_prefers_ids_ranked_well_by_both_lists():
+    dense = ["a", "b", "c", "d"]
+    keyword = ["b", "c", "e"]
+    assert reciprocal_rank_fusion([dense, keyword])[:2] == ["b", "c"]
+    assert set(reciprocal_rank_fusion([dense, keyword])) == {"a", "b", "c", "d", "e"}
+
+
+def test_rrf_single_ranking_keeps_its_order():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
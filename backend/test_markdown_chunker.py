@@ -0,0 +1,55 @@
+# backend/test_markdown_chunker.py
+
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.conversation import estimate_tokens
+from app.services.markdown_chunker import MarkdownChunker
+
+HEADER = "| Courses | Duration | Effort |\n|:--|:--:|:--:|"
+ROWS = [f"| [Course {i}](https://example.com/{i}) | {i} weeks | {i} hours/week |" for i in range(40)]
+CODE = ["```python"] + [f"result_{i} = compute(value_{i}, factor={i})" for i in range(60)] + ["```"]
+
+
+def test_large_table_repeats_its_header_in_every_piece():
+    text = "# Curriculum\n\n## Core CS\n\n" + "\n".join([HEADER] + ROWS)
+    chunks = [(chunk, path) for chunk, path in MarkdownChunker(chunk_size=200).split(text) if HEADER in chunk]
+    assert len(chunks) > 1
+    rows_seen = []
+    for chunk, path in chunks:
+        assert path == ["Curriculum", "Core CS"]
+        rows_seen.extend(line for line in chunk.split("\n") if line.startswith("| [Course"))
+    assert rows_seen == ROWS
+
+
+def test_large_code_block_keeps_its_fences():
+    text = "# Setup\n\n" + "\n".join(CODE)
+    chunks = MarkdownChunker(chunk_size=150).split(text)
+    assert len(chunks) > 1
+    lines_seen = []
+    for chunk, _ in chunks:
+        code = chunk[chunk.index("```python"):].split("\n")
+        assert code[0] == "```python" and code[-1] == "```"
+        lines_seen.extend(code[1:-1])
+    assert lines_seen == CODE[1:-1]
+
+
+def test_chunks_fit_the_size_and_continuations_name_their_section():
+    text = "# Guide\n\n## Math\n\n" + " ".join(f"Sentence number {i} about discrete math." for i in range(80))
+    chunks = [chunk for chunk, path in MarkdownChunker(chunk_size=100).split(text) if path == ["Guide", "Math"]]
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].startswith("## Math\n")
+    assert all(chunk.startswith("Guide > Math\n") for chunk in chunks[1:])
+
+
+def test_small_sections_are_merged_and_keep_their_tables_whole():
+    text = "# Curriculum\n\n## Intro\n\nStart here.\n\n## Core CS\n\n" + "\n".join([HEADER] + ROWS[:3])
+    chunks = MarkdownChunker(chunk_size=500).split(text)
+    assert len(chunks) == 1
+    chunk, path = chunks[0]
+    assert path == ["Curriculum"]
+    assert "\n".join([HEADER] + ROWS[:3]) in chunk
@@ -0,0 +1,64 @@
+# backend/test_numpy_index.py
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.numpy_index import NumpyVectorIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path / "dense_index"))
+    index.add(["x", "y", "xy"], [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [1.0, 1.0, 0.0]])
+    return index
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    results = index.search([3.0, 0.1, 0.0], k=2)
+    assert [doc_id for doc_id, _ in results] == ["x", "xy"]
+    assert results[0][1] == pytest.approx(0.9994, abs=1e-3)
+    assert len(index.search([0.0, 1.0, 0.0], k=10)) == 3
+    with pytest.raises(ValueError):
+        index.search([1.0, 0.0], k=1)
+
+
+def test_add_replaces_and_remove_drops_by_id(index):
+    index.add(["x"], [[0.0, 0.0, 1.0]])
+    assert len(index) == 3
+    assert index.search([0.0, 0.0, 1.0], k=1)[0][0] == "x"
+    index.remove(["x", "unknown"])
+    assert sorted(index.ids) == ["xy", "y"]
+    assert set(index.vectors(["x", "y"])) == {"y"}
+
+
+def test_changed_dimensions_drop_old_vectors(index):
+    index.add(["z"], [[1.0, 0.0]])
+    assert index.ids == ["z"] and index.stats()["dimensions"] == 2
+
+
+def test_saved_index_is_memory_mapped_on_load(index, tmp_path):
+    index.save()
+    loaded = NumpyVectorIndex(str(tmp_path / "dense_index"))
+    assert loaded.load()
+    assert loaded.ids == index.ids and loaded.stats()["memory_mapped"]
+    assert loaded.search([0.0, 1.0, 0.0], k=1)[0][0] == "y"
+    # Writes after load build a new in-memory matrix; the map stays read-only
+    loaded.add(["z"], [[0.0, 0.0, 1.0]])
+    assert len(loaded) == 4 and not loaded.stats()["memory_mapped"]
+
+
+def test_missing_or_inconsistent_files_are_not_loaded(index, tmp_path):
+    assert not NumpyVectorIndex(str(tmp_path / "missing")).load()
+    index.save()
+    with open(index.ids_path, 'w', encoding='utf-8') as f:
+        json.dump(["x"], f)
+    assert not NumpyVectorIndex(str(tmp_path / "dense_index")).load()
+    np.save(index.matrix_path, np.zeros((1, 3), dtype=np.float64))
+    assert not NumpyVectorIndex(str(tmp_path / "dense_index")).load()
@@ -0,0 +1,172 @@
+# backend/test_provider_routing.py
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.ai_service import AIService, ContextAnswer
+from app.services.provider_routing import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, Deadline, ProviderRouter
+from bench_stubs import StubHFServer
+
+MISTRAL = "mistralai/Mistral-7B-Instruct-v0.2"
+LLAMA = "meta-llama/Llama-2-7b-chat-hf"
+FLAN = "google/flan-t5-large"
+CONTEXT = [{"content": "OSSU Core CS teaches Python, Racket and Java.", "metadata": {"source": "curriculum.md"}}]
+
+
+def test_consecutive_failures_open_the_circuit():
+    breaker = CircuitBreaker("p", failure_threshold=3, open_seconds=30)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED and breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN and not breaker.allow_request()
+
+
+def test_error_rate_opens_the_circuit():
+    breaker = CircuitBreaker("p", failure_threshold=3, error_rate_threshold=0.5, window=10)
+    for ok in (True, False, True, True, False, True, False):
+        breaker.record_success(0.1) if ok else breaker.record_failure(0.1)
+    assert breaker.state == CLOSED and breaker.error_rate == pytest.approx(3 / 7)
+    breaker.record_failure(0.1)
+    # Only two failures in a row, but half of the window failed
+    assert breaker.state == OPEN
+
+
+def test_tripping_failures_open_at_once():
+    router = ProviderRouter(["a", "b"])
+    router.record_failure("a", 0.1, "rate_limited")
+    router.record_failure("b", 0.1, "error")
+    assert router.breakers["a"].state == OPEN
+    assert router.breakers["b"].state == CLOSED
+
+
+def test_half_open_probe_closes_or_doubles_the_cool_down():
+    breaker = CircuitBreaker("p", failure_threshold=1, open_seconds=0.05, max_open_seconds=0.15)
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN and not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request() and breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # a single probe at a time
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN and breaker.open_seconds == pytest.approx(0.1)
+
+    time.sleep(0.11)
+    assert breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.open_seconds == pytest.approx(0.15)  # capped at max_open_seconds
+
+    time.sleep(0.16)
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED and breaker.open_seconds == pytest.approx(0.05)
+    assert breaker.error_rate == 0.0
+
+
+def test_router_prefers_healthy_providers():
+    router = ProviderRouter(["slow", "fast"], preference_seconds=0.5)
+    assert router.ranked() == ["slow", "fast"]
+    for _ in range(5):
+        router.record_success("slow", 3.0)
+        router.record_success("fast", 0.2)
+    assert router.ranked() == ["fast", "slow"]
+
+
+def test_deadline_caps_each_attempt():
+    deadline = Deadline(0.2)
+    assert deadline.timeout(10) <= 0.2
+    assert deadline.timeout(0.05) == 0.05
+    assert not deadline.expired
+    time.sleep(0.21)
+    assert deadline.expired and deadline.timeout(10) == 0.0
+
+
+@pytest.fixture
+def server():
+    server = StubHFServer({MISTRAL: "ok", LLAMA: "ok", FLAN: "ok"}, slow_seconds=1.0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def ai(server, monkeypatch):
+    """An AIService with only the HF models, short timeouts and no hedging."""
+    monkeypatch.setattr(settings, "HF_API_URL", server.url)
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", False)
+    monkeypatch.setattr(settings, "PROVIDER_TIMEOUT_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "BREAKER_OPEN_SECONDS", 0.2)
+    monkeypatch.setenv("HF_TOKEN", "test-token")
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AIService()
+    yield service
+    service.close()
+
+
+def ask(ai):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ai.generate_response("Which languages are taught?", CONTEXT, [])
+
+
+@pytest.mark.parametrize("mode", ["429", "503"])
+def test_rate_limited_or_loading_model_is_skipped_until_its_probe(ai, server, mode):
+    server.modes[MISTRAL] = mode
+    assert ask(ai) == server.answer
+    assert ai.router.breakers[f"hf:{MISTRAL}"].state == OPEN
+    assert ask(ai) == server.answer
+    assert server.requests == {MISTRAL: 1, LLAMA: 2}
+
+    # After the cool-down one probe goes through; the recovered model closes its circuit
+    server.modes[MISTRAL] = "ok"
+    time.sleep(0.25)
+    assert ask(ai) == server.answer
+    assert server.requests[MISTRAL] == 2
+    assert ai.router.breakers[f"hf:{MISTRAL}"].state == CLOSED
+
+
+def test_failed_probe_doubles_the_cool_down(ai, server):
+    server.modes[MISTRAL] = "503"
+    ask(ai)
+    time.sleep(0.25)
+    ask(ai)
+    breaker = ai.router.breakers[f"hf:{MISTRAL}"]
+    assert server.requests[MISTRAL] == 2
+    assert breaker.state == OPEN and breaker.open_seconds == pytest.approx(0.4)
+
+
+def test_slow_model_is_ranked_behind_the_healthy_one(ai, server):
+    server.modes[MISTRAL] = "slow"
+    start = time.perf_counter()
+    assert ask(ai) == server.answer
+    assert time.perf_counter() - start < 0.9  # gave up on Mistral after PROVIDER_TIMEOUT_SECONDS
+    assert ai.router.ranked()[0] == f"hf:{LLAMA}"
+    ask(ai)
+    assert server.requests == {MISTRAL: 1, LLAMA: 2}
+
+
+def test_slow_model_opens_after_the_failure_threshold(ai, server):
+    server.modes[MISTRAL] = "slow"
+    ai.router.preference_seconds = 100.0  # keep trying Mistral first despite its latency
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        assert ask(ai) == server.answer
+    assert ai.router.breakers[f"hf:{MISTRAL}"].state == OPEN
+    ask(ai)
+    assert server.requests[MISTRAL] == settings.BREAKER_FAILURE_THRESHOLD
+
+
+def test_every_provider_down_answers_from_context(ai, server):
+    for model in (MISTRAL, LLAMA, FLAN):
+        server.modes[model] = "429"
+    assert isinstance(ask(ai), ContextAnswer)
+    assert all(breaker.state == OPEN for breaker in ai.router.breakers.values())
+    ask(ai)
+    assert sum(server.requests.values()) == 3
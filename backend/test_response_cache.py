@@ -0,0 +1,101 @@
+# backend/test_response_cache.py
+
+import json
+import os
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services import response_cache
+from app.services.indexer import MANIFEST_FILE, IndexGeneration
+from app.services.response_cache import ResponseCache
+
+CONTEXT = [{"content": "Core CS covers programming, math, systems and theory.", "metadata": {"source": "README.md"}}]
+
+
+def make_cache(**overrides):
+    options = dict(max_entries=3, ttl_seconds=60, similarity_threshold=0.95)
+    options.update(overrides)
+    return ResponseCache(**options)
+
+
+def test_exact_hits_ignore_case_and_punctuation():
+    cache = make_cache()
+    cache.put("What is Core CS?", None, "Core CS is the main curriculum.", CONTEXT)
+    entry = cache.get("what is core cs")
+    assert entry["response"] == "Core CS is the main curriculum."
+    assert entry["context"] == CONTEXT
+    assert cache.get("What is Core Math?") is None
+
+
+def test_semantic_hits_need_an_embedding_above_the_threshold():
+    cache = make_cache()
+    cache.put("What is Core CS?", [1.0, 0.0, 0.0], "Core CS is the main curriculum.", CONTEXT)
+    assert cache.get("Explain Core CS") is None  # no embedding: exact lookup only
+    assert cache.get("Explain Core CS", [0.99, 0.05, 0.0])["response"] == "Core CS is the main curriculum."
+    assert cache.get("How long is Core Math?", [0.0, 1.0, 0.0]) is None
+    assert cache.stats()["semantic_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = make_cache(ttl_seconds=60)
+    cache.put("What is Core CS?", [1.0, 0.0], "Core CS is the main curriculum.", CONTEXT)
+    now[0] += 59
+    assert cache.get("What is Core CS?") is not None
+    now[0] += 2
+    assert cache.get("What is Core CS?") is None
+    assert cache.get("Explain Core CS", [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = make_cache(max_entries=3)
+    for question in ("q1", "q2", "q3"):
+        cache.put(question, None, f"answer {question}", [])
+    cache.get("q1")
+    cache.put("q4", None, "answer q4", [])
+    assert cache.stats()["entries"] == 3
+    assert cache.get("q2") is None
+    assert cache.get("q1") is not None and cache.get("q4") is not None
+
+
+def test_invalidate_drops_every_entry():
+    cache = make_cache()
+    cache.put("What is Core CS?", [1.0, 0.0], "Core CS is the main curriculum.", CONTEXT)
+    cache.invalidate()
+    assert cache.get("What is Core CS?", [1.0, 0.0]) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def write_manifest(directory, generation):
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "generation": generation, "files": {}}, f)
+
+
+def test_reindex_by_another_process_drops_cached_answers(tmp_path):
+    write_manifest(tmp_path, "first")
+    cache = make_cache(generation=IndexGeneration(str(tmp_path)).current)
+    cache.put("What is Core CS?", [1.0, 0.0], "Core CS is the main curriculum.", CONTEXT)
+    assert cache.get("What is Core CS?") is not None
+
+    # e.g. rebuild_vector_store.py synced the shared CHROMA_DIR
+    write_manifest(tmp_path, "second")
+    assert cache.get("What is Core CS?") is None
+    assert cache.get("Explain Core CS", [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+    cache.put("What is Core CS?", [1.0, 0.0], "Core CS now has five parts.", CONTEXT)
+    assert cache.get("What is Core CS?")["response"] == "Core CS now has five parts."
+
+
+def test_wiped_index_directory_drops_cached_answers(tmp_path):
+    write_manifest(tmp_path, "first")
+    cache = make_cache(generation=IndexGeneration(str(tmp_path)).current)
+    cache.put("What is Core CS?", None, "Core CS is the main curriculum.", CONTEXT)
+    os.remove(tmp_path / MANIFEST_FILE)
+    assert cache.get("What is Core CS?") is None
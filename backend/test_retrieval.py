@@ -0,0 +1,26 @@
+# backend/test_retrieval.py
+
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.retrieval import maximal_marginal_relevance, relevant_mask, remove_near_duplicates
+
+
+def test_relevance_cutoffs_keep_exempt_hits():
+    # None marks an exact keyword match, which is kept whatever the scores
+    assert relevant_mask([0.9, 0.85, 0.2, None], min_score=0.3, ratio=0.5) == [True, True, False, True]
+
+
+def test_near_duplicates_are_dropped():
+    texts = ["OSSU core programming courses", "OSSU core programming courses.", "Math prerequisites"]
+    assert remove_near_duplicates(texts, 0.9, content=str) == ["OSSU core programming courses", "Math prerequisites"]
+
+
+def test_mmr_trades_relevance_for_diversity():
+    vectors = [[1.0, 0.0], [0.99, 0.05], [0.6, 0.8]]
+    assert maximal_marginal_relevance([1.0, 0.0], vectors, 2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance([1.0, 0.0], vectors, 2, lambda_mult=0.3) == [0, 2]
+    assert maximal_marginal_relevance([1.0, 0.0], [], 2, lambda_mult=0.5) == []
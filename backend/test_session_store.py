@@ -0,0 +1,99 @@
+# backend/test_session_store.py
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models import ChatMessage
+from app.services.session_store import InMemorySessionStore, RedisSessionStore, SessionStore
+
+LIMITS = dict(max_sessions=3, max_history=4, ttl_seconds=600, max_bytes=200, summary_tokens=200)
+
+
+def make_store(backend, server=None, **overrides):
+    limits = dict(LIMITS, **overrides)
+    if backend == "memory":
+        return InMemorySessionStore(**limits)
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisSessionStore(fakeredis.FakeRedis(server=server or fakeredis.FakeServer()), **limits)
+
+
+def size(messages):
+    return sum(len(message.role) + len(message.content.encode("utf-8")) for message in messages)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    return make_store(request.param)
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class Incomplete(SessionStore):
+        def get_conversation(self, session_id):
+            return "", []
+
+    with pytest.raises(TypeError):
+        Incomplete(**{key: LIMITS[key] for key in ("max_history", "ttl_seconds", "max_bytes")})
+
+
+def test_history_is_capped_and_dropped_turns_are_summarized(store):
+    for i in range(6):
+        store.append("s", [ChatMessage(role="user", content=f"question {i}")])
+    summary, history = store.get_conversation("s")
+    assert [message.content for message in history] == [f"question {i}" for i in range(2, 6)]
+    assert "question 0" in summary and "question 1" in summary
+
+
+def test_history_fits_in_max_bytes(store):
+    for i in range(4):
+        store.append("s", [ChatMessage(role="assistant", content=f"{i} " + "é" * 40)])
+    _, history = store.get_conversation("s")
+    assert size(history) <= LIMITS["max_bytes"]
+    assert history[-1].content.startswith("3 ")
+
+
+def test_oversized_message_is_truncated_not_dropped(store):
+    store.append("s", [ChatMessage(role="user", content="x" * 1000)])
+    _, history = store.get_conversation("s")
+    assert len(history) == 1 and size(history) <= LIMITS["max_bytes"]
+
+
+def test_backends_trim_identically():
+    memory, redis = make_store("memory"), make_store("redis")
+    for i in range(12):
+        messages = [ChatMessage(role="user", content="q" * (i * 7)), ChatMessage(role="assistant", content="é" * (i * 5))]
+        memory.append("s", messages)
+        redis.append("s", messages)
+    assert memory.get_conversation("s") == redis.get_conversation("s")
+
+
+def test_least_recently_used_sessions_are_evicted(store):
+    for session_id in ("a", "b", "c"):
+        store.append(session_id, [ChatMessage(role="user", content=session_id)])
+    store.get_conversation("a")
+    store.append("d", [ChatMessage(role="user", content="d")])
+    assert store.stats()["sessions"] == 3
+    assert store.get_history("b") == []
+    assert store.get_history("a")
+
+
+def test_concurrent_redis_appends_do_not_over_trim():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    workers = [make_store("redis", server, max_bytes=10_000) for _ in range(4)]
+
+    def chat(worker, n):
+        for i in range(25):
+            worker.append("shared", [ChatMessage(role="user", content=f"{n}-{i}")])
+
+    threads = [threading.Thread(target=chat, args=(worker, n)) for n, worker in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(workers[0].get_history("shared")) == LIMITS["max_history"]
@@ -0,0 +1,100 @@
+# backend/test_single_flight.py
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.do(("answer", "q"), work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert len(runs) == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "callers": 5, "fan_in_ratio": 5.0}
+
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0)
+        return len(runs)
+
+    async def main():
+        await asyncio.gather(flight.do(("search", "a"), work), flight.do(("search", "b"), work))
+        await flight.do(("search", "a"), work)
+
+    asyncio.run(main())
+    assert len(runs) == 3
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0)
+        raise ValueError("provider down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do(("answer", "q"), work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["executions"] == 1
+
+
+def test_stream_followers_get_every_chunk():
+    flight = SingleFlight()
+    runs = []
+
+    async def chunks():
+        runs.append(1)
+        for chunk in ("a", "b", "c"):
+            await asyncio.sleep(0.005)
+            yield chunk
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in flight.stream(("stream", "q"), chunks)]
+
+    async def main():
+        # The late caller joins after the first chunk and gets it replayed
+        return await asyncio.gather(collect(0), collect(0), collect(0.007))
+
+    assert asyncio.run(main()) == [["a", "b", "c"]] * 3
+    assert len(runs) == 1
+
+
+def test_stream_errors_are_raised_after_the_chunks():
+    flight = SingleFlight()
+
+    async def chunks():
+        yield "partial"
+        raise RuntimeError("stream broke")
+
+    async def main():
+        received = []
+        with pytest.raises(RuntimeError):
+            async for chunk in flight.stream(("stream", "q"), chunks):
+                received.append(chunk)
+        return received
+
+    assert asyncio.run(main()) == ["partial"]